@@ -1,5 +1,6 @@
 # config/settings.py
 import os
+from datetime import datetime
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -27,6 +28,37 @@ EMAIL = {
     'recipient_emails': os.getenv('RECIPIENT_EMAILS', '').split(',')
 }
 
+# 缓存配置（CacheManager 的进程内一级缓存）
+CACHE = {
+    # 每个前缀默认最多保留的条目数
+    'local_capacity': 256,
+    # 本地条目的最长有效期（秒），不超过 Redis 中的剩余 TTL
+    'local_ttl': 60,
+    # 本地缓存前缀代数的时间（秒），即其他进程的 invalidate 最长多久后可见
+    'generation_ttl': 1.0,
+    # 软过期后仍返回旧值并在后台刷新的时间（秒）
+    'stale_ttl': 60,
+    # 概率提前过期（XFetch）的系数，越大越早刷新，0 表示关闭
+    'early_expiration_beta': 1.0,
+    # 防击穿锁的有效期（秒），等待锁的调用方超过该时间后自行计算
+    'lock_timeout': 30,
+    # 等待其他进程写入结果时轮询 Redis 的间隔（秒）
+    'lock_poll': 0.05,
+    # Redis 中缓存值的编码，'auto' 表示已安装 msgpack/zstandard 时使用，否则为 JSON/zlib
+    'codec': {
+        'format': 'auto',
+        'compression': 'auto',
+        # 小于该字节数的条目不压缩
+        'compress_min_bytes': 1024
+    },
+    # 按前缀覆盖容量
+    'capacities': {
+        'trending': 128,
+        'lang_stats': 32,
+        'activity': 128
+    }
+}
+
 # 日志配置
 LOGGING = {
     'version': 1,
@@ -53,4 +85,61 @@ LOGGING = {
             'level': 'INFO',
         }
     }
-}
\ No newline at end of file
+}
+
+# 活跃度评分定义
+# 每个定义按 components 的顺序加权求和后乘以 scale、保留 ndigits 位小数。
+# 修改权重或上限时应递增 version，已入库的分数可按版本区分
+SCORING = {
+    # 趋势页数据（ActivityProcessor / TrendAnalyzer）
+    'trending': {
+        'version': 1,
+        'scale': 100,
+        'ndigits': 2,
+        'components': [
+            {'metric': 'stars', 'field': 'stars', 'weight': 0.3, 'cap': 10000},
+            {'metric': 'forks', 'field': 'forks', 'weight': 0.2, 'cap': 5000},
+            {'metric': 'today_stars', 'field': 'today_stars', 'weight': 0.2, 'cap': 1000},
+            {
+                'metric': 'language_popularity',
+                'field': 'language',
+                'weight': 0.15,
+                'table': {
+                    'python': 1.0,
+                    'javascript': 1.0,
+                    'java': 0.9,
+                    'go': 0.9,
+                    'typescript': 0.9,
+                    'rust': 0.8,
+                    'c++': 0.8,
+                    'ruby': 0.7
+                },
+                'default': 0.5
+            },
+            {
+                'metric': 'description_quality',
+                'field': 'description',
+                'weight': 0.15,
+                'text': {
+                    'lengths': [[20, 0.5], [50, 0.3]],
+                    'keywords': ['api', 'framework', 'library', 'tool'],
+                    'keyword_bonus': 0.2
+                }
+            }
+        ]
+    },
+    # repositories 表（DatabaseManager.update_activity_scores）
+    'repository': {
+        'version': 1,
+        'scale': 100,
+        'ndigits': 2,
+        'components': [
+            {'metric': 'stars', 'field': 'stars', 'weight': 0.3, 'cap': 10000},
+            {'metric': 'forks', 'field': 'forks', 'weight': 0.2, 'cap': 5000},
+            {'metric': 'issues', 'field': 'open_issues', 'weight': 0.1, 'cap': 1000},
+            {'metric': 'watchers', 'field': 'watchers', 'weight': 0.1, 'cap': 10000},
+            {'metric': 'contributors', 'field': 'contributors_count', 'weight': 0.15, 'cap': 100},
+            {'metric': 'commits', 'field': 'recent_commits', 'weight': 0.15, 'cap': 1000}
+        ]
+    }
+}
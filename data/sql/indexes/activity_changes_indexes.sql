@@ -7,5 +7,14 @@ CREATE INDEX IF NOT EXISTS idx_activity_changes_dates ON activity_changes(start_
 -- 仓库名称索引
 CREATE INDEX IF NOT EXISTS idx_activity_changes_repo ON activity_changes(repository_name);
 
--- 活跃度变化索引
-CREATE INDEX IF NOT EXISTS idx_activity_change ON activity_changes(activity_change);
+-- 活跃度变化覆盖索引
+CREATE INDEX IF NOT EXISTS idx_activity_change_covering ON activity_changes(
+    activity_change, id, repository_name, stars_change, forks_change,
+    issues_change, start_date, end_date
+);
+
+-- 正向变化的部分覆盖索引（positive_only）
+CREATE INDEX IF NOT EXISTS idx_activity_change_positive ON activity_changes(
+    activity_change, id, repository_name, stars_change, forks_change,
+    issues_change, start_date, end_date
+) WHERE activity_change > 0;
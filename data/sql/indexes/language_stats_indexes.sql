@@ -7,5 +7,7 @@ CREATE INDEX IF NOT EXISTS idx_language_stats_date ON language_stats(date);
 -- 语言索引
 CREATE INDEX IF NOT EXISTS idx_language_stats_lang ON language_stats(language);
 
--- 活跃度索引
-CREATE INDEX IF NOT EXISTS idx_language_stats_activity ON language_stats(average_activity_score);
+-- 活跃度覆盖索引：language_statistics 按 (活跃度, id) 排序，过滤条件在索引内判断
+CREATE INDEX IF NOT EXISTS idx_language_stats_activity_covering ON language_stats(
+    average_activity_score, id, language, repository_count, total_stars, total_forks, date
+);
@@ -0,0 +1,5 @@
+-- repository_daily_deltas_indexes.sql
+-- 仓库每日变化表索引
+
+-- 组合索引：日期和活跃度
+CREATE INDEX IF NOT EXISTS idx_daily_deltas_date_activity ON repository_daily_deltas(date, activity_score);
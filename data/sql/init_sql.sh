@@ -12,7 +12,6 @@ NC='\033[0m' # No Color
 SQL_ROOT="."
 TABLES_DIR="${SQL_ROOT}/tables"
 INDEXES_DIR="${SQL_ROOT}/indexes"
-VIEWS_DIR="${SQL_ROOT}/views"
 
 # 创建表文件
 create_table_files() {
@@ -95,6 +94,29 @@ CREATE TABLE IF NOT EXISTS activity_changes (
     end_date TEXT NOT NULL,               -- 结束日期
     UNIQUE(repository_name, start_date, end_date)
 );
+EOF
+
+    # repository_daily_deltas.sql
+    cat > "${TABLES_DIR}/repository_daily_deltas.sql" << 'EOF'
+-- repository_daily_deltas.sql
+-- 仓库每日变化汇总（取代 recent_trending_repos 视图，按天增量刷新）
+
+CREATE TABLE IF NOT EXISTS repository_daily_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    repository_name TEXT NOT NULL,         -- 仓库名称
+    date TEXT NOT NULL,                    -- 抓取日期
+    language TEXT,                         -- 主要编程语言
+    activity_score REAL DEFAULT 0.0,       -- 当天最后一次抓取的活跃度
+    stars INTEGER DEFAULT 0,               -- star数量
+    forks INTEGER DEFAULT 0,               -- fork数量
+    open_issues INTEGER DEFAULT 0,         -- 开放的issue数量
+    previous_date TEXT,                    -- 前一天趋势历史的日期
+    score_change REAL,                     -- 活跃度变化
+    stars_change INTEGER,                  -- star变化
+    forks_change INTEGER,                  -- fork变化
+    issues_change INTEGER,                 -- issue变化
+    UNIQUE(repository_name, date)
+);
 EOF
 
     echo -e "${GREEN}Table SQL files created successfully${NC}"
@@ -151,8 +173,10 @@ CREATE INDEX IF NOT EXISTS idx_language_stats_date ON language_stats(date);
 -- 语言索引
 CREATE INDEX IF NOT EXISTS idx_language_stats_lang ON language_stats(language);
 
--- 活跃度索引
-CREATE INDEX IF NOT EXISTS idx_language_stats_activity ON language_stats(average_activity_score);
+-- 活跃度覆盖索引：language_statistics 按 (活跃度, id) 排序，过滤条件在索引内判断
+CREATE INDEX IF NOT EXISTS idx_language_stats_activity_covering ON language_stats(
+    average_activity_score, id, language, repository_count, total_stars, total_forks, date
+);
 EOF
 
     # activity_changes_indexes.sql
@@ -166,76 +190,29 @@ CREATE INDEX IF NOT EXISTS idx_activity_changes_dates ON activity_changes(start_
 -- 仓库名称索引
 CREATE INDEX IF NOT EXISTS idx_activity_changes_repo ON activity_changes(repository_name);
 
--- 活跃度变化索引
-CREATE INDEX IF NOT EXISTS idx_activity_change ON activity_changes(activity_change);
-EOF
-
-    echo -e "${GREEN}Index SQL files created successfully${NC}"
-}
+-- 活跃度变化覆盖索引
+CREATE INDEX IF NOT EXISTS idx_activity_change_covering ON activity_changes(
+    activity_change, id, repository_name, stars_change, forks_change,
+    issues_change, start_date, end_date
+);
 
-# 创建视图文件
-create_view_files() {
-    echo -e "${BLUE}Creating view SQL files...${NC}"
-    
-    # recent_trending_repos.sql
-    cat > "${VIEWS_DIR}/recent_trending_repos.sql" << 'EOF'
--- recent_trending_repos.sql
--- 最近趋势仓库视图
-
-CREATE VIEW IF NOT EXISTS recent_trending_repos AS
-SELECT 
-    r.*,
-    th.activity_score as previous_score,
-    (r.activity_score - th.activity_score) as score_change,
-    (r.stars - th.stars) as stars_change,
-    (r.forks - th.forks) as forks_# 继续 create_view_files() 函数
-
-    # recent_trending_repos.sql (续)
-    cat > "${VIEWS_DIR}/recent_trending_repos.sql" << 'EOF'
--- recent_trending_repos.sql
--- 最近趋势仓库视图
-
-CREATE VIEW IF NOT EXISTS recent_trending_repos AS
-SELECT 
-    r.*,
-    th.activity_score as previous_score,
-    (r.activity_score - th.activity_score) as score_change,
-    (r.stars - th.stars) as stars_change,
-    (r.forks - th.forks) as forks_change,
-    (r.open_issues - th.open_issues) as issues_change,
-    th.date as previous_date
-FROM repositories r
-LEFT JOIN trending_history th ON 
-    th.repository_name = r.name AND 
-    th.date = date(r.crawled_at, '-1 day')
-WHERE r.crawled_at >= date('now', '-7 days')
-ORDER BY r.activity_score DESC;
+-- 正向变化的部分覆盖索引（positive_only）
+CREATE INDEX IF NOT EXISTS idx_activity_change_positive ON activity_changes(
+    activity_change, id, repository_name, stars_change, forks_change,
+    issues_change, start_date, end_date
+) WHERE activity_change > 0;
 EOF
 
-    # language_trends.sql
-    cat > "${VIEWS_DIR}/language_trends.sql" << 'EOF'
--- language_trends.sql
--- 编程语言趋势视图
-
-CREATE VIEW IF NOT EXISTS language_trends AS
-SELECT 
-    language,
-    COUNT(*) as repo_count,
-    SUM(stars) as total_stars,
-    SUM(forks) as total_forks,
-    AVG(activity_score) as avg_activity_score,
-    MAX(crawled_at) as last_updated,
-    SUM(CASE WHEN crawled_at >= date('now', '-7 days') THEN 1 ELSE 0 END) as recent_repos_count
-FROM repositories
-WHERE 
-    crawled_at >= date('now', '-30 days')
-    AND language IS NOT NULL
-GROUP BY language
-HAVING repo_count > 0
-ORDER BY avg_activity_score DESC;
+    # repository_daily_deltas_indexes.sql
+    cat > "${INDEXES_DIR}/repository_daily_deltas_indexes.sql" << 'EOF'
+-- repository_daily_deltas_indexes.sql
+-- 仓库每日变化表索引
+
+-- 组合索引：日期和活跃度
+CREATE INDEX IF NOT EXISTS idx_daily_deltas_date_activity ON repository_daily_deltas(date, activity_score);
 EOF
 
-    echo -e "${GREEN}View SQL files created successfully${NC}"
+    echo -e "${GREEN}Index SQL files created successfully${NC}"
 }
 
 # 验证SQL文件
@@ -309,7 +286,6 @@ show_help() {
     echo "  -t, --test        创建测试数据"
     echo "  --tables          只创建表定义"
     echo "  --indexes         只创建索引"
-    echo "  --views           只创建视图"
 }
 
 # 主函数
@@ -330,7 +306,6 @@ main() {
             -i | --init )
                 create_table_files
                 create_index_files
-                create_view_files
                 validate_sql_files
                 ;;
             -v | --validate )
@@ -345,9 +320,6 @@ main() {
             --indexes )
                 create_index_files
                 ;;
-            --views )
-                create_view_files
-                ;;
             * )
                 echo -e "${RED}Unknown parameter: $1${NC}"
                 show_help
@@ -360,7 +332,7 @@ main() {
 
 # 检查必要的目录
 check_directories() {
-    for dir in "$TABLES_DIR" "$INDEXES_DIR" "$VIEWS_DIR"; do
+    for dir in "$TABLES_DIR" "$INDEXES_DIR"; do
         if [ ! -d "$dir" ]; then
             echo -e "${BLUE}Creating directory: $dir${NC}"
             mkdir -p "$dir"
@@ -0,0 +1,19 @@
+-- repository_daily_deltas.sql
+-- 仓库每日变化汇总（取代 recent_trending_repos 视图，按天增量刷新）
+
+CREATE TABLE IF NOT EXISTS repository_daily_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    repository_name TEXT NOT NULL,         -- 仓库名称
+    date TEXT NOT NULL,                    -- 抓取日期
+    language TEXT,                         -- 主要编程语言
+    activity_score REAL DEFAULT 0.0,       -- 当天最后一次抓取的活跃度
+    stars INTEGER DEFAULT 0,               -- star数量
+    forks INTEGER DEFAULT 0,               -- fork数量
+    open_issues INTEGER DEFAULT 0,         -- 开放的issue数量
+    previous_date TEXT,                    -- 前一天趋势历史的日期
+    score_change REAL,                     -- 活跃度变化
+    stars_change INTEGER,                  -- star变化
+    forks_change INTEGER,                  -- fork变化
+    issues_change INTEGER,                 -- issue变化
+    UNIQUE(repository_name, date)
+);
@@ -44,6 +44,15 @@ setup(
             'mypy>=0.910',
             'isort>=5.9',
         ],
+        'fast': [
+            'lxml>=4.9',
+            'selectolax>=0.3.17',
+            'numpy>=1.22',
+        ],
+        'cache': [
+            'msgpack>=1.0',
+            'zstandard>=0.18',
+        ],
     },
     entry_points={
         'console_scripts': [
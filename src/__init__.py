@@ -5,9 +5,9 @@ GitHub Trending Tracker
 A tool to track GitHub trending repositories with community activity analysis.
 """
 
-from src.crawler.github_crawler import GitHubTrendingCrawler
+from src.crawler.github_crawler import GitHubCrawler
 from src.database.db_manager import DatabaseManager
-from src.notification.email_notifier import EmailNotifier
+from src.notifier.email_notifier import EmailNotifier
 from src.utils.logger import setup_logging
 
 __version__ = '1.0.0'
@@ -18,7 +18,7 @@ __email__ = 'your.email@example.com'
 logger = setup_logging()
 
 __all__ = [
-    'GitHubTrendingCrawler',
+    'GitHubCrawler',
     'DatabaseManager',
     'EmailNotifier',
     'setup_logging',
@@ -0,0 +1,284 @@
+# src/analyzers/aggregate.py
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.analyzers.topk import MultiTopK
+
+
+class ExactSum:
+    """
+    可合并的精确浮点求和
+
+    保存 Shewchuk 算法的无重叠部分和，结果与 math.fsum 相同且与相加顺序无关，
+    因此分片求和后合并与在完整输入上求和逐位一致
+    """
+
+    __slots__ = ('partials',)
+
+    def __init__(self, partials: Optional[Iterable[float]] = None):
+        self.partials: List[float] = list(partials or ())
+
+    def add(self, x: float) -> None:
+        partials = self.partials
+        x = float(x)
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def merge(self, other: 'ExactSum') -> 'ExactSum':
+        for partial in other.partials:
+            self.add(partial)
+        return self
+
+    @property
+    def value(self) -> float:
+        return math.fsum(self.partials)
+
+
+class TrendAccumulator:
+    """
+    趋势分析的单遍累加器
+
+    逐条消费仓库数据，一次遍历同时维护基本统计、语言分布、语言趋势、
+    活跃度分段和流行度排行，输入可以是任意迭代器，不需要先转成列表。
+
+    累加器是可合并的部分聚合：输入切成连续分片分别累加（offset 为分片
+    在完整输入中的起始下标），再按输入顺序 merge，结果与整体累加完全相同。
+    活跃度用精确求和，平均值为 和/数量，与分片方式无关。
+    to_state/from_state 转为只含基本类型的状态，可跨进程传递。
+    """
+
+    # 活跃度分段，按顺序取第一个满足 score >= min 的分段
+    ACTIVITY_RANGES = (('high', 80), ('medium', 50), ('low', 0))
+
+    # 流行度排行名称与排序字段
+    POPULARITY_KEYS = {
+        'most_starred': 'stars',
+        'most_forked': 'forks',
+        'trending_today': 'today_stars'
+    }
+
+    def __init__(self, top_k: int = 5, offset: int = 0):
+        self.top_k = top_k
+        self.offset = offset
+        self.count = 0
+        self.total_stars = 0
+        self.total_forks = 0
+        self.min_activity: Optional[float] = None
+        self.max_activity: Optional[float] = None
+        self.languages: Dict[Any, Dict[str, Any]] = {}
+        self.activity_ranges: Dict[str, List[Dict]] = {
+            name: [] for name, _ in self.ACTIVITY_RANGES
+        }
+        # 以输入序号区分并列，结果与稳定排序一致
+        self.popularity = MultiTopK(top_k, self.POPULARITY_KEYS)
+
+    def add(self, repo: Dict[str, Any]) -> None:
+        """累加一条仓库数据"""
+        self.update((repo,))
+
+    def update(self, repositories: Iterable[Dict[str, Any]]) -> 'TrendAccumulator':
+        """累加一批仓库数据"""
+        # 热循环只使用局部变量，结束后写回实例状态
+        count = self.count
+        offset = self.offset
+        total_stars = self.total_stars
+        total_forks = self.total_forks
+        min_activity = self.min_activity
+        max_activity = self.max_activity
+        languages = self.languages
+        ranges = [(minimum, self.activity_ranges[name]) for name, minimum in self.ACTIVITY_RANGES]
+        rankings = [
+            (key, self.popularity.rankings[name].push_value)
+            for name, key in self.POPULARITY_KEYS.items()
+        ]
+
+        for repo in repositories:
+            stars = repo.get('stars', 0)
+            forks = repo.get('forks', 0)
+            score = repo.get('activity_score', 0)
+            language = repo.get('language', 'Unknown')
+            name = repo['name']
+
+            count += 1
+            total_stars += stars
+            total_forks += forks
+            # 与 min()/max() 一致，并列时保留先出现的值
+            if min_activity is None or score < min_activity:
+                min_activity = score
+            if max_activity is None or score > max_activity:
+                max_activity = score
+
+            stats = languages.get(language)
+            if stats is None:
+                stats = languages[language] = self._new_language_stats()
+            stats['repos'] += 1
+            stats['total_stars'] += stars
+            stats['total_forks'] += forks
+            stats['activity'].add(score)
+            stats['repositories'].append(name)
+
+            for minimum, bucket in ranges:
+                if score >= minimum:
+                    bucket.append({'name': name, 'score': score, 'language': language})
+                    break
+
+            for key, push in rankings:
+                push(repo.get(key, 0), repo, offset + count)
+
+        self.count = count
+        self.total_stars = total_stars
+        self.total_forks = total_forks
+        self.min_activity = min_activity
+        self.max_activity = max_activity
+        return self
+
+    @staticmethod
+    def _new_language_stats() -> Dict[str, Any]:
+        return {
+            'repos': 0,
+            'total_stars': 0,
+            'total_forks': 0,
+            'activity': ExactSum(),
+            'repositories': []
+        }
+
+    def merge(self, other: 'TrendAccumulator') -> 'TrendAccumulator':
+        """合并紧随本分片之后的另一个分片"""
+        if not other.count:
+            return self
+        if not self.count or other.min_activity < self.min_activity:
+            self.min_activity = other.min_activity
+        if not self.count or other.max_activity > self.max_activity:
+            self.max_activity = other.max_activity
+
+        self.count += other.count
+        self.total_stars += other.total_stars
+        self.total_forks += other.total_forks
+
+        for language, other_stats in other.languages.items():
+            stats = self.languages.get(language)
+            if stats is None:
+                stats = self.languages[language] = self._new_language_stats()
+            stats['repos'] += other_stats['repos']
+            stats['total_stars'] += other_stats['total_stars']
+            stats['total_forks'] += other_stats['total_forks']
+            stats['activity'].merge(other_stats['activity'])
+            stats['repositories'].extend(other_stats['repositories'])
+
+        for name, repos in other.activity_ranges.items():
+            self.activity_ranges[name].extend(repos)
+        self.popularity.merge(other.popularity)
+        return self
+
+    def to_state(self) -> Dict[str, Any]:
+        """导出为只含基本类型的状态"""
+        return {
+            'top_k': self.top_k,
+            'offset': self.offset,
+            'count': self.count,
+            'total_stars': self.total_stars,
+            'total_forks': self.total_forks,
+            'min_activity': self.min_activity,
+            'max_activity': self.max_activity,
+            # 语言可能为 None，用列表而不是字典保存
+            'languages': [
+                [
+                    language,
+                    stats['repos'],
+                    stats['total_stars'],
+                    stats['total_forks'],
+                    list(stats['activity'].partials),
+                    list(stats['repositories'])
+                ]
+                for language, stats in self.languages.items()
+            ],
+            'activity_ranges': {
+                name: list(repos) for name, repos in self.activity_ranges.items()
+            },
+            'popularity': {
+                name: [list(entry) for entry in ranking.entries()]
+                for name, ranking in self.popularity.rankings.items()
+            }
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'TrendAccumulator':
+        """由 to_state 的结果恢复"""
+        accumulator = cls(state['top_k'], state['offset'])
+        accumulator.count = state['count']
+        accumulator.total_stars = state['total_stars']
+        accumulator.total_forks = state['total_forks']
+        accumulator.min_activity = state['min_activity']
+        accumulator.max_activity = state['max_activity']
+        for language, repos, stars, forks, activity, names in state['languages']:
+            accumulator.languages[language] = {
+                'repos': repos,
+                'total_stars': stars,
+                'total_forks': forks,
+                'activity': ExactSum(activity),
+                'repositories': list(names)
+            }
+        for name, repos in state['activity_ranges'].items():
+            accumulator.activity_ranges[name] = list(repos)
+        for name, entries in state['popularity'].items():
+            ranking = accumulator.popularity.rankings[name]
+            for value, sequence, item in entries:
+                ranking.push_value(value, item, sequence)
+        return accumulator
+
+    @property
+    def total_activity(self) -> ExactSum:
+        """活跃度总和，由各语言的精确和合并得到"""
+        total = ExactSum()
+        for stats in self.languages.values():
+            total.merge(stats['activity'])
+        return total
+
+    def metrics(self) -> Dict[str, Any]:
+        """基本统计，对应 TrendAnalyzer.calculate_metrics"""
+        return {
+            'total_repositories': self.count,
+            'total_stars': self.total_stars,
+            'total_forks': self.total_forks,
+            'average_activity_score': (
+                self.total_activity.value / self.count if self.count else 0
+            ),
+            'language_distribution': {
+                language: stats['repos'] for language, stats in self.languages.items()
+            },
+            'min_activity': self.min_activity if self.count else 0,
+            'max_activity': self.max_activity if self.count else 0
+        }
+
+    def language_trends(self) -> Dict[str, Any]:
+        """各语言的仓库数、star/fork 合计与平均活跃度"""
+        return {
+            language: {
+                'repos': stats['repos'],
+                'total_stars': stats['total_stars'],
+                'total_forks': stats['total_forks'],
+                'avg_activity': stats['activity'].value / stats['repos'],
+                'repositories': list(stats['repositories'])
+            }
+            for language, stats in self.languages.items()
+        }
+
+    def activity_trends(self) -> Dict[str, Any]:
+        """按活跃度分段的仓库列表"""
+        return {
+            name: {'min': minimum, 'repos': list(self.activity_ranges[name])}
+            for name, minimum in self.ACTIVITY_RANGES
+        }
+
+    def popularity_trends(self) -> Dict[str, Any]:
+        """按 star、fork、今日 star 排名的前 top_k 个仓库"""
+        return self.popularity.results()
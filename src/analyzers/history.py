@@ -0,0 +1,312 @@
+# src/analyzers/history.py
+from collections import deque
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.analyzer import BaseAnalyzer
+from src.core.base import DataContainer
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+class _RepositorySeries:
+    """单个仓库最近 2 * window 天的 (日期, star 数, 速度) 观测"""
+
+    __slots__ = ('language', 'observations')
+
+    def __init__(self, language: Optional[str] = None):
+        self.language = language
+        self.observations: Deque[Tuple[date, int, Optional[float]]] = deque()
+
+    def stars_at(self, day: date) -> Optional[int]:
+        """day 当天或之前最近一次观测的 star 数，历史不足时为 None"""
+        for observed, stars, _ in reversed(self.observations):
+            if observed <= day:
+                return stars
+        return None
+
+    def prune(self, cutoff: date) -> None:
+        # 保留 cutoff 当天或之前的最后一条，用于计算跨窗口的差值
+        observations = self.observations
+        while len(observations) > 1 and observations[1][0] <= cutoff:
+            observations.popleft()
+
+
+class HistoryAnalyzer(BaseAnalyzer):
+    """
+    趋势历史的时间窗口分析器
+
+    按天增量消费 TrendingHistory，对每个仓库和每种语言计算：
+    - velocity: 每天新增 star（相邻两次观测的差除以间隔天数）
+    - acceleration: 速度的日变化
+    - moving_average_*: 最近 window 天内观测的平均值
+    - weekly_gain / previous_weekly_gain / week_over_week:
+      最近 window 天与之前 window 天的 star 增量及其差
+
+    每个仓库只保留最近 2 * window 天的观测，超过这个期限未再出现的仓库
+    被淘汰（再次出现时重新开始计算），状态大小与历史长度无关。
+    to_state/from_state 可把状态保存下来，之后的运行只需读取最后一天及之后的
+    记录（见 update_from_database）。最后一天可能还会有新的抓取，再次传入时
+    先撤销这一天的观测再重新计算。
+    """
+
+    def __init__(self, window: int = 7):
+        super().__init__()
+        if window <= 0:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.last_date: Optional[date] = None
+        self.repositories: Dict[str, _RepositorySeries] = {}
+        # 每种语言最近 window 天的 (日期, 速度合计)
+        self.language_velocity: Dict[Optional[str], Deque[Tuple[date, float]]] = {}
+        self.latest: Dict[str, Any] = {}
+
+    def advance(self, day: Any, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        加入一天的历史记录并返回当天的分析结果
+
+        Args:
+            day: 日期，不早于已处理的最后一天；等于最后一天时重新计算这一天
+            rows: 当天的记录，包含 repository_name、stars，可选 language；
+                同一仓库一天内有多条（一天多次抓取）时只使用最后一条
+        """
+        day = _as_date(day)
+        if self.last_date is not None and day < self.last_date:
+            raise ValueError(f"Day {day} is before the last processed day {self.last_date}")
+        if day == self.last_date:
+            self._rewind(day)
+
+        window_start = day - timedelta(days=self.window - 1)
+        repositories = {}
+        languages: Dict[Optional[str], Dict[str, Any]] = {}
+
+        latest_rows = {}
+        for row in rows:
+            latest_rows.pop(row['repository_name'], None)
+            latest_rows[row['repository_name']] = row
+
+        for row in latest_rows.values():
+            name = row['repository_name']
+            stars = row.get('stars') or 0
+            series = self.repositories.get(name)
+            if series is None or series.observations[-1][0] < day - timedelta(days=2 * self.window):
+                # 间隔超过 2 * window 天视为重新开始的序列
+                series = self.repositories[name] = _RepositorySeries(
+                    series.language if series else None
+                )
+            if row.get('language') is not None:
+                series.language = row['language']
+
+            velocity = acceleration = None
+            if series.observations:
+                previous_day, previous_stars, previous_velocity = series.observations[-1]
+                gap = (day - previous_day).days
+                velocity = (stars - previous_stars) / gap
+                if previous_velocity is not None:
+                    acceleration = (velocity - previous_velocity) / gap
+            series.observations.append((day, stars, velocity))
+            series.prune(day - timedelta(days=2 * self.window))
+
+            recent = [o for o in series.observations if o[0] >= window_start]
+            velocities = [o[2] for o in recent if o[2] is not None]
+            week_ago = series.stars_at(day - timedelta(days=self.window))
+            two_weeks_ago = series.stars_at(day - timedelta(days=2 * self.window))
+            weekly_gain = stars - week_ago if week_ago is not None else None
+            previous_weekly_gain = (
+                week_ago - two_weeks_ago
+                if week_ago is not None and two_weeks_ago is not None else None
+            )
+
+            repositories[name] = {
+                'language': series.language,
+                'stars': stars,
+                'velocity': velocity,
+                'acceleration': acceleration,
+                'moving_average_stars': sum(o[1] for o in recent) / len(recent),
+                'moving_average_velocity': (
+                    sum(velocities) / len(velocities) if velocities else None
+                ),
+                'weekly_gain': weekly_gain,
+                'previous_weekly_gain': previous_weekly_gain,
+                'week_over_week': (
+                    weekly_gain - previous_weekly_gain
+                    if previous_weekly_gain is not None else None
+                )
+            }
+
+            stats = languages.get(series.language)
+            if stats is None:
+                stats = languages[series.language] = {
+                    'repos': 0,
+                    'stars': 0,
+                    'velocity': 0.0,
+                    'weekly_gain': 0,
+                    'previous_weekly_gain': 0
+                }
+            stats['repos'] += 1
+            stats['stars'] += stars
+            stats['velocity'] += velocity or 0.0
+            stats['weekly_gain'] += weekly_gain or 0
+            stats['previous_weekly_gain'] += previous_weekly_gain or 0
+
+        for language, stats in languages.items():
+            history = self.language_velocity.setdefault(language, deque())
+            history.append((day, stats['velocity']))
+            while history[0][0] < window_start:
+                history.popleft()
+            stats['moving_average_velocity'] = sum(v for _, v in history) / len(history)
+            stats['week_over_week'] = stats['weekly_gain'] - stats['previous_weekly_gain']
+
+        self._evict(day)
+        self.last_date = day
+        self.latest = {
+            'date': day.isoformat(),
+            'repositories': repositories,
+            'languages': languages
+        }
+        return self.latest
+
+    def _rewind(self, day: date) -> None:
+        """
+        撤销 day 当天的观测
+
+        prune 和 _evict 删掉的都是重新计算这一天时同样会删掉的数据，
+        撤销后的状态与处理这一天之前等价
+        """
+        for name in list(self.repositories):
+            observations = self.repositories[name].observations
+            if observations[-1][0] == day:
+                observations.pop()
+                if not observations:
+                    del self.repositories[name]
+        for language in list(self.language_velocity):
+            history = self.language_velocity[language]
+            if history[-1][0] == day:
+                history.pop()
+                if not history:
+                    del self.language_velocity[language]
+
+    def _evict(self, day: date) -> None:
+        """淘汰超过 2 * window 天未出现的仓库和语言"""
+        cutoff = day - timedelta(days=2 * self.window)
+        for name in [n for n, s in self.repositories.items() if s.observations[-1][0] < cutoff]:
+            del self.repositories[name]
+        window_start = day - timedelta(days=self.window - 1)
+        for language in [
+            lang for lang, history in self.language_velocity.items()
+            if history[-1][0] < window_start
+        ]:
+            del self.language_velocity[language]
+
+    def iter_days(self, rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        按日期顺序消费历史记录，逐日产出分析结果
+
+        rows 需按 date 排序，最后一天之前的日期被跳过，最后一天重新计算
+        """
+        for day, day_rows in groupby(rows, key=lambda row: _as_date(row['date'])):
+            if self.last_date is not None and day < self.last_date:
+                continue
+            yield self.advance(day, day_rows)
+
+    def update(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """消费历史记录，返回新处理的天数（不含重新计算的最后一天），最后一天的结果见 latest"""
+        last_date = self.last_date
+        return sum(
+            1 for result in self.iter_days(rows)
+            if last_date is None or result['date'] != last_date.isoformat()
+        )
+
+    def update_from_database(self, db_manager) -> int:
+        """只读取上次处理的最后一天及之后的历史记录，最后一天当天的新抓取也会计入"""
+        since = (
+            datetime.combine(self.last_date, datetime.min.time())
+            if self.last_date is not None else None
+        )
+        return self.update(db_manager.iter_trending_history(since=since))
+
+    def analyze(self, data: DataContainer) -> Dict[str, Any]:
+        """分析按日期排序的历史记录，返回最后一天的结果"""
+        self.update(data.data)
+        analysis = dict(self.latest)
+        metrics = self.calculate_metrics(DataContainer(analysis))
+        analysis['metrics'] = metrics
+        analysis['insights'] = self.generate_insights(metrics)
+        return analysis
+
+    def calculate_metrics(self, data: DataContainer) -> Dict[str, float]:
+        """计算统计指标"""
+        snapshot = data.data or {}
+        repositories = snapshot.get('repositories', {})
+        velocities = [r['velocity'] for r in repositories.values() if r['velocity'] is not None]
+        fastest = max(
+            ((name, r['velocity']) for name, r in repositories.items() if r['velocity'] is not None),
+            key=lambda item: item[1],
+            default=(None, None)
+        )
+        return {
+            'tracked_repositories': len(repositories),
+            'average_velocity': sum(velocities) / len(velocities) if velocities else 0,
+            'fastest_repository': fastest[0],
+            'fastest_velocity': fastest[1] or 0
+        }
+
+    def generate_insights(self, metrics: Dict[str, float]) -> List[str]:
+        """生成数据洞察"""
+        insights = [
+            f"Tracked {metrics['tracked_repositories']} repositories over a "
+            f"{self.window}-day window"
+        ]
+        if metrics['fastest_repository']:
+            insights.append(
+                f"Fastest growing: {metrics['fastest_repository']} "
+                f"({metrics['fastest_velocity']:.1f} stars/day)"
+            )
+        return insights
+
+    def to_state(self) -> Dict[str, Any]:
+        """导出为只含基本类型的状态"""
+        return {
+            'window': self.window,
+            'last_date': self.last_date.isoformat() if self.last_date else None,
+            'repositories': [
+                [
+                    name,
+                    series.language,
+                    [[d.isoformat(), stars, velocity] for d, stars, velocity in series.observations]
+                ]
+                for name, series in self.repositories.items()
+            ],
+            'language_velocity': [
+                [language, [[d.isoformat(), velocity] for d, velocity in history]]
+                for language, history in self.language_velocity.items()
+            ]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'HistoryAnalyzer':
+        """由 to_state 的结果恢复"""
+        analyzer = cls(state['window'])
+        if state['last_date']:
+            analyzer.last_date = date.fromisoformat(state['last_date'])
+        for name, language, observations in state['repositories']:
+            series = analyzer.repositories[name] = _RepositorySeries(language)
+            series.observations.extend(
+                (date.fromisoformat(d), stars, velocity) for d, stars, velocity in observations
+            )
+        for language, history in state['language_velocity']:
+            analyzer.language_velocity[language] = deque(
+                (date.fromisoformat(d), velocity) for d, velocity in history
+            )
+        return analyzer
+
+    def validate_config(self) -> bool:
+        """验证配置"""
+        return self.window > 0
@@ -0,0 +1,121 @@
+# src/analyzers/topk.py
+import heapq
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+KeyFunc = Union[str, Callable[[Any], Any]]
+
+
+def _key_getter(key: KeyFunc) -> Callable[[Any], Any]:
+    """字段名按 dict.get(字段, 0) 取值，与原先 sorted 的 key 一致"""
+    if callable(key):
+        return key
+    return lambda item: item.get(key, 0)
+
+
+class TopK:
+    """
+    有界堆实现的 Top-K 选择
+
+    只保留键值最大的 k 个元素，时间 O(n log k)、额外空间 O(k)，不复制输入。
+    键值相同时先加入的元素排在前面，结果与
+    sorted(items, key=key, reverse=True)[:k] 完全一致。
+
+    每个元素带一个唯一序号，分片计算时传入全局序号（如在原始输入中的下标），
+    merge 后的结果与在完整输入上计算相同。
+    """
+
+    def __init__(self, k: int, key: KeyFunc = None):
+        if k < 0:
+            raise ValueError("k must be non-negative")
+        self.k = k
+        self.key = _key_getter(key) if key is not None else None
+        # 小顶堆，堆顶是当前最差的元素：(键值, -序号, 元素)
+        self._heap: List[Tuple[Any, int, Any]] = []
+        self._counter = count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Any, sequence: Optional[int] = None) -> None:
+        """加入一个元素，键值由 key 计算"""
+        self.push_value(self.key(item) if self.key else item, item, sequence)
+
+    def push_value(self, value: Any, item: Any, sequence: Optional[int] = None) -> None:
+        """以给定键值加入一个元素"""
+        heap = self._heap
+        if len(heap) >= self.k:
+            # 堆已满：小于堆顶的元素直接丢弃，绝大多数元素只做这一次比较
+            if not heap or value < heap[0][0]:
+                return
+            if sequence is None:
+                sequence = next(self._counter)
+            if (value, -sequence) > heap[0][:2]:
+                heapq.heapreplace(heap, (value, -sequence, item))
+            return
+        if sequence is None:
+            sequence = next(self._counter)
+        heapq.heappush(heap, (value, -sequence, item))
+
+    def extend(self, items: Iterable[Any]) -> 'TopK':
+        """依次加入多个元素"""
+        for item in items:
+            self.push(item)
+        return self
+
+    def merge(self, other: 'TopK') -> 'TopK':
+        """合并另一个分片的结果，两边的序号应来自同一编号空间"""
+        for value, negative_sequence, item in other._heap:
+            self.push_value(value, item, -negative_sequence)
+        return self
+
+    def entries(self) -> List[Tuple[Any, int, Any]]:
+        """按排名排列的 (键值, 序号, 元素)，可用于序列化"""
+        return [
+            (value, -negative_sequence, item)
+            for value, negative_sequence, item in sorted(
+                self._heap, key=lambda entry: entry[:2], reverse=True
+            )
+        ]
+
+    def items(self) -> List[Any]:
+        """按排名排列的元素"""
+        return [item for _, _, item in self.entries()]
+
+
+class MultiTopK:
+    """
+    一次遍历同时维护多个排行
+
+    Args:
+        k: 每个排行保留的元素数
+        keys: {排行名称: 字段名或键函数}
+    """
+
+    def __init__(self, k: int, keys: Dict[str, KeyFunc]):
+        self.k = k
+        self.rankings = {name: TopK(k, key) for name, key in keys.items()}
+        self._pushers = [(r.key, r.push_value) for r in self.rankings.values()]
+        self._counter = count()
+
+    def push(self, item: Any, sequence: Optional[int] = None) -> None:
+        """把元素加入所有排行"""
+        if sequence is None:
+            sequence = next(self._counter)
+        for key, push_value in self._pushers:
+            push_value(key(item), item, sequence)
+
+    def extend(self, items: Iterable[Any]) -> 'MultiTopK':
+        for item in items:
+            self.push(item)
+        return self
+
+    def merge(self, other: 'MultiTopK') -> 'MultiTopK':
+        """逐个排行合并另一个分片的结果"""
+        for name, ranking in self.rankings.items():
+            ranking.merge(other.rankings[name])
+        return self
+
+    def results(self) -> Dict[str, List[Any]]:
+        """{排行名称: 按排名排列的元素}"""
+        return {name: ranking.items() for name, ranking in self.rankings.items()}
@@ -1,15 +1,37 @@
 # src/analyzers/trends.py
-from typing import Dict, List, Any
-from collections import defaultdict
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+from datetime import datetime
 from src.core.analyzer import BaseAnalyzer
 from src.core.base import DataContainer
+from src.analyzers.aggregate import TrendAccumulator
+from src.core.scoring import ScoringKernel, get_scoring_kernel
+
+# 每个工作进程复用同一个分析器实例
+_worker_analyzer: Optional['TrendAnalyzer'] = None
+
+
+def _init_worker(scoring: ScoringKernel) -> None:
+    global _worker_analyzer
+    _worker_analyzer = TrendAnalyzer(scoring)
+
+
+def _accumulate_shard(shard: Tuple[int, List[Dict]]) -> Dict[str, Any]:
+    offset, repositories = shard
+    accumulator = TrendAccumulator(offset=offset)
+    accumulator.update(_worker_analyzer._iter_scored(repositories))
+    return accumulator.to_state()
+
 
 class TrendAnalyzer(BaseAnalyzer):
     """趋势分析器"""
     
-    def __init__(self):
+    def __init__(self, scoring: Optional[ScoringKernel] = None):
         super().__init__()
+        # 与 ActivityProcessor 相同的评分定义，用于补算缺失的活跃度分数
+        self.scoring = scoring or get_scoring_kernel('trending')
         self.metrics = [
             'stars',
             'forks',
@@ -17,54 +39,106 @@ class TrendAnalyzer(BaseAnalyzer):
             'activity_score'
         ]
 
-    def analyze(self, data: DataContainer) -> Dict[str, Any]:
-        """分析趋势数据"""
-        repositories = data.data
+    def analyze(
+        self,
+        data: DataContainer,
+        workers: Optional[int] = None,
+        shard_size: int = 10000
+    ) -> Dict[str, Any]:
+        """
+        分析趋势数据
+
+        data.data 可以是列表或任意迭代器，只遍历一次。
+        指定 workers 时按 shard_size 分片在进程池中累加后按顺序合并，
+        结果与单进程完全相同
+        """
+        accumulator = self.accumulate(data.data, workers, shard_size)
         
-        metrics = self.calculate_metrics(DataContainer(repositories))
+        metrics = accumulator.metrics()
         insights = self.generate_insights(metrics)
         
         analysis = {
             'metrics': metrics,
             'insights': insights,
             'trends': {
-                'language_trends': self._analyze_language_trends(repositories),
-                'activity_trends': self._analyze_activity_trends(repositories),
-                'popularity_trends': self._analyze_popularity_trends(repositories)
+                'language_trends': accumulator.language_trends(),
+                'activity_trends': accumulator.activity_trends(),
+                'popularity_trends': accumulator.popularity_trends()
             },
+            'score_version': self.scoring.key,
             'timestamp': datetime.now().isoformat()
         }
         
         return analysis
 
-    
+    def accumulate(
+        self,
+        repositories: Iterable[Dict],
+        workers: Optional[int] = None,
+        shard_size: int = 10000,
+        prefetch: int = 2
+    ) -> TrendAccumulator:
+        """单遍累加仓库数据，指定 workers 时分片并行"""
+        if not workers:
+            return TrendAccumulator().update(self._iter_scored(repositories))
+
+        result = TrendAccumulator()
+        window = workers * prefetch
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.scoring,)
+        ) as executor:
+            # 同时在途的分片不超过 workers * prefetch 个，按提交顺序合并
+            pending = deque()
+            for shard in self._iter_shards(repositories, shard_size):
+                pending.append(executor.submit(_accumulate_shard, shard))
+                if len(pending) >= window:
+                    result.merge(TrendAccumulator.from_state(pending.popleft().result()))
+            while pending:
+                result.merge(TrendAccumulator.from_state(pending.popleft().result()))
+        return result
+
+    @staticmethod
+    def _iter_shards(
+        repositories: Iterable[Dict],
+        shard_size: int
+    ) -> Iterator[Tuple[int, List[Dict]]]:
+        """切成 (起始下标, 仓库列表) 形式的连续分片"""
+        iterator = iter(repositories)
+        offset = 0
+        while True:
+            shard = list(islice(iterator, shard_size))
+            if not shard:
+                return
+            yield offset, shard
+            offset += len(shard)
+
+    def _iter_scored(self, repositories: Iterable[Dict], chunk_size: int = 1024) -> Iterator[Dict]:
+        """未经 ActivityProcessor 处理的仓库用评分内核按块批量补算分数"""
+        chunk = []
+        for repo in repositories:
+            chunk.append(repo)
+            if len(chunk) >= chunk_size:
+                yield from self._ensure_scores(chunk)
+                chunk = []
+        if chunk:
+            yield from self._ensure_scores(chunk)
+
+    def _ensure_scores(self, repositories: List[Dict]) -> List[Dict]:
+        missing = [i for i, repo in enumerate(repositories) if 'activity_score' not in repo]
+        if not missing:
+            return repositories
+
+        scores = self.scoring.score_batch([repositories[i] for i in missing])['scores']
+        repositories = list(repositories)
+        for i, score in zip(missing, scores):
+            repositories[i] = {**repositories[i], 'activity_score': float(score)}
+        return repositories
+
     def calculate_metrics(self, data: DataContainer) -> Dict[str, float]:
         """计算统计指标"""
-        repositories = data.data
-        metrics = {}
-        
-        # 基本统计
-        metrics['total_repositories'] = len(repositories)
-        metrics['total_stars'] = sum(repo.get('stars', 0) for repo in repositories)
-        metrics['total_forks'] = sum(repo.get('forks', 0) for repo in repositories)
-        metrics['average_activity_score'] = (
-            sum(repo.get('activity_score', 0) for repo in repositories) / 
-            len(repositories) if repositories else 0
-        )
-        
-        # 语言统计
-        language_counts = defaultdict(int)
-        for repo in repositories:
-            language = repo.get('language', 'Unknown')
-            language_counts[language] += 1
-        metrics['language_distribution'] = dict(language_counts)
-        
-        # 活跃度分布
-        activity_scores = [repo.get('activity_score', 0) for repo in repositories]
-        metrics['min_activity'] = min(activity_scores) if activity_scores else 0
-        metrics['max_activity'] = max(activity_scores) if activity_scores else 0
-        
-        return metrics
+        return self.accumulate(data.data).metrics()
 
     def generate_insights(self, metrics: Dict[str, float]) -> List[str]:
         """生成数据洞察"""
@@ -95,70 +169,17 @@ class TrendAnalyzer(BaseAnalyzer):
         
         return insights
 
-    def _analyze_language_trends(self, repositories: List[Dict]) -> Dict[str, Any]:
+    def _analyze_language_trends(self, repositories: Iterable[Dict]) -> Dict[str, Any]:
         """分析语言趋势"""
-        language_stats = defaultdict(lambda: {
-            'repos': 0,
-            'total_stars': 0,
-            'total_forks': 0,
-            'avg_activity': 0.0,
-            'repositories': []
-        })
-        
-        for repo in repositories:
-            language = repo.get('language', 'Unknown')
-            stats = language_stats[language]
-            stats['repos'] += 1
-            stats['total_stars'] += repo.get('stars', 0)
-            stats['total_forks'] += repo.get('forks', 0)
-            stats['avg_activity'] = (
-                stats['avg_activity'] * (stats['repos'] - 1) + 
-                repo.get('activity_score', 0)
-            ) / stats['repos']
-            stats['repositories'].append(repo['name'])
-        
-        return dict(language_stats)
+        return self.accumulate(repositories).language_trends()
 
-    def _analyze_activity_trends(self, repositories: List[Dict]) -> Dict[str, Any]:
+    def _analyze_activity_trends(self, repositories: Iterable[Dict]) -> Dict[str, Any]:
         """分析活跃度趋势"""
-        activity_ranges = {
-            'high': {'min': 80, 'repos': []},
-            'medium': {'min': 50, 'repos': []},
-            'low': {'min': 0, 'repos': []}
-        }
-        
-        for repo in repositories:
-            score = repo.get('activity_score', 0)
-            for range_name, range_data in activity_ranges.items():
-                if score >= range_data['min']:
-                    range_data['repos'].append({
-                        'name': repo['name'],
-                        'score': score,
-                        'language': repo.get('language', 'Unknown')
-                    })
-                    break
-        
-        return activity_ranges
+        return self.accumulate(repositories).activity_trends()
 
-    def _analyze_popularity_trends(self, repositories: List[Dict]) -> Dict[str, Any]:
+    def _analyze_popularity_trends(self, repositories: Iterable[Dict]) -> Dict[str, Any]:
         """分析流行度趋势"""
-        return {
-            'most_starred': sorted(
-                repositories,
-                key=lambda x: x.get('stars', 0),
-                reverse=True
-            )[:5],
-            'most_forked': sorted(
-                repositories,
-                key=lambda x: x.get('forks', 0),
-                reverse=True
-            )[:5],
-            'trending_today': sorted(
-                repositories,
-                key=lambda x: x.get('today_stars', 0),
-                reverse=True
-            )[:5]
-        }
+        return self.accumulate(repositories).popularity_trends()
 
     def validate_config(self) -> bool:
         """验证配置"""
@@ -1,6 +1,7 @@
 # src/core/crawler.py
 from abc import abstractmethod
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
 from .base import BaseComponent, DataContainer
 
 class BaseCrawler(BaseComponent):
@@ -21,9 +22,35 @@ class BaseCrawler(BaseComponent):
         """验证数据"""
         pass
 
-    def process_response(self, response: str) -> DataContainer:
-        """处理响应"""
-        data = self.parse(response)
-        if self.validate(data):
-            return data
-        raise ValueError("Invalid data received")
\ No newline at end of file
+    def validate_record(self, record: Any) -> bool:
+        """验证单条记录，流式处理时逐条调用"""
+        return True
+
+    def process_response(self, response: Union[str, Iterable[Any]]) -> DataContainer:
+        """
+        处理响应
+
+        response 为字符串时整体解析后校验；为记录迭代器（如流式解析的输出）时，
+        每条记录到达即校验，遇到无效记录立刻失败
+        """
+        if isinstance(response, str):
+            data = self.parse(response)
+            if self.validate(data):
+                return data
+            raise ValueError("Invalid data received")
+
+        records = []
+        for record in response:
+            if not self.validate_record(record):
+                raise ValueError("Invalid data received")
+            records.append(record)
+        if not records:
+            raise ValueError("Invalid data received")
+
+        return DataContainer(
+            data=records,
+            metadata={
+                'count': len(records),
+                'parsed_at': datetime.now().isoformat()
+            }
+        )
\ No newline at end of file
@@ -0,0 +1,318 @@
+# src/core/scoring.py
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, case, cast, func, literal, or_
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 可选依赖
+    np = None
+
+
+def round_batch(values, ndigits: int = 2):
+    """
+    与 Python round 结果一致的批量取整
+
+    np.round 先放大再 rint，在 .xx5 附近可能与 round 的精确十进制取整不同；
+    只有这些接近进位边界的元素改用 round 逐个计算
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    fraction = np.abs(scaled - np.floor(scaled) - 0.5)
+    for i in np.flatnonzero(fraction < 1e-6):
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
+
+
+class ScoreComponent:
+    """
+    评分项
+
+    按配置选择一种归一化方式：
+    - cap: 数值除以上限，超过上限记 1.0
+    - table: 文本转小写后查表，未命中取 default
+    - text: 按文本长度阈值和关键词累加质量分，最高 1.0
+    """
+
+    def __init__(self, metric: str, field: str, weight: float, **options):
+        self.metric = metric
+        self.field = field
+        self.weight = float(weight)
+        self.cap = options.get('cap')
+        self.table = {
+            str(key).lower(): float(value)
+            for key, value in (options.get('table') or {}).items()
+        }
+        self.default = float(options.get('default', 0.0))
+        text = options.get('text')
+        self.lengths: List[Tuple[int, float]] = [
+            (int(length), float(bonus)) for length, bonus in (text or {}).get('lengths', [])
+        ]
+        self.keywords: Tuple[str, ...] = tuple((text or {}).get('keywords', ()))
+        self.keyword_bonus = float((text or {}).get('keyword_bonus', 0.0))
+
+        if self.cap is not None:
+            self.kind = 'cap'
+        elif 'table' in options:
+            self.kind = 'table'
+        elif text is not None:
+            self.kind = 'text'
+        else:
+            raise ValueError(f"Score component '{metric}' needs one of cap, table or text")
+
+    def normalize(self, value: Any) -> float:
+        """单个原始值的归一化结果"""
+        if self.kind == 'cap':
+            value = value or 0
+            if value >= self.cap:
+                return 1.0
+            return value / self.cap
+        if self.kind == 'table':
+            return self.table.get((value or '').lower(), self.default)
+        return self._text_quality(value)
+
+    def _text_quality(self, text: Optional[str]) -> float:
+        if not text:
+            return 0.0
+
+        quality = 0.0
+        for length, bonus in self.lengths:
+            if len(text) >= length:
+                quality += bonus
+        if self.keywords and any(keyword in text.lower() for keyword in self.keywords):
+            quality += self.keyword_bonus
+
+        return min(quality, 1.0)
+
+    def normalize_batch(self, values: Sequence[Any]):
+        """一列原始值的归一化结果（numpy 数组）"""
+        count = len(values)
+        if self.kind == 'cap':
+            column = np.fromiter((value or 0 for value in values), dtype=np.float64, count=count)
+            return np.where(column >= self.cap, 1.0, column / self.cap)
+        if self.kind == 'table':
+            if not count:
+                return np.zeros(0)
+            keys = np.array([(value or '').lower() for value in values], dtype=object)
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            weights = np.array(
+                [self.table.get(key, self.default) for key in unique_keys],
+                dtype=np.float64
+            )
+            return weights[inverse]
+        return np.fromiter(
+            (self._text_quality(value) for value in values),
+            dtype=np.float64,
+            count=count
+        )
+
+    def sql_expression(self, column):
+        """与 normalize 逐步一致的 SQL 表达式"""
+        if self.kind == 'cap':
+            normalized = cast(func.coalesce(column, 0), Float) / float(self.cap)
+            return case((normalized > 1, 1.0), else_=normalized)
+        if self.kind == 'table':
+            return case(
+                self.table,
+                value=func.lower(func.coalesce(column, '')),
+                else_=self.default
+            )
+
+        # 注意：SQLite 的 lower/LIKE 只处理 ASCII，关键词本身应为 ASCII
+        text = func.coalesce(column, '')
+        quality = literal(0.0)
+        for length, bonus in self.lengths:
+            quality = quality + case((func.length(text) >= length, bonus), else_=0.0)
+        if self.keywords:
+            lowered = func.lower(text)
+            quality = quality + case(
+                (or_(*(lowered.contains(keyword) for keyword in self.keywords)), self.keyword_bonus),
+                else_=0.0
+            )
+        return case((quality > 1, 1.0), else_=quality)
+
+    def to_config(self) -> Dict[str, Any]:
+        config = {'metric': self.metric, 'field': self.field, 'weight': self.weight}
+        if self.kind == 'cap':
+            config['cap'] = self.cap
+        elif self.kind == 'table':
+            config['table'] = self.table
+            config['default'] = self.default
+        else:
+            config['text'] = {
+                'lengths': [list(item) for item in self.lengths],
+                'keywords': list(self.keywords),
+                'keyword_bonus': self.keyword_bonus
+            }
+        return config
+
+
+class ScoringKernel:
+    """
+    活跃度评分内核
+
+    一份带版本号的评分定义，同时提供三种等价的计算形式：
+    - score / metrics: 单条记录
+    - score_batch: numpy 向量化批量计算
+    - sql_score: SQL 表达式，在数据库内整表重算
+
+    三种形式的求和顺序与取整方式一致，结果逐位相同。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: int,
+        components: Iterable[ScoreComponent],
+        scale: float = 100,
+        ndigits: int = 2
+    ):
+        self.name = name
+        self.version = int(version)
+        self.components = list(components)
+        self.scale = scale
+        self.ndigits = ndigits
+        if not self.components:
+            raise ValueError(f"Scoring definition '{name}' has no components")
+        self.weights = {c.metric: c.weight for c in self.components}
+        self.fields = [c.field for c in self.components]
+
+    @classmethod
+    def from_config(cls, name: str, config: Mapping[str, Any]) -> 'ScoringKernel':
+        """由 config.settings.SCORING 中的一项构建"""
+        components = [ScoreComponent(**item) for item in config['components']]
+        return cls(
+            name,
+            config.get('version', 1),
+            components,
+            scale=config.get('scale', 100),
+            ndigits=config.get('ndigits', 2)
+        )
+
+    @property
+    def key(self) -> str:
+        """评分版本标识，如 'trending/v1'"""
+        return f"{self.name}/v{self.version}"
+
+    @property
+    def fingerprint(self) -> str:
+        """评分定义内容的摘要，权重或上限变化而忘记改版本号时可据此发现"""
+        definition = {
+            'components': [c.to_config() for c in self.components],
+            'scale': self.scale,
+            'ndigits': self.ndigits
+        }
+        payload = json.dumps(definition, sort_keys=True, separators=(',', ':'))
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+    def metrics(self, record: Mapping[str, Any]) -> Dict[str, float]:
+        """各评分项的归一化值"""
+        return {c.metric: c.normalize(record.get(c.field)) for c in self.components}
+
+    def combine(self, values: Sequence[float]) -> float:
+        """按 components 顺序加权求和并取整"""
+        total = sum(value * c.weight for value, c in zip(values, self.components))
+        return round(total * self.scale, self.ndigits)
+
+    def score(self, record: Mapping[str, Any]) -> float:
+        """单条记录的分数"""
+        return self.combine([c.normalize(record.get(c.field)) for c in self.components])
+
+    def score_row(self, row: Sequence[Any]) -> float:
+        """按 fields 顺序排列的原始值计算分数，用于数据库行"""
+        return self.combine([c.normalize(value) for c, value in zip(self.components, row)])
+
+    def score_batch(self, records: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+        """
+        批量计算
+
+        Returns:
+            {'scores': 分数序列, 'metrics': {评分项: 归一化值序列}}；
+            安装了 numpy 时为数组，否则为列表
+        """
+        records = records if isinstance(records, list) else list(records)
+        return self.score_columns({
+            field: [record.get(field) for record in records] for field in self.fields
+        })
+
+    def score_columns(self, columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+        """按列批量计算，columns 为 {字段: 原始值序列}"""
+        if np is None:
+            metrics = {
+                c.metric: [c.normalize(value) for value in columns[c.field]]
+                for c in self.components
+            }
+            values = [metrics[c.metric] for c in self.components]
+            return {
+                'scores': [self.combine(row) for row in zip(*values)],
+                'metrics': metrics
+            }
+
+        metrics = {c.metric: c.normalize_batch(columns[c.field]) for c in self.components}
+        count = len(next(iter(metrics.values())))
+
+        # 与 sum() 相同的求和顺序，保证浮点结果一致
+        total = np.zeros(count)
+        for c in self.components:
+            total += metrics[c.metric] * c.weight
+
+        return {
+            'scores': round_batch(total * self.scale, self.ndigits),
+            'metrics': metrics
+        }
+
+    def sql_expression(self, table):
+        """未取整的 SQL 分数表达式，table 为含 fields 各列的表"""
+        score = None
+        for c in self.components:
+            term = c.sql_expression(table.c[c.field]) * c.weight
+            score = term if score is None else score + term
+        return score * self.scale
+
+    def sql_score(self, table, round_func=func.round):
+        """
+        取整后的 SQL 分数表达式
+
+        SQLite 的 ROUND 与 Python round 在 .xx5 附近不同，需要逐位一致时
+        传入注册了 Python round 的函数（见 DatabaseManager）
+        """
+        return round_func(self.sql_expression(table), self.ndigits)
+
+
+_kernels: Dict[Tuple[str, int], ScoringKernel] = {}
+_kernels_lock = threading.Lock()
+_loaded_names = set()
+
+
+def register_scoring_kernel(kernel: ScoringKernel) -> ScoringKernel:
+    """注册评分定义，同名的多个版本可以并存"""
+    with _kernels_lock:
+        _kernels[(kernel.name, kernel.version)] = kernel
+    return kernel
+
+
+def get_scoring_kernel(name: str, version: Optional[int] = None) -> ScoringKernel:
+    """
+    获取评分内核
+
+    未指定版本时返回最新版本；首次使用时从 config.settings.SCORING 加载
+    """
+    with _kernels_lock:
+        if name not in _loaded_names:
+            from config.settings import SCORING
+            if name in SCORING:
+                kernel = ScoringKernel.from_config(name, SCORING[name])
+                _kernels.setdefault((name, kernel.version), kernel)
+            _loaded_names.add(name)
+
+        versions = sorted(v for n, v in _kernels if n == name)
+        if not versions:
+            raise KeyError(f"Unknown scoring definition: {name}")
+        if version is None:
+            version = versions[-1]
+        if (name, version) not in _kernels:
+            raise KeyError(f"Unknown scoring version: {name}/v{version}")
+        return _kernels[(name, version)]
@@ -5,6 +5,6 @@ GitHub Trending Crawler Module
 Provides functionality for crawling GitHub trending pages.
 """
 
-from .github_crawler import GitHubTrendingCrawler
+from .github_crawler import GitHubCrawler
 
-__all__ = ['GitHubTrendingCrawler']
\ No newline at end of file
+__all__ = ['GitHubCrawler']
\ No newline at end of file
@@ -0,0 +1,133 @@
+# src/crawler/archive.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+from itertools import tee
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from src.core.base import DataContainer
+from src.crawler.batch import parse_pages
+from src.crawler.github_crawler import GitHubCrawler
+
+
+class ResponseArchive:
+    """
+    原始响应归档
+
+    响应体以 sha256 为键压缩存放在 objects/ 下，内容相同的页面只存一份；
+    index.jsonl 按 (language, since, timestamp) 记录每次抓取对应的对象
+    """
+
+    def __init__(self, root: str = os.path.join('data', 'archive')):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.index_path = self.root / 'index.jsonl'
+        self._lock = threading.Lock()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.gz"
+
+    def store(
+        self,
+        html: str,
+        language: Optional[str],
+        since: str,
+        timestamp: str
+    ) -> str:
+        """归档一次抓取结果，返回内容哈希"""
+        body = html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(gzip.compress(body))
+            os.replace(tmp_path, path)
+
+        entry = {
+            'language': language,
+            'since': since,
+            'timestamp': timestamp,
+            'sha256': digest
+        }
+        with self._lock, open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        return digest
+
+    def load(self, digest: str) -> str:
+        """按内容哈希读取响应体"""
+        with open(self._object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+    def entries(
+        self,
+        language: Optional[str] = None,
+        since: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        按抓取顺序列出索引项
+
+        start/end 为 ISO 格式时间戳，区间左闭右开
+        """
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if language is not None and entry['language'] != language:
+                    continue
+                if since is not None and entry['since'] != since:
+                    continue
+                if start is not None and entry['timestamp'] < start:
+                    continue
+                if end is not None and entry['timestamp'] >= end:
+                    continue
+                yield entry
+
+
+def replay(
+    archive: ResponseArchive,
+    processors: Iterable = (),
+    parser: str = 'html.parser',
+    workers: Optional[int] = None,
+    **filters
+) -> Iterator[DataContainer]:
+    """
+    离线重放归档：重新解析并依次运行处理器
+
+    Args:
+        archive: 响应归档
+        processors: 依次调用其 process 方法的处理器
+        parser: 解析后端名称
+        workers: 指定时使用进程池并行解析
+        **filters: 传给 ResponseArchive.entries 的过滤条件
+    """
+    processors = list(processors)
+    entries, pending = tee(archive.entries(**filters))
+    pages = (archive.load(entry['sha256']) for entry in pending)
+
+    if workers:
+        parsed = parse_pages(pages, workers=workers, parser=parser)
+    else:
+        crawler = GitHubCrawler(parser=parser)
+        parsed = (crawler.parse(page) for page in pages)
+
+    for entry, result in zip(entries, parsed):
+        result.metadata.update({
+            'language': entry['language'],
+            'since': entry['since'],
+            'timestamp': entry['timestamp'],
+            'sha256': entry['sha256'],
+            'replayed': True
+        })
+        for processor in processors:
+            result = processor.process(result)
+        yield result
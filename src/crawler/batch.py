@@ -0,0 +1,85 @@
+# src/crawler/batch.py
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+from src.core.base import DataContainer
+from src.crawler.github_crawler import GitHubCrawler
+
+Page = Union[str, Path]
+
+# 每个工作进程复用同一个爬虫实例
+_worker_crawler: Optional[GitHubCrawler] = None
+
+
+def _init_worker(parser: str) -> None:
+    global _worker_crawler
+    _worker_crawler = GitHubCrawler(parser=parser)
+
+
+def _parse_chunk(pages: List[Page]) -> List[DataContainer]:
+    results = []
+    for page in pages:
+        if isinstance(page, Path):
+            # 由工作进程自己读文件，主进程只传路径
+            result = _worker_crawler.parse(page.read_text(encoding='utf-8'))
+            result.add_metadata('source', str(page))
+        else:
+            result = _worker_crawler.parse(page)
+        results.append(result)
+    return results
+
+
+def _chunked(pages: Iterable[Page], size: int) -> Iterator[List[Page]]:
+    chunk = []
+    for page in pages:
+        chunk.append(page)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_pages(
+    pages: Iterable[Page],
+    workers: Optional[int] = None,
+    parser: str = 'html.parser',
+    chunksize: int = 8,
+    prefetch: int = 2
+) -> Iterator[DataContainer]:
+    """
+    用进程池批量解析归档的 trending 页面
+
+    按输入顺序逐个产出 DataContainer。同时在途的任务不超过
+    workers * prefetch 批，输入和结果都不会整体驻留内存。
+
+    Args:
+        pages: HTML 字符串或 HTML 文件路径（Path）
+        workers: 工作进程数，默认 CPU 核数
+        parser: 解析后端名称
+        chunksize: 每个任务包含的页面数，用于摊薄进程间通信开销
+        prefetch: 每个工作进程预提交的任务批数
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * prefetch
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(parser,)
+    ) as executor:
+        pending = deque()
+        for chunk in _chunked(pages, chunksize):
+            pending.append(executor.submit(_parse_chunk, chunk))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_archive_pages(directory: str, pattern: str = '*.html') -> Iterator[Path]:
+    """按文件名顺序列出归档目录中的页面"""
+    yield from sorted(Path(directory).glob(pattern))
@@ -1,18 +1,32 @@
 # src/crawlers/github_crawler.py
+import asyncio
 import requests
-from typing import Optional, Dict, List
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, List, Iterable, Iterator, Tuple
 from datetime import datetime
 
 from src.core.crawler import BaseCrawler
 from src.core.base import DataContainer
-from src.crawlers.extensions.rate_limiter import rate_limit
-from src.crawlers.extensions.cache import cache
+from src.crawler.session import create_http_session, ValidatorStore
+from src.crawler.parsers import get_parser_backend, iter_stream_repositories
+from src.crawler.throttle import AdaptiveRateController
+from src.utils.exceptions import CrawlerException
+from src.utils.rate_limiter import rate_limit
 
 class GitHubCrawler(BaseCrawler):
     """GitHub趋势爬虫"""
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        validator_path: Optional[str] = None,
+        pool_size: int = 10,
+        timeout: float = 30,
+        parser: str = 'html.parser',
+        archive=None,
+        throttle: Optional[AdaptiveRateController] = None
+    ):
         super().__init__()
         self.base_url = "https://github.com/trending"
         self.api_url = "https://api.github.com"
@@ -22,40 +36,178 @@ class GitHubCrawler(BaseCrawler):
         }
         if token:
             self.headers['Authorization'] = f'token {token}'
+        self.timeout = timeout
+        # 长连接会话，fetch_many 的并发线程共享同一个连接池
+        self.session = create_http_session(self.headers, pool_size=pool_size)
+        # ETag/Last-Modified 校验值，指定 validator_path 时跨运行保存
+        self.validators = ValidatorStore(validator_path)
+        # HTML 解析后端，可选 html.parser / strainer / lxml / selectolax
+        self.parser_backend = get_parser_backend(parser)
+        # 原始响应归档（ResponseArchive），用于离线重放
+        self.archive = archive
+        # 根据 GitHub 限流响应头自适应调整节奏，负责重试与暂停
+        self.throttle = throttle or AdaptiveRateController()
 
-    @rate_limit(calls=30, period=60)
-    @cache(ttl=300)
+    @rate_limit(calls=30, period=60, name='github')
     def fetch(self, language: Optional[str] = None, since: str = "daily") -> DataContainer:
-        """获取趋势数据"""
+        """
+        获取趋势数据
+
+        页面未变化（304）时返回 data 为 None、metadata['not_modified'] 为 True
+        的结果，调用方应跳过解析
+        """
         url = f"{self.base_url}/{language}" if language else self.base_url
         params = {'since': since}
+        validator_key = f"{url}?since={since}"
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return DataContainer(
-                data=response.text,
-                metadata={
-                    'language': language,
-                    'since': since,
-                    'timestamp': datetime.now().isoformat()
-                }
+            response = self._request(
+                url,
+                params=params,
+                headers=self.validators.conditional_headers(validator_key)
             )
+            metadata = {
+                'language': language,
+                'since': since,
+                'timestamp': datetime.now().isoformat(),
+                'not_modified': response.status_code == 304
+            }
+            if response.status_code == 304:
+                return DataContainer(data=None, metadata=metadata)
+
+            response.raise_for_status()
+            self.validators.update(validator_key, response)
+            if self.archive is not None:
+                self.archive.store(response.text, language, since, metadata['timestamp'])
+            return DataContainer(data=response.text, metadata=metadata)
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to fetch data: {str(e)}")
+            raise CrawlerException(f"Failed to fetch data: {str(e)}")
+
+    def _request(self, url: str, **kwargs) -> requests.Response:
+        """发送请求，按 throttle 的判断重试、退避或暂停"""
+        attempt = 0
+        while True:
+            self.throttle.before_request()
+            try:
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                delay = self.throttle.on_error(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self.throttle.after_response(response, attempt)
+                if delay is None:
+                    return response
+                response.close()
+
+            attempt += 1
+            if delay > 0:
+                self.throttle.sleep(delay)
+
+    @rate_limit(calls=30, period=60, name='github')
+    def fetch_stream(
+        self,
+        language: Optional[str] = None,
+        since: str = "daily",
+        chunk_size: int = 16384
+    ) -> Iterator[Dict]:
+        """
+        流式获取并解析趋势数据
+
+        边下载边解析，每个仓库在其 article.Box-row 闭合后立即产出，
+        可直接交给 process_response 逐条校验
+        """
+        url = f"{self.base_url}/{language}" if language else self.base_url
+        params = {'since': since}
+
+        try:
+            response = self._request(url, params=params, stream=True)
+        except requests.exceptions.RequestException as e:
+            raise CrawlerException(f"Failed to fetch data: {str(e)}")
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            # stream=True 的连接只有读完或关闭后才会归还连接池
+            response.close()
+            raise CrawlerException(f"Failed to fetch data: {str(e)}")
+
+        self.validators.update(f"{url}?since={since}", response)
+        response.encoding = response.encoding or 'utf-8'
+        return self._iter_stream(response, chunk_size, language, since)
+
+    def _iter_stream(
+        self,
+        response: requests.Response,
+        chunk_size: int,
+        language: Optional[str],
+        since: str
+    ) -> Iterator[Dict]:
+        timestamp = datetime.now().isoformat()
+        received = []
+
+        def chunks() -> Iterator[str]:
+            for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+                if self.archive is not None:
+                    received.append(chunk)
+                yield chunk
+
+        with response:
+            for repo_data in self.iter_parse(chunks()):
+                yield repo_data
+
+        if self.archive is not None:
+            self.archive.store(''.join(received), language, since, timestamp)
+
+    def iter_parse(self, chunks: Iterable[str]) -> Iterator[Dict]:
+        """增量解析 HTML 文本块，逐个产出仓库信息"""
+        for repo_data in iter_stream_repositories(chunks, self.parser_backend, self):
+            if repo_data:
+                yield repo_data
+
+    def fetch_many(
+        self,
+        targets: Iterable[Tuple[Optional[str], str]],
+        max_concurrency: int = 5
+    ) -> List[DataContainer]:
+        """
+        并发获取多个 (language, since) 组合的趋势数据
+
+        所有请求共享 fetch 上的限流预算，返回结果与 targets 顺序一致
+        """
+        return asyncio.run(self.fetch_many_async(targets, max_concurrency))
+
+    async def fetch_many_async(
+        self,
+        targets: Iterable[Tuple[Optional[str], str]],
+        max_concurrency: int = 5
+    ) -> List[DataContainer]:
+        """fetch_many 的协程版本，可在已有事件循环中使用"""
+        loop = asyncio.get_running_loop()
+        # 线程池大小即并发上限，requests 的阻塞调用在线程中执行
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        tasks = []
+        try:
+            for language, since in targets:
+                tasks.append(loop.run_in_executor(
+                    executor,
+                    partial(self.fetch, language=language, since=since)
+                ))
+            return list(await asyncio.gather(*tasks))
+        finally:
+            # 出错时取消尚未开始的请求（取消会传递到线程池的 future），
+            # 不在事件循环线程上等待线程退出
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False)
 
     def parse(self, html: str) -> DataContainer:
         """解析HTML数据"""
-        soup = BeautifulSoup(html, 'html.parser')
         repositories = []
 
-        for article in soup.select('article.Box-row'):
-            try:
-                repo_data = self._extract_repository_info(article)
-                if repo_data:
-                    repositories.append(repo_data)
-            except Exception as e:
-                print(f"Error parsing repository: {str(e)}")
+        # 各后端与 _extract_repository_info 一样，单条解析失败时产出 None
+        for repo_data in self.parser_backend.iter_repositories(html, self):
+            if repo_data:
+                repositories.append(repo_data)
 
         return DataContainer(
             data=repositories,
@@ -77,11 +229,33 @@ class GitHubCrawler(BaseCrawler):
                 'stars': self._get_stars(article),
                 'forks': self._get_forks(article),
                 'today_stars': self._get_today_stars(article),
-                'crawled_at': datetime.now().isoformat()
+                'crawled_at': datetime.utcnow().isoformat()
             }
         except Exception:
             return None
 
+    def _build_repository_info(
+        self,
+        href: str,
+        description: Optional[str],
+        language: Optional[str],
+        stars: Optional[str],
+        forks: Optional[str],
+        today_stars: Optional[str]
+    ) -> Dict:
+        """由原始文本组装仓库信息，供非 BeautifulSoup 的解析后端使用"""
+        name = href.strip('/')
+        return {
+            'name': name,
+            'url': f"https://github.com/{name}",
+            'description': description.strip() if description is not None else None,
+            'language': language.strip() if language is not None else None,
+            'stars': self._parse_number(stars.strip()) if stars is not None else 0,
+            'forks': self._parse_number(forks.strip()) if forks is not None else 0,
+            'today_stars': self._parse_number(today_stars.strip()) if today_stars is not None else 0,
+            'crawled_at': datetime.utcnow().isoformat()
+        }
+
     def _get_description(self, article) -> Optional[str]:
         desc_elem = article.select_one('p')
         return desc_elem.text.strip() if desc_elem else None
@@ -121,11 +295,14 @@ class GitHubCrawler(BaseCrawler):
             return False
         if not isinstance(data.data, list):
             return False
-        return all(
-            isinstance(repo, dict) and 
-            'name' in repo and 
-            'url' in repo 
-            for repo in data.data
+        return all(self.validate_record(repo) for repo in data.data)
+
+    def validate_record(self, record: Dict) -> bool:
+        """验证单条仓库数据"""
+        return (
+            isinstance(record, dict) and
+            'name' in record and
+            'url' in record
         )
 
     def validate_config(self) -> bool:
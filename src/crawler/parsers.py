@@ -0,0 +1,254 @@
+# src/crawler/parsers.py
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - 可选依赖
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:  # pragma: no cover - 可选依赖
+    SelectolaxHTMLParser = None
+
+
+class ParserBackend(ABC):
+    """
+    HTML 解析后端基类
+
+    每个后端从 trending 页面中找出 article.Box-row，并产出与
+    GitHubCrawler._extract_repository_info 完全一致的字典（解析失败时为 None）
+    """
+    name = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        """依赖是否已安装"""
+        return True
+
+    @abstractmethod
+    def iter_repositories(self, html: str, crawler) -> Iterator[Optional[Dict]]:
+        """逐个产出仓库信息"""
+        pass
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup 完整建树（默认，与原实现一致）"""
+    name = 'html.parser'
+
+    def _make_soup(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, 'html.parser')
+
+    def iter_repositories(self, html: str, crawler) -> Iterator[Optional[Dict]]:
+        for article in self._make_soup(html).select('article.Box-row'):
+            yield crawler._extract_repository_info(article)
+
+
+class StrainerBackend(SoupBackend):
+    """只为 article.Box-row 建子树的 BeautifulSoup"""
+    name = 'strainer'
+    strainer = SoupStrainer('article', class_='Box-row')
+
+    def _make_soup(self, html: str) -> BeautifulSoup:
+        return BeautifulSoup(html, 'html.parser', parse_only=self.strainer)
+
+
+class LxmlBackend(ParserBackend):
+    """lxml 原生解析，不经过 BeautifulSoup"""
+    name = 'lxml'
+
+    @classmethod
+    def available(cls) -> bool:
+        return lxml is not None
+
+    def iter_repositories(self, html: str, crawler) -> Iterator[Optional[Dict]]:
+        tree = lxml.html.fromstring(html)
+        for article in tree.iter('article'):
+            if 'Box-row' in (article.get('class') or '').split():
+                yield self.extract(article, crawler)
+
+    @staticmethod
+    def extract(article, crawler) -> Optional[Dict]:
+        """按 _extract_repository_info 的选择器语义从 lxml 元素中取值"""
+        try:
+            return LxmlBackend._extract(article, crawler)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _extract(article, crawler) -> Optional[Dict]:
+        h2_links = article.xpath('.//h2//a')
+        href = h2_links[0].get('href') if h2_links else None
+        if href is None:
+            return None
+
+        description = next(article.iterdescendants('p'), None)
+        language = article.xpath('.//*[@itemprop="programmingLanguage"]')
+        stars = forks = today_stars = None
+        for link in article.iterdescendants('a'):
+            link_href = link.get('href')
+            if link_href is None:
+                continue
+            if stars is None and link_href.endswith('/stargazers'):
+                stars = link
+            elif forks is None and link_href.endswith('/forks'):
+                forks = link
+        for span in article.iterdescendants('span'):
+            classes = (span.get('class') or '').split()
+            if 'd-inline-block' in classes and 'float-sm-right' in classes:
+                today_stars = span
+                break
+
+        return crawler._build_repository_info(
+            href=href,
+            description=description.text_content() if description is not None else None,
+            language=language[0].text_content() if language else None,
+            stars=stars.text_content() if stars is not None else None,
+            forks=forks.text_content() if forks is not None else None,
+            today_stars=today_stars.text_content() if today_stars is not None else None
+        )
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax 解析，CSS 选择器与原实现相同"""
+    name = 'selectolax'
+
+    @classmethod
+    def available(cls) -> bool:
+        return SelectolaxHTMLParser is not None
+
+    def iter_repositories(self, html: str, crawler) -> Iterator[Optional[Dict]]:
+        for article in SelectolaxHTMLParser(html).css('article.Box-row'):
+            yield self.extract(article, crawler)
+
+    @staticmethod
+    def extract(article, crawler) -> Optional[Dict]:
+        try:
+            return SelectolaxBackend._extract(article, crawler)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _extract(article, crawler) -> Optional[Dict]:
+        link = article.css_first('h2 a')
+        href = link.attributes.get('href') if link is not None else None
+        if href is None:
+            return None
+
+        def text(selector: str) -> Optional[str]:
+            node = article.css_first(selector)
+            return node.text(deep=True) if node is not None else None
+
+        return crawler._build_repository_info(
+            href=href,
+            description=text('p'),
+            language=text('[itemprop="programmingLanguage"]'),
+            stars=text('a[href$="/stargazers"]'),
+            forks=text('a[href$="/forks"]'),
+            today_stars=text('span.d-inline-block.float-sm-right')
+        )
+
+
+class BoxRowSplitter(HTMLParser):
+    """
+    增量切分器：边接收 HTML 片段边识别 article.Box-row
+
+    原样还原每个 article 的源码，在其闭合时放入 fragments，
+    再交给任意解析后端处理，保证与整页解析结果一致
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.fragments: List[str] = []
+        self._buffer: List[str] = []
+        self._depth = 0
+
+    def _emit(self, text: str) -> None:
+        if self._depth:
+            self._buffer.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'article':
+            if self._depth:
+                self._depth += 1
+            elif 'Box-row' in (dict(attrs).get('class') or '').split():
+                self._depth = 1
+        self._emit(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        self._emit(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        self._emit(f"</{tag}>")
+        if tag == 'article' and self._depth:
+            self._depth -= 1
+            if not self._depth:
+                self._flush()
+
+    def handle_data(self, data):
+        self._emit(data)
+
+    def handle_entityref(self, name):
+        self._emit(f"&{name};")
+
+    def handle_charref(self, name):
+        self._emit(f"&#{name};")
+
+    def handle_comment(self, data):
+        self._emit(f"<!--{data}-->")
+
+    def close(self):
+        super().close()
+        # 页面被截断时仍交出未闭合的 article，与整页解析的容错行为一致
+        if self._depth:
+            self._depth = 0
+            self._flush()
+
+    def _flush(self) -> None:
+        self.fragments.append(''.join(self._buffer))
+        self._buffer = []
+
+
+def iter_stream_repositories(
+    chunks: Iterable[str],
+    backend: ParserBackend,
+    crawler
+) -> Iterator[Optional[Dict]]:
+    """增量解析文本块，每个 article.Box-row 闭合后立即产出其仓库信息"""
+    splitter = BoxRowSplitter()
+
+    def drain() -> Iterator[Optional[Dict]]:
+        fragments, splitter.fragments = splitter.fragments, []
+        for fragment in fragments:
+            yield from backend.iter_repositories(fragment, crawler)
+
+    for chunk in chunks:
+        splitter.feed(chunk)
+        yield from drain()
+    splitter.close()
+    yield from drain()
+
+
+PARSER_BACKENDS: Dict[str, Type[ParserBackend]] = {
+    backend.name: backend
+    for backend in (SoupBackend, StrainerBackend, LxmlBackend, SelectolaxBackend)
+}
+
+
+def available_backends() -> List[str]:
+    """列出当前环境可用的解析后端"""
+    return [name for name, backend in PARSER_BACKENDS.items() if backend.available()]
+
+
+def get_parser_backend(name: str) -> ParserBackend:
+    """按名称创建解析后端"""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name}")
+    backend = PARSER_BACKENDS[name]
+    if not backend.available():
+        raise ValueError(f"Parser backend '{name}' requires an optional dependency")
+    return backend()
@@ -0,0 +1,88 @@
+# src/crawler/session.py
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def _accept_encoding() -> str:
+    """urllib3 只有在安装了 brotli 时才能解码 br"""
+    for module in ('brotli', 'brotlicffi'):
+        try:
+            __import__(module)
+            return 'gzip, deflate, br'
+        except ImportError:
+            continue
+    return 'gzip, deflate'
+
+
+def create_http_session(headers: Dict[str, str], pool_size: int = 10) -> requests.Session:
+    """
+    创建长连接复用的 HTTP 会话
+
+    Args:
+        headers: 默认请求头
+        pool_size: 每个主机的连接池大小，应不小于并发数
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(headers)
+    session.headers['Accept-Encoding'] = _accept_encoding()
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+class ValidatorStore:
+    """ETag / Last-Modified 校验值存储，指定 path 时跨运行持久化"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._validators: Dict[str, Dict[str, str]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._validators = json.load(f)
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """生成条件请求头"""
+        with self._lock:
+            validators = self._validators.get(key, {})
+        headers = {}
+        if 'etag' in validators:
+            headers['If-None-Match'] = validators['etag']
+        if 'last_modified' in validators:
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
+    def update(self, key: str, response: requests.Response) -> None:
+        """记录响应中的校验值"""
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['last_modified'] = response.headers['Last-Modified']
+        if not validators:
+            return
+
+        with self._lock:
+            if self._validators.get(key) == validators:
+                return
+            self._validators[key] = validators
+            self._save()
+
+    def _save(self) -> None:
+        """原子写入，避免中断时留下半截文件"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._validators, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,134 @@
+# src/crawler/throttle.py
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+
+
+class AdaptiveRateController:
+    """
+    自适应限流控制器
+
+    根据 GitHub 返回的 X-RateLimit-Remaining / X-RateLimit-Reset / Retry-After
+    调整请求间隔：剩余配额多时加快，少时放慢，用完时暂停到重置时间；触发限流
+    （429 或限流导致的 403）时暂停整个爬取直到重置时间（每次不超过 max_pause）
+    并一直重试，5xx 与网络错误按带抖动的指数退避重试，最多 max_retries 次。
+    同一个控制器在线程间共享，暂停对所有线程生效。
+    """
+
+    RETRY_STATUSES = {500, 502, 503, 504}
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        max_pause: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[], float] = random.random
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_pause = max_pause
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._next_at = 0.0
+        self._last_start = 0.0
+        self.min_interval = 0.0
+
+    @property
+    def paused_until(self) -> float:
+        return self._paused_until
+
+    def before_request(self) -> float:
+        """等待暂停结束并按当前间隔排队，返回等待时长"""
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._paused_until, self._next_at)
+            self._last_start = start
+            self._next_at = start + self.min_interval
+        wait = start - now
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def after_response(self, response: requests.Response, attempt: int) -> Optional[float]:
+        """
+        根据响应更新节奏
+
+        Returns:
+            需要重试时返回重试前的额外等待秒数，否则返回 None
+        """
+        now = self.clock()
+        remaining = self._int_header(response, 'X-RateLimit-Remaining')
+        reset = self._int_header(response, 'X-RateLimit-Reset')
+        retry_after = self._int_header(response, 'Retry-After')
+
+        if remaining is not None and reset is not None:
+            if remaining > 0:
+                window = max(reset - now, 0.0)
+                with self._lock:
+                    # 把剩余配额均匀分摊到重置前的时间里
+                    self.min_interval = window / remaining
+                    self._next_at = self._last_start + self.min_interval
+            else:
+                # 配额已用完：在重置前暂停，而不是等下一次请求被限流
+                self.pause_until(min(reset, now + self.max_pause))
+
+        if self._is_rate_limited(response, remaining, retry_after):
+            if retry_after is not None:
+                resume_at = now + retry_after
+            elif reset is not None:
+                resume_at = reset
+            else:
+                resume_at = now + self.backoff(attempt)
+            # 限流不计入 max_retries：每次暂停到重置时间（不超过 max_pause）后继续
+            self.pause_until(min(resume_at, now + self.max_pause))
+            return 0.0
+
+        if response.status_code in self.RETRY_STATUSES and attempt < self.max_retries:
+            return self.backoff(attempt)
+        return None
+
+    def on_error(self, attempt: int) -> Optional[float]:
+        """网络错误时的重试等待，超过重试次数返回 None"""
+        if attempt < self.max_retries:
+            return self.backoff(attempt)
+        return None
+
+    def pause_until(self, timestamp: float) -> None:
+        """暂停所有请求直到指定时间"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, timestamp)
+
+    def backoff(self, attempt: int) -> float:
+        """带完全抖动的指数退避"""
+        return min(self.max_delay, self.base_delay * (2 ** attempt)) * self.jitter()
+
+    @staticmethod
+    def _is_rate_limited(
+        response: requests.Response,
+        remaining: Optional[int],
+        retry_after: Optional[int]
+    ) -> bool:
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        # 403 也可能是真正的权限错误，只有带限流标记时才重试
+        return remaining == 0 or retry_after is not None
+
+    @staticmethod
+    def _int_header(response: requests.Response, name: str) -> Optional[int]:
+        value = response.headers.get(name)
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            return None
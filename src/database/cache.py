@@ -1,52 +1,582 @@
+from collections import Counter, OrderedDict
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+import inspect
+import logging
+import math
+import random
+import re
 import redis
-import json
-import pickle
+import struct
+import threading
+import time
+import uuid
 from datetime import timedelta
 
+from .codec import Codec, digest, snapshot
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    进程内的 LRU/TTL 缓存
+
+    按前缀分区，每个分区有独立的容量上限（capacities 中未列出的前缀使用
+    capacity），超出时淘汰最久未使用的条目；过期条目在读取时丢弃。
+    """
+
+    def __init__(
+        self,
+        capacity: int = 256,
+        capacities: Optional[Dict[str, int]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.capacity = capacity
+        self.capacities = dict(capacities or {})
+        self.clock = clock
+        self._partitions: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, prefix: str, key: str) -> Any:
+        """返回缓存值，未命中或已过期时返回 _MISSING"""
+        with self._lock:
+            partition = self._partitions.get(prefix)
+            entry = partition.get(key) if partition else None
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del partition[key]
+                return _MISSING
+            partition.move_to_end(key)
+            return value
+
+    def set(self, prefix: str, key: str, value: Any, ttl: float) -> None:
+        capacity = self.capacities.get(prefix, self.capacity)
+        if capacity <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            partition = self._partitions.setdefault(prefix, OrderedDict())
+            partition[key] = (self.clock() + ttl, value)
+            partition.move_to_end(key)
+            while len(partition) > capacity:
+                partition.popitem(last=False)
+
+    def clear(self, prefix: Optional[str] = None) -> None:
+        """清空一个前缀（缺省为全部）"""
+        with self._lock:
+            if prefix is None:
+                self._partitions.clear()
+            else:
+                self._partitions.pop(prefix, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition) for partition in self._partitions.values())
+
+
+def _self_parameter(signature: inspect.Signature) -> Optional[str]:
+    """第一个参数为 self/cls（装饰类中定义的方法）时返回其名称"""
+    parameters = list(signature.parameters)
+    return parameters[0] if parameters and parameters[0] in ('self', 'cls') else None
+
+
+def _scope(prefix: str, namespace: Optional[str]) -> str:
+    """Redis 中键和代数使用的前缀，命名空间在前"""
+    return f"{namespace}:{prefix}" if namespace else prefix
+
+
+def _escape_glob(pattern: str) -> str:
+    """转义 SCAN MATCH 的通配字符，命名空间中可能含有 ? 或 [ ]"""
+    return re.sub(r'([*?\[\]\\])', r'\\\1', pattern)
+
+
+def _rates(counts: Counter) -> Dict[str, float]:
+    lookups = counts['hits'] + counts['misses']
+    return {
+        'hits': counts['hits'],
+        'misses': counts['misses'],
+        'hit_rate': counts['hits'] / lookups if lookups else 0.0
+    }
+
+
+class _Flight:
+    """一次进行中的计算，同一进程内的其他调用方等待它的结果"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = None
+        self._error: Optional[BaseException] = None
+
+    def resolve(self, value: Any) -> None:
+        self._value = value
+        self._done.set()
+
+    def fail(self, error: BaseException) -> None:
+        self._error = error
+        self._done.set()
+
+    def wait(self) -> Any:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
 class CacheManager:
-    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
-        self.redis = redis.from_url(redis_url)
+    """
+    两级缓存：进程内 LocalCache 在前，Redis 在后
+
+    - 缓存键由函数的限定名和参数的规范编码计算 blake2b 摘要，不依赖随进程变化的
+      hash()。参数先按函数签名绑定并补全默认值，f(1)、f(a=1) 与省略默认值的调用
+      得到同一个键；方法的 self/cls 不参与计算，同一方法的不同实例和不同进程共享条目
+    - 结果先经 snapshot 转成不可变的行元组，再用 Codec 编码后写入 Redis
+      （有 msgpack/zstandard 时使用，否则为 JSON/zlib）
+    - 本地命中不访问 Redis，也不反序列化
+    - Redis 命中后提升到本地，本地有效期不超过 Redis 中剩余的 TTL
+    - 每个前缀有一个保存在 Redis 中的代数，缓存键形如
+      [{namespace}:]{prefix}:g{代数}:{函数名}:{参数摘要}。invalidate 只对代数执行一次 INCR，
+      旧代数的键不再被读取，随 TTL 自然过期；需要立即回收内存时可用 purge
+      在后台分批 UNLINK。计算期间发生失效时，结果写在旧代数下，不会被读到
+    - 其他进程的失效最多在 generation_ttl 秒后可见（本地缓存的代数有效期）
+    - 防击穿：
+      - 未命中时同一个键只计算一次：进程内的调用方等待同一个 _Flight，
+        进程之间用 Redis 锁（SET NX PX，释放时用脚本比较令牌后删除），
+        没拿到锁的进程轮询 Redis 等待结果，超过 lock_timeout 后自行计算
+      - expire 是软过期时间，条目在 Redis 中多保留 stale 秒；软过期后
+        直接返回旧值，并由拿到锁的一个调用方在后台线程刷新
+      - 概率提前过期（XFetch）：距软过期越近、计算越慢，越可能提前在后台刷新，
+        early_expiration_beta 为 0 时关闭
+    - stats 记录每一级的命中和未命中次数，以及刷新相关的计数
+
+    本地命中返回的是同一个对象，调用方不应修改缓存结果。
+    """
+
+    TIERS = ('local', 'redis')
+
+    # 令牌一致时才删除锁，避免删掉超时后被其他进程重新获得的锁
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    # Redis 中条目的头：软过期的时间戳和计算耗时（秒）
+    _HEADER = struct.Struct('>dd')
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        local_capacity: Optional[int] = None,
+        local_ttl: Optional[float] = None,
+        capacities: Optional[Dict[str, int]] = None,
+        redis_client=None,
+        generation_ttl: Optional[float] = None,
+        codec: Optional[Codec] = None,
+        stale_ttl: Optional[float] = None,
+        early_expiration_beta: Optional[float] = None,
+        lock_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        settings = self._settings()
+        self.redis = redis_client if redis_client is not None else redis.from_url(redis_url)
+        self.local_ttl = settings['local_ttl'] if local_ttl is None else local_ttl
+        self.local = LocalCache(
+            settings['local_capacity'] if local_capacity is None else local_capacity,
+            settings['capacities'] if capacities is None else capacities
+        )
+        self.generation_ttl = (
+            settings['generation_ttl'] if generation_ttl is None else generation_ttl
+        )
+        self.codec = codec or Codec(**settings['codec'])
+        self.stale_ttl = settings['stale_ttl'] if stale_ttl is None else stale_ttl
+        self.early_expiration_beta = (
+            settings['early_expiration_beta']
+            if early_expiration_beta is None else early_expiration_beta
+        )
+        self.lock_timeout = settings['lock_timeout'] if lock_timeout is None else lock_timeout
+        self.lock_poll = settings['lock_poll']
+        # 软过期使用墙上时间，在进程之间可比较
+        self.clock = clock
+        self._release_lock = self.redis.register_script(self.RELEASE_SCRIPT)
+        # 前缀 -> (代数, 读取时间)
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        # 缓存键 -> 进行中的计算；正在后台刷新的缓存键
+        self._flights: Dict[str, _Flight] = {}
+        self._refreshing: Set[str] = set()
+        self._stats = {tier: Counter() for tier in self.TIERS}
+        self._refresh_stats = Counter()
+        self._prefix_stats: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _settings() -> Dict[str, Any]:
+        from config.settings import CACHE
+        return CACHE
 
     def cache(
         self,
         prefix: str,
-        expire: int = 300
+        expire: int = 300,
+        stale: Optional[float] = None,
+        namespace: Optional[str] = None
     ) -> Callable:
         """
         缓存装饰器
-        
+
         Args:
             prefix: 缓存键前缀
-            expire: 过期时间（秒）
+            expire: 软过期时间（秒）
+            stale: 软过期后仍可返回旧值的时间（秒），缺省为 stale_ttl
+            namespace: 数据来源的命名空间（例如数据库 URL），不同命名空间的
+                同名前缀互不共享条目和代数；失效时需传入同一个 namespace
         """
+        stale = self.stale_ttl if stale is None else stale
+
         def decorator(func: Callable) -> Callable:
+            name = f"{func.__module__}.{func.__qualname__}"
+            signature = inspect.signature(func)
+            instance = _self_parameter(signature)
+
             @wraps(func)
             def wrapper(*args, **kwargs) -> Any:
-                # 生成缓存键
-                cache_key = f"{prefix}:{func.__name__}:{hash(str(args) + str(kwargs))}"
-                
-                # 尝试从缓存获取
-                cached_data = self.redis.get(cache_key)
-                if cached_data:
-                    return pickle.loads(cached_data)
-                
-                # 执行函数
-                result = func(*args, **kwargs)
-                
-                # 存入缓存
-                self.redis.setex(
-                    cache_key,
-                    timedelta(seconds=expire),
-                    pickle.dumps(result)
+                # 由绑定后的完整参数生成缓存键
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                arguments.pop(instance, None)
+                cache_key = self._key(
+                    prefix, f"{func.__name__}:{digest(name, arguments)}", namespace
                 )
-                
-                return result
+
+                def compute() -> Any:
+                    return func(*args, **kwargs)
+
+                # 先查本地，再查 Redis
+                entry = self._get(prefix, cache_key)
+                if entry is _MISSING:
+                    self._count_prefix(prefix, 'misses')
+                    return self._single_flight(prefix, cache_key, compute, expire, stale)
+                self._count_prefix(prefix, 'hits')
+
+                value, soft_expires_at, cost = entry
+                if self._should_refresh(soft_expires_at, cost):
+                    self._revalidate(prefix, cache_key, compute, expire, stale, soft_expires_at)
+                return value
             return wrapper
         return decorator
 
-    def invalidate(self, prefix: str) -> None:
-        """清除指定前缀的缓存"""
-        for key in self.redis.scan_iter(f"{prefix}:*"):
-            self.redis.delete(key)
\ No newline at end of file
+    def _should_refresh(self, soft_expires_at: float, cost: float) -> bool:
+        """
+        软过期后必定刷新；之前按 XFetch 以一定概率提前刷新：
+        now - cost * beta * ln(U) >= soft_expires_at，U 在 (0, 1] 上均匀分布
+        """
+        now = self.clock()
+        if now >= soft_expires_at:
+            self._count_refresh('stale')
+            return True
+        if self.early_expiration_beta <= 0 or cost <= 0:
+            return False
+        gap = -cost * self.early_expiration_beta * math.log(1.0 - random.random())
+        if now + gap >= soft_expires_at:
+            self._count_refresh('early')
+            return True
+        return False
+
+    def _single_flight(
+        self,
+        prefix: str,
+        cache_key: str,
+        compute: Callable[[], Any],
+        expire: float,
+        stale: float
+    ) -> Any:
+        """未命中时合并同一个键的计算，进程内用 _Flight，进程之间用 Redis 锁"""
+        with self._lock:
+            flight = self._flights.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[cache_key] = _Flight()
+        if not leader:
+            self._count_refresh('coalesced')
+            return flight.wait()
+
+        try:
+            value = self._load(prefix, cache_key, compute, expire, stale)
+        except BaseException as e:
+            flight.fail(e)
+            raise
+        else:
+            flight.resolve(value)
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(cache_key, None)
+
+    def _load(
+        self,
+        prefix: str,
+        cache_key: str,
+        compute: Callable[[], Any],
+        expire: float,
+        stale: float
+    ) -> Any:
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            token = self._acquire(cache_key)
+            if token is not None:
+                try:
+                    # 等锁期间其他进程可能已经写入
+                    entry = self._fetch(prefix, cache_key)
+                    if entry is not _MISSING and entry[1] > self.clock():
+                        return entry[0]
+                    return self._store(prefix, cache_key, compute, expire, stale)
+                finally:
+                    self._release_lock(keys=[self._lock_key(cache_key)], args=[token])
+
+            if time.monotonic() >= deadline:
+                # 持有锁的进程太慢或已退出，不再等待
+                return self._store(prefix, cache_key, compute, expire, stale)
+            self._count_refresh('lock_waits')
+            time.sleep(self.lock_poll)
+            entry = self._fetch(prefix, cache_key)
+            if entry is not _MISSING:
+                return entry[0]
+
+    def _revalidate(
+        self,
+        prefix: str,
+        cache_key: str,
+        compute: Callable[[], Any],
+        expire: float,
+        stale: float,
+        seen_expires_at: float
+    ) -> Optional[threading.Thread]:
+        """
+        拿到锁时在后台线程刷新条目，返回该线程；已有进程或线程在刷新时返回 None
+
+        seen_expires_at 是触发刷新的条目的软过期时间，Redis 中的条目已被
+        其他进程换过时不再重复计算
+        """
+        with self._lock:
+            if cache_key in self._refreshing:
+                return None
+            self._refreshing.add(cache_key)
+        token = self._acquire(cache_key)
+        if token is None:
+            with self._lock:
+                self._refreshing.discard(cache_key)
+            return None
+
+        def refresh() -> None:
+            try:
+                entry = self._fetch(prefix, cache_key)
+                if entry is _MISSING or entry[1] <= seen_expires_at:
+                    self._store(prefix, cache_key, compute, expire, stale)
+                    self._count_refresh('background')
+            except Exception as e:
+                logger.warning(f"Background refresh of {cache_key} failed: {e}")
+            finally:
+                self._release_lock(keys=[self._lock_key(cache_key)], args=[token])
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+
+        thread = threading.Thread(target=refresh, name=f"cache-refresh-{prefix}", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _lock_key(cache_key: str) -> str:
+        # 不以 "{prefix}:" 开头，不会被 purge 的 SCAN 匹配到
+        return f"cache:lock:{cache_key}"
+
+    def _acquire(self, cache_key: str) -> Optional[str]:
+        """获取缓存键的 Redis 锁，成功时返回释放用的令牌"""
+        token = uuid.uuid4().hex
+        acquired = self.redis.set(
+            self._lock_key(cache_key), token, nx=True, px=int(self.lock_timeout * 1000)
+        )
+        return token if acquired else None
+
+    def _store(
+        self,
+        prefix: str,
+        cache_key: str,
+        compute: Callable[[], Any],
+        expire: float,
+        stale: float
+    ) -> Any:
+        """执行计算并写入两级缓存，Redis 中保留 expire + stale 秒"""
+        started = time.monotonic()
+        value = snapshot(compute())
+        cost = time.monotonic() - started
+        soft_expires_at = self.clock() + expire
+
+        self.redis.setex(
+            cache_key,
+            timedelta(seconds=expire + stale),
+            self._pack(value, soft_expires_at, cost)
+        )
+        self.local.set(
+            prefix, cache_key, (value, soft_expires_at, cost), min(self.local_ttl, expire + stale)
+        )
+        return value
+
+    def _pack(self, value: Any, soft_expires_at: float, cost: float) -> bytes:
+        return self._HEADER.pack(soft_expires_at, cost) + self.codec.dumps(value)
+
+    def _unpack(self, data: bytes) -> Tuple[Any, float, float]:
+        soft_expires_at, cost = self._HEADER.unpack_from(data)
+        return self.codec.loads(data[self._HEADER.size:]), soft_expires_at, cost
+
+    def _get(self, prefix: str, cache_key: str) -> Any:
+        """
+        依次查询两级缓存，返回 (值, 软过期时间, 计算耗时)，未命中时返回 _MISSING
+
+        本地条目已软过期时再查 Redis，其他进程可能已经刷新
+        """
+        entry = self.local.get(prefix, cache_key)
+        if entry is not _MISSING and entry[1] > self.clock():
+            self._count('local', 'hits')
+            return entry
+        self._count('local', 'misses')
+
+        fetched = self._fetch(prefix, cache_key)
+        if fetched is _MISSING:
+            self._count('redis', 'misses')
+            return entry
+        self._count('redis', 'hits')
+        return fetched
+
+    def _fetch(self, prefix: str, cache_key: str) -> Any:
+        """读取 Redis 中的条目并提升到本地，本地有效期不超过剩余的 TTL"""
+        pipe = self.redis.pipeline()
+        pipe.get(cache_key)
+        pipe.pttl(cache_key)
+        cached_data, ttl_ms = pipe.execute()
+        if cached_data is None:
+            return _MISSING
+
+        entry = self._unpack(cached_data)
+        ttl = self.local_ttl if ttl_ms is None or ttl_ms < 0 else min(self.local_ttl, ttl_ms / 1000)
+        self.local.set(prefix, cache_key, entry, ttl)
+        return entry
+
+    def _key(self, prefix: str, name: str, namespace: Optional[str] = None) -> str:
+        """带当前代数的缓存键"""
+        scope = _scope(prefix, namespace)
+        return f"{scope}:g{self.generation(prefix, namespace=namespace)}:{name}"
+
+    @staticmethod
+    def _generation_key(scope: str) -> str:
+        # 不以 "{prefix}:" 开头，不会被 purge 的 SCAN 匹配到
+        return f"cache:generation:{scope}"
+
+    def generation(
+        self,
+        prefix: str,
+        refresh: bool = False,
+        namespace: Optional[str] = None
+    ) -> int:
+        """前缀当前的代数，本地缓存 generation_ttl 秒"""
+        scope = _scope(prefix, namespace)
+        cached = self._generations.get(scope)
+        now = time.monotonic()
+        if cached is not None and not refresh and now - cached[1] < self.generation_ttl:
+            return cached[0]
+        value = self.redis.get(self._generation_key(scope))
+        generation = int(value) if value is not None else 0
+        with self._lock:
+            self._generations[scope] = (generation, now)
+        return generation
+
+    def invalidate(
+        self,
+        prefix: str,
+        purge: bool = False,
+        namespace: Optional[str] = None
+    ) -> Optional[threading.Thread]:
+        """
+        使指定前缀（和命名空间）的缓存失效
+
+        只执行一次 INCR，与键的数量无关。purge=True 时另起后台线程
+        删除旧代数的键，返回该线程
+        """
+        scope = _scope(prefix, namespace)
+        generation = self.redis.incr(self._generation_key(scope))
+        with self._lock:
+            self._generations[scope] = (generation, time.monotonic())
+        # 本地分区按前缀划分，清空时也会清掉其他命名空间的条目，只影响命中率
+        self.local.clear(prefix)
+        if not purge:
+            return None
+        thread = threading.Thread(
+            target=self.purge,
+            args=(prefix,),
+            kwargs={'namespace': namespace},
+            name=f"cache-purge-{prefix}",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def purge(self, prefix: str, batch_size: int = 500, namespace: Optional[str] = None) -> int:
+        """
+        删除前缀下非当前代数的键，返回删除数
+
+        SCAN 按批遍历，每批用一次流水线 UNLINK（在 Redis 后台线程释放内存）
+        """
+        scope = _scope(prefix, namespace)
+        current = f"{scope}:g{self.generation(prefix, refresh=True, namespace=namespace)}:"
+        removed = 0
+        batch = []
+        for key in self.redis.scan_iter(match=f"{_escape_glob(scope)}:g*", count=batch_size):
+            name = key.decode() if isinstance(key, bytes) else key
+            if not name.startswith(current):
+                batch.append(key)
+            if len(batch) >= batch_size:
+                removed += self._unlink(batch)
+                batch = []
+        if batch:
+            removed += self._unlink(batch)
+        return removed
+
+    def _unlink(self, keys) -> int:
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.unlink(key)
+        return sum(pipe.execute())
+
+    def _count(self, tier: str, outcome: str) -> None:
+        with self._lock:
+            self._stats[tier][outcome] += 1
+
+    def _count_prefix(self, prefix: str, outcome: str) -> None:
+        with self._lock:
+            self._prefix_stats.setdefault(prefix, Counter())[outcome] += 1
+
+    def _count_refresh(self, outcome: str) -> None:
+        with self._lock:
+            self._refresh_stats[outcome] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        每一级的命中次数、未命中次数和命中率，prefixes 中按前缀统计
+        （命中任意一级即为命中，包括返回软过期的值），以及 refresh：
+        stale（返回了软过期的值）、early（提前刷新）、background（后台刷新次数）、
+        coalesced（等待进程内其他调用方结果）、lock_waits（等待 Redis 锁的轮询次数）
+        """
+        with self._lock:
+            stats = {tier: _rates(counts) for tier, counts in self._stats.items()}
+            stats['prefixes'] = {
+                prefix: _rates(counts) for prefix, counts in self._prefix_stats.items()
+            }
+            stats['refresh'] = {
+                outcome: self._refresh_stats[outcome]
+                for outcome in ('stale', 'early', 'background', 'coalesced', 'lock_waits')
+            }
+            return stats
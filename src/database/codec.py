@@ -0,0 +1,263 @@
+import hashlib
+import json
+import zlib
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Sequence, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+# 单键字典形式的类型标记
+_DATETIME = '__dt__'
+_DATE = '__d__'
+_TUPLE = '__t__'
+_MAP = '__map__'
+_ROWS = '__rows__'
+_ROW = '__row__'
+# 键恰好是类型标记的单键字典包在这个标记里，解码时不按类型标记解释
+_DICT = '__dict__'
+_TAGS = frozenset((_DATETIME, _DATE, _TUPLE, _ROWS, _ROW, _DICT))
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def canonical(value: Any) -> Any:
+    """
+    参数的规范形式：只含 JSON 基本类型，字典按键排序
+
+    datetime/date/tuple 带类型标记，与同值的字符串、列表区分开；
+    无法稳定表示的对象（例如依赖 id() 的 repr）抛出 TypeError
+    """
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, datetime):
+        return {_DATETIME: value.isoformat()}
+    if isinstance(value, date):
+        return {_DATE: value.isoformat()}
+    if isinstance(value, tuple):
+        return {_TUPLE: [canonical(item) for item in value]}
+    if isinstance(value, list):
+        return [canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((canonical(item) for item in value), key=_dump)
+    if isinstance(value, dict):
+        pairs = [[canonical(k), canonical(v)] for k, v in value.items()]
+        return {_MAP: sorted(pairs, key=lambda pair: _dump(pair[0]))}
+    raise TypeError(f"Cannot derive a cache key from {type(value).__name__}")
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, sort_keys=True)
+
+
+def digest(*parts: Any) -> str:
+    """规范编码后的 blake2b 摘要（128 位），与进程和 PYTHONHASHSEED 无关"""
+    payload = _dump(canonical(list(parts))).encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def row_type(name: str, columns: Tuple[str, ...]) -> type:
+    """同名同列的行快照共用一个 namedtuple 类型"""
+    return namedtuple(name, columns)
+
+
+def snapshot(value: Any) -> Any:
+    """
+    把 ORM 对象和 SQLAlchemy Row 转成不可变的 namedtuple 行
+
+    只读取列属性，不触发关系加载；列表逐项转换，其他值原样返回
+    """
+    if isinstance(value, list):
+        return [snapshot(item) for item in value]
+    if hasattr(value, '_fields') and hasattr(value, '_mapping'):
+        return row_type('Row', tuple(value._fields))(*value)
+    state = sa_inspect(value, raiseerr=False)
+    mapper = getattr(state, 'mapper', None)
+    if mapper is not None:
+        columns = tuple(attr.key for attr in mapper.column_attrs)
+        return row_type(f"{mapper.class_.__name__}Row", columns)(
+            *(getattr(value, column) for column in columns)
+        )
+    return value
+
+
+class Codec:
+    """
+    缓存值的编解码
+
+    负载格式为两个字节的头加正文：
+    - 第一个字节：b'M' msgpack，b'J' JSON（未安装 msgpack 时）
+    - 第二个字节：b'Z' zstd，b'z' zlib（未安装 zstandard 时），b'-' 未压缩
+
+    同类型 namedtuple 组成的列表或元组按表编码：列名只写一次，每行是值的数组，
+    datetime/date 列整体标记类型，解码后仍是同名同列的 namedtuple。
+    类型标记是单键字典，键与标记相同的普通字典会被转义。
+    正文小于 compress_min_bytes 时不压缩。
+    """
+
+    def __init__(
+        self,
+        format: str = 'auto',
+        compression: str = 'auto',
+        compress_min_bytes: int = 1024,
+        level: int = 3
+    ):
+        if format == 'auto':
+            format = 'msgpack' if msgpack is not None else 'json'
+        if compression == 'auto':
+            compression = 'zstd' if zstandard is not None else 'zlib'
+        if format == 'msgpack' and msgpack is None:
+            raise ValueError("msgpack is not installed")
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError("zstandard is not installed")
+        if format not in ('msgpack', 'json'):
+            raise ValueError(f"Unknown cache format: {format}")
+        if compression not in ('zstd', 'zlib', 'none'):
+            raise ValueError(f"Unknown cache compression: {compression}")
+        self.format = format
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self.level = level
+
+    def dumps(self, value: Any) -> bytes:
+        plain = self._encode(value)
+        if self.format == 'msgpack':
+            header, body = b'M', msgpack.packb(plain, use_bin_type=True)
+        else:
+            header, body = b'J', _dump(plain).encode()
+
+        if self.compression == 'none' or len(body) < self.compress_min_bytes:
+            return header + b'-' + body
+        if self.compression == 'zstd':
+            return header + b'Z' + zstandard.ZstdCompressor(level=self.level).compress(body)
+        return header + b'z' + zlib.compress(body, self.level)
+
+    def loads(self, data: bytes) -> Any:
+        header, compression, body = data[:1], data[1:2], data[2:]
+        if compression == b'Z':
+            if zstandard is None:
+                raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif compression == b'z':
+            body = zlib.decompress(body)
+        elif compression != b'-':
+            raise ValueError(f"Unknown cache compression flag: {compression!r}")
+
+        if header == b'M':
+            if msgpack is None:
+                raise ValueError("Cache entry is msgpack-encoded but msgpack is not installed")
+            plain = msgpack.unpackb(body, raw=False, strict_map_key=False)
+        elif header == b'J':
+            plain = json.loads(body)
+        else:
+            raise ValueError(f"Unknown cache format flag: {header!r}")
+        return self._decode(plain)
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, _SCALARS):
+            return value
+        if isinstance(value, list):
+            if value and _same_row_type(value):
+                return self._encode_rows(value)
+            return [self._encode(item) for item in value]
+        if isinstance(value, tuple):
+            if hasattr(value, '_fields'):
+                return {_ROW: self._encode_rows([value])[_ROWS]}
+            if value and _same_row_type(value):
+                # 行快照组成的元组：标记内是行表而不是数组
+                return {_TUPLE: self._encode_rows(value)}
+            return {_TUPLE: [self._encode(item) for item in value]}
+        if isinstance(value, datetime):
+            return {_DATETIME: value.isoformat()}
+        if isinstance(value, date):
+            return {_DATE: value.isoformat()}
+        if isinstance(value, dict):
+            if not all(isinstance(key, str) for key in value):
+                raise TypeError("Cached dicts must have string keys")
+            encoded = {key: self._encode(item) for key, item in value.items()}
+            if len(encoded) == 1 and next(iter(encoded)) in _TAGS:
+                return {_DICT: encoded}
+            return encoded
+        raise TypeError(f"Cannot cache values of type {type(value).__name__}; use snapshot()")
+
+    def _encode_rows(self, rows: Sequence[tuple]) -> Dict[str, Any]:
+        first = rows[0]
+        columns = list(first._fields)
+        types = []
+        for index in range(len(columns)):
+            kinds = {type(row[index]) for row in rows if row[index] is not None}
+            if kinds == {datetime}:
+                types.append('dt')
+            elif kinds == {date}:
+                types.append('d')
+            elif kinds <= set(_SCALARS):
+                types.append(None)
+            else:
+                types.append('v')
+        values = [
+            [
+                cell if kind is None or cell is None
+                else cell.isoformat() if kind in ('dt', 'd')
+                else self._encode(cell)
+                for cell, kind in zip(row, types)
+            ]
+            for row in rows
+        ]
+        return {_ROWS: [type(first).__name__, columns, types, values]}
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._decode(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if len(value) == 1:
+            tag, inner = next(iter(value.items()))
+            if tag == _ROWS:
+                return self._decode_rows(*inner)
+            if tag == _ROW:
+                return self._decode_rows(*inner)[0]
+            if tag == _TUPLE:
+                if isinstance(inner, dict):
+                    return tuple(self._decode(inner))
+                return tuple(self._decode(item) for item in inner)
+            if tag == _DATETIME:
+                return datetime.fromisoformat(inner)
+            if tag == _DATE:
+                return date.fromisoformat(inner)
+            if tag == _DICT:
+                return {key: self._decode(item) for key, item in inner.items()}
+        return {key: self._decode(item) for key, item in value.items()}
+
+    def _decode_rows(self, name: str, columns: list, types: list, values: list) -> list:
+        cls = row_type(name, tuple(columns))
+        converters = [
+            datetime.fromisoformat if kind == 'dt'
+            else date.fromisoformat if kind == 'd'
+            else self._decode if kind == 'v'
+            else None
+            for kind in types
+        ]
+        return [
+            cls(*(
+                cell if convert is None or cell is None else convert(cell)
+                for cell, convert in zip(row, converters)
+            ))
+            for row in values
+        ]
+
+
+def _same_row_type(items: Sequence[Any]) -> bool:
+    first = type(items[0])
+    return hasattr(items[0], '_fields') and all(type(item) is first for item in items)
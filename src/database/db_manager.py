@@ -1,181 +1,852 @@
-from typing import Optional, List
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Iterator, Sequence, Set, Tuple
+from sqlalchemy import (
+    create_engine, event, insert, update, delete, bindparam, tuple_, select, func,
+    case, literal
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+from .models import (
+    Base, Repository, TrendingHistory, LanguageStats, ActivityChanges, RepositoryDailyDelta
+)
 from .session import get_db_session
 from .query_builder import QueryBuilder
 from .cache import CacheManager
+from .codec import snapshot
+from .index_advisor import IndexAdvisor
+from src.core.scoring import ScoringKernel, get_scoring_kernel
+
+logger = logging.getLogger(__name__)
 
 class DatabaseManager:
+    # bulk_save_repositories 的 upsert 冲突键，对应 uix_repo_name_crawled
+    UPSERT_KEYS = ('name', 'crawled_at')
+
+    # 缓存的查询：缓存前缀 -> (查询方法, 过期时间（秒）)
+    CACHED_QUERIES = {
+        'trending': ('_query_trending_repositories', 300),
+        'lang_stats': ('_query_language_statistics', 3600),
+        'activity': ('_query_activity_changes', 300)
+    }
+
     def __init__(
         self,
         db_url: str = 'sqlite:///data/github_trending.db',
-        redis_url: Optional[str] = None
+        redis_url: Optional[str] = None,
+        scoring: Optional[ScoringKernel] = None
     ):
-        # ... (之前的初始化代码)
-        
-        # 初始化缓存管理器
-        self.cache = CacheManager(redis_url) if redis_url else None
+        self.engine = create_engine(db_url)
+        self.Session = sessionmaker(bind=self.engine)
+        if self.engine.dialect.name == 'sqlite':
+            # SQLite 的 ROUND 与 Python round 在 .xx5 附近结果不同，注册 Python 版本
+            event.listen(self.engine, 'connect', self._register_sqlite_functions)
         
         # 初始化查询构建器
         self.query_builder = QueryBuilder()
 
+        # 缓存命名空间：隐藏密码的数据库 URL
+        self.cache_namespace = self.engine.url.render_as_string(hide_password=True)
+
+        # 初始化缓存管理器
+        self.cache = CacheManager(redis_url) if redis_url else None
+
+        # 活跃度评分定义，见 config.settings.SCORING['repository']
+        self.scoring = scoring or get_scoring_kernel('repository')
+
+        # 增量更新活跃度分数用的脏键 (name, crawled_at) 与时间水位
+        self._dirty_keys: Set[tuple] = set()
+        self._dirty_lock = threading.Lock()
+        self._score_watermark: Optional[datetime] = None
+
+        # 需要刷新每日汇总表的抓取日期
+        self._dirty_days: Set[datetime] = set()
+
+    @staticmethod
+    def _register_sqlite_functions(dbapi_connection, connection_record) -> None:
+        dbapi_connection.create_function('activity_round', 2, round, deterministic=True)
+
+    def init_database(self) -> None:
+        """创建所有表"""
+        Base.metadata.create_all(self.engine)
+
+    def get_session(self):
+        """创建数据库会话"""
+        return self.Session()
+
     @property
     def cache_enabled(self) -> bool:
         """检查缓存是否启用"""
         return self.cache is not None
 
+    @property
+    def cache(self) -> Optional[CacheManager]:
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Optional[CacheManager]) -> None:
+        """
+        设置缓存管理器，并为 CACHED_QUERIES 中的查询各包装一次
+
+        缓存键由查询方法绑定默认值后的完整参数计算，并以 cache_namespace 区分
+        数据库，共用一个 Redis 的不同数据库不会读到彼此的结果；
+        未启用缓存时直接调用查询方法
+        """
+        self._cache = cache
+        self._queries = {}
+        for prefix, (method, expire) in self.CACHED_QUERIES.items():
+            query = getattr(self, method)
+            self._queries[prefix] = (
+                cache.cache(prefix=prefix, expire=expire, namespace=self.cache_namespace)(query)
+                if cache is not None else query
+            )
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """缓存命中率，见 CacheManager.stats；未启用缓存时为空"""
+        return self.cache.stats() if self.cache_enabled else {}
+
+    def advise_indexes(self, apply: bool = False, measure: bool = True) -> Dict[str, Any]:
+        """用 EXPLAIN QUERY PLAN 检查 QueryBuilder 的查询，见 IndexAdvisor"""
+        return IndexAdvisor(self.engine, self.query_builder).advise(apply=apply, measure=measure)
+
     def get_trending_repositories(
         self,
         language: Optional[str] = None,
         min_stars: Optional[int] = None,
         min_activity: Optional[float] = None,
-        limit: int = 20
-    ) -> List[Repository]:
-        """获取趋势仓库"""
-        
-        # 如果启用了缓存，使用缓存装饰器
-        if self.cache_enabled:
-            @self.cache.cache(prefix="trending", expire=300)
-            def get_repos():
-                with get_db_session(self) as session:
-                    query = session.query(Repository)
-                    query = self.query_builder.trending_repositories(
-                        query,
-                        language=language,
-                        min_stars=min_stars,
-                        min_activity=min_activity,
-                        limit=limit
-                    )
-                    return query.all()
-            return get_repos()
-        
-        # 未启用缓存时直接查询
-        with get_db_session(self) as session:
-            query = session.query(Repository)
-            query = self.query_builder.trending_repositories(
-                query,
-                language=language,
-                min_stars=min_stars,
-                min_activity=min_activity,
-                limit=limit
-            )
-            return query.all()
+        limit: int = 20,
+        after: Optional[tuple] = None
+    ) -> Tuple[tuple, ...]:
+        """
+        获取趋势仓库
+
+        返回不可变的行快照（RepositoryRow，字段与 Repository 的列相同）。
+        按 (activity_score, id) 降序 keyset 分页：下一页传入
+        after=QueryBuilder.keyset(上一页最后一行, QueryBuilder.TRENDING_KEY)
+        """
+        return self._queries['trending'](
+            language=language or None,
+            min_stars=min_stars or None,
+            min_activity=min_activity or None,
+            limit=self._normalize_limit(limit),
+            after=self._normalize_after(after)
+        )
 
     def get_language_statistics(
         self,
         min_repos: Optional[int] = None,
-        min_stars: Optional[int] = None
-    ) -> List[LanguageStats]:
-        """获取语言统计"""
-        if self.cache_enabled:
-            @self.cache.cache(prefix="lang_stats", expire=3600)
-            def get_stats():
-                with get_db_session(self) as session:
-                    query = session.query(LanguageStats)
-                    query = self.query_builder.language_statistics(
-                        query,
-                        min_repos=min_repos,
-                        min_stars=min_stars
-                    )
-                    return query.all()
-            return get_stats()
+        min_stars: Optional[int] = None,
+        days: Optional[int] = None,
+        limit: Optional[int] = None,
+        after: Optional[tuple] = None
+    ) -> Tuple[tuple, ...]:
+        """
+        获取语言统计
 
-        with get_db_session(self) as session:
-            query = session.query(LanguageStats)
-            query = self.query_builder.language_statistics(
-                query,
-                min_repos=min_repos,
-                min_stars=min_stars
+        读取 refresh_rollups 维护的每日语言汇总，days 指定时只返回最近 days 天。
+        返回 LanguageStatsRow 行快照，按 (average_activity_score, id) 降序 keyset 分页，
+        见 QueryBuilder.LANGUAGE_KEY
+        """
+        return self._queries['lang_stats'](
+            min_repos=min_repos or None,
+            min_stars=min_stars or None,
+            since=self._days_ago(days) if days else None,
+            limit=self._normalize_limit(limit),
+            after=self._normalize_after(after)
+        )
+
+    def get_language_trends(
+        self,
+        days: int = 30,
+        recent_days: int = 7,
+        as_of: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        最近 days 天的语言趋势，取代 language_trends 视图
+
+        由每日语言汇总再聚合，只读取 days 行每种语言，与仓库表的总行数无关
+
+        Returns:
+            按平均活跃度降序的 [{'language', 'repo_count', 'total_stars', 'total_forks',
+            'avg_activity_score', 'last_updated', 'recent_repos_count'}]
+        """
+        stats = LanguageStats.__table__
+        since = self._days_ago(days, as_of)
+        recent_since = self._days_ago(recent_days, as_of)
+        repo_count = func.sum(stats.c.repository_count)
+        avg_activity = (
+            func.sum(stats.c.average_activity_score * stats.c.repository_count) / repo_count
+        )
+        query = (
+            select(
+                stats.c.language,
+                repo_count.label('repo_count'),
+                func.sum(stats.c.total_stars).label('total_stars'),
+                func.sum(stats.c.total_forks).label('total_forks'),
+                avg_activity.label('avg_activity_score'),
+                func.max(stats.c.date).label('last_updated'),
+                func.sum(case(
+                    (stats.c.date >= recent_since, stats.c.repository_count), else_=0
+                )).label('recent_repos_count')
             )
-            return query.all()
+            .where(stats.c.date >= since)
+            .group_by(stats.c.language)
+            .having(repo_count > 0)
+            .order_by(avg_activity.desc())
+        )
+        with get_db_session(self) as session:
+            return [dict(row) for row in session.execute(query).mappings()]
+
+    def get_recent_trending_repos(
+        self,
+        days: int = 7,
+        limit: Optional[int] = None,
+        as_of: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        最近 days 天的仓库及其相对前一天的变化，取代 recent_trending_repos 视图
+
+        Returns:
+            按活跃度降序的 repository_daily_deltas 行
+        """
+        deltas = RepositoryDailyDelta.__table__
+        query = (
+            select(deltas)
+            .where(deltas.c.date >= self._days_ago(days, as_of))
+            .order_by(deltas.c.activity_score.desc(), deltas.c.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        with get_db_session(self) as session:
+            return [dict(row) for row in session.execute(query).mappings()]
+
+    @staticmethod
+    def _days_ago(days: int, as_of: Optional[datetime] = None) -> datetime:
+        """as_of（缺省为当前 UTC 时间）所在日期往前 days 天的零点，与 date('now', '-N days') 一致"""
+        today = (as_of or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=days)
 
     def get_activity_changes(
         self,
         min_change: Optional[float] = None,
-        positive_only: bool = False
-    ) -> List[ActivityChanges]:
-        """获取活跃度变化"""
-        if self.cache_enabled:
-            @self.cache.cache(prefix="activity", expire=300)
-            def get_changes():
-                with get_db_session(self) as session:
-                    query = session.query(ActivityChanges)
-                    query = self.query_builder.activity_changes(
-                        query,
-                        min_change=min_change,
-                        positive_only=positive_only
-                    )
-                    return query.all()
-            return get_changes()
+        positive_only: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[tuple] = None
+    ) -> Tuple[tuple, ...]:
+        """
+        获取活跃度变化
 
+        返回 ActivityChangesRow 行快照，按 (activity_change, id) 降序 keyset 分页，
+        见 QueryBuilder.ACTIVITY_KEY
+        """
+        return self._queries['activity'](
+            min_change=min_change or None,
+            positive_only=bool(positive_only),
+            limit=self._normalize_limit(limit),
+            after=self._normalize_after(after)
+        )
+
+    @staticmethod
+    def _normalize_limit(limit: Optional[int]) -> Optional[int]:
+        # QueryBuilder 把 0 当作不限制，这里拒绝而不是静默返回全部行
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        return limit
+
+    @staticmethod
+    def _normalize_after(after: Optional[Sequence]) -> Optional[tuple]:
+        # 列表（例如来自 JSON）与元组得到相同的缓存键
+        return tuple(after) if after is not None else None
+
+    def _query_trending_repositories(
+        self,
+        language: Optional[str] = None,
+        min_stars: Optional[int] = None,
+        min_activity: Optional[float] = None,
+        limit: Optional[int] = None,
+        after: Optional[tuple] = None
+    ) -> Tuple[tuple, ...]:
         with get_db_session(self) as session:
-            query = session.query(ActivityChanges)
-            query = self.query_builder.activity_changes(
-                query,
+            return tuple(snapshot(self._seek(
+                self.query_builder.trending_repositories,
+                session.query(Repository),
+                limit,
+                after,
+                language=language,
+                min_stars=min_stars,
+                min_activity=min_activity
+            )))
+
+    def _query_language_statistics(
+        self,
+        min_repos: Optional[int] = None,
+        min_stars: Optional[int] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        after: Optional[tuple] = None
+    ) -> Tuple[tuple, ...]:
+        with get_db_session(self) as session:
+            return tuple(snapshot(self._seek(
+                self.query_builder.language_statistics,
+                session.query(LanguageStats),
+                limit,
+                after,
+                min_repos=min_repos,
+                min_stars=min_stars,
+                since=since
+            )))
+
+    def _query_activity_changes(
+        self,
+        min_change: Optional[float] = None,
+        positive_only: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[tuple] = None
+    ) -> Tuple[tuple, ...]:
+        with get_db_session(self) as session:
+            return tuple(snapshot(self._seek(
+                self.query_builder.activity_changes,
+                session.query(ActivityChanges),
+                limit,
+                after,
                 min_change=min_change,
                 positive_only=positive_only
-            )
-            return query.all()
+            )))
+
+    @staticmethod
+    def _seek(build, query, limit: Optional[int], after: Optional[tuple], **filters) -> list:
+        """
+        执行一页 keyset 查询
+
+        排序键为 NULL 的行排在最后，不在非 NULL 的 after 之后的查询结果中；
+        这一页没取满时从 NULL 行的开头补齐
+        """
+        rows = build(query, limit=limit, after=after, **filters).all()
+        null_start = QueryBuilder.null_start(after)
+        if null_start is not None and (limit is None or len(rows) < limit):
+            remaining = limit - len(rows) if limit is not None else None
+            rows += build(query, limit=remaining, after=null_start, **filters).all()
+        return rows
+
+    def iter_trending_repositories(
+        self,
+        language: Optional[str] = None,
+        min_stars: Optional[int] = None,
+        min_activity: Optional[float] = None,
+        after: Optional[tuple] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """按 get_trending_repositories 的顺序流式读取全部匹配的仓库（字典）"""
+        return self._stream(
+            Repository,
+            self.query_builder.trending_repositories,
+            chunk_size,
+            language=language,
+            min_stars=min_stars,
+            min_activity=min_activity,
+            limit=None,
+            after=after
+        )
+
+    def iter_language_statistics(
+        self,
+        min_repos: Optional[int] = None,
+        min_stars: Optional[int] = None,
+        days: Optional[int] = None,
+        after: Optional[tuple] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """按 get_language_statistics 的顺序流式读取语言统计（字典）"""
+        return self._stream(
+            LanguageStats,
+            self.query_builder.language_statistics,
+            chunk_size,
+            min_repos=min_repos,
+            min_stars=min_stars,
+            since=self._days_ago(days) if days else None,
+            after=after
+        )
+
+    def iter_activity_changes(
+        self,
+        min_change: Optional[float] = None,
+        positive_only: bool = False,
+        after: Optional[tuple] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """按 get_activity_changes 的顺序流式读取活跃度变化（字典）"""
+        return self._stream(
+            ActivityChanges,
+            self.query_builder.activity_changes,
+            chunk_size,
+            min_change=min_change,
+            positive_only=positive_only,
+            after=after
+        )
+
+    def _stream(self, model, build, chunk_size: int, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        单条查询流式读取：yield_per 分块取行，PostgreSQL 等使用服务端游标，
+        内存占用与结果总量无关。行以字典返回，不进入 ORM 会话
+        """
+        after = filters.pop('after', None)
+        positions = [after]
+        # 非 NULL 的 after 之后，排序键为 NULL 的行需要单独取，见 _seek
+        if QueryBuilder.null_start(after) is not None:
+            positions.append(QueryBuilder.null_start(after))
+        with get_db_session(self) as session:
+            for position in positions:
+                query = build(session.query(*model.__table__.columns), after=position, **filters)
+                rows = session.execute(
+                    query.statement.execution_options(stream_results=True, yield_per=chunk_size)
+                )
+                keys = list(rows.keys())
+                for chunk in rows.partitions():
+                    for row in chunk:
+                        yield dict(zip(keys, row))
+
+    def iter_trending_history(
+        self,
+        since: Optional[datetime] = None,
+        chunk_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        按日期顺序流式读取趋势历史
+
+        每条记录附带仓库最近一次抓取时的语言，since 指定时只读取该时间之后的记录
+        """
+        history = TrendingHistory.__table__
+        repos = Repository.__table__
+        language = (
+            select(repos.c.language)
+            .where(repos.c.name == history.c.repository_name)
+            .order_by(repos.c.crawled_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        query = select(
+            history.c.repository_name,
+            history.c.date,
+            history.c.stars,
+            history.c.forks,
+            history.c.activity_score,
+            language.label('language')
+        ).order_by(history.c.date, history.c.repository_name)
+        if since is not None:
+            query = query.where(history.c.date >= since)
+
+        with get_db_session(self) as session:
+            rows = session.execute(query.execution_options(yield_per=chunk_size))
+            for row in rows.mappings():
+                yield dict(row)
 
-    def bulk_save_repositories(self, repositories: List[Dict[str, Any]]) -> None:
-        """批量保存仓库数据"""
+    def bulk_save_repositories(
+        self,
+        repositories: List[Dict[str, Any]],
+        chunk_size: int = 500
+    ) -> Dict[str, int]:
+        """
+        批量保存仓库数据
+
+        以 (name, crawled_at) 为键做 upsert：SQLite/PostgreSQL 使用
+        INSERT ... ON CONFLICT DO UPDATE，其他数据库分块 executemany。
+        已存在的记录只更新传入的字段。
+
+        Returns:
+            {'inserted': 新增行数, 'updated': 更新行数}
+        """
+        counts = {'inserted': 0, 'updated': 0}
+        saved_keys = set()
         try:
             with get_db_session(self) as session:
-                # 批量插入或更新仓库
-                for repo_data in repositories:
-                    repo = session.query(Repository).filter_by(
-                        name=repo_data['name']
-                    ).first() or Repository()
-                    
-                    for key, value in repo_data.items():
-                        if hasattr(repo, key):
-                            setattr(repo, key, value)
-                    
-                    session.add(repo)
+                for rows in self._upsert_batches(repositories, chunk_size):
+                    inserted, updated = self._upsert_repositories(session, rows)
+                    counts['inserted'] += inserted
+                    counts['updated'] += updated
+                    saved_keys.update(tuple(row[k] for k in self.UPSERT_KEYS) for row in rows)
                 
                 # 提交事务
                 session.commit()
                 
+                # 记录脏行，供增量更新活跃度分数和每日汇总
+                with self._dirty_lock:
+                    self._dirty_keys |= saved_keys
+                    self._dirty_days.update(self._day_of(key[1]) for key in saved_keys)
+                
                 # 如果启用了缓存，清除相关缓存
                 if self.cache_enabled:
-                    self.cache.invalidate("trending")
-                    self.cache.invalidate("lang_stats")
+                    self.cache.invalidate("trending", namespace=self.cache_namespace)
+                    self.cache.invalidate("lang_stats", namespace=self.cache_namespace)
                     
-                logger.info(f"Bulk saved {len(repositories)} repositories")
+                logger.info(
+                    f"Bulk saved {len(repositories)} repositories "
+                    f"({counts['inserted']} inserted, {counts['updated']} updated)"
+                )
+                return counts
                 
         except SQLAlchemyError as e:
             logger.error(f"Error in bulk save: {e}")
             raise
 
-    def update_activity_scores(self) -> None:
-        """更新所有仓库的活跃度分数"""
+    def _upsert_batches(
+        self,
+        repositories: List[Dict[str, Any]],
+        chunk_size: int
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """规范化行数据，按键去重（后者覆盖前者）并按字段集合分块"""
+        columns = set(Repository.__table__.columns.keys()) - {'id'}
+        groups: Dict[frozenset, Dict[tuple, Dict[str, Any]]] = {}
+        for repo_data in repositories:
+            row = {k: v for k, v in repo_data.items() if k in columns}
+            if isinstance(row.get('crawled_at'), str):
+                row['crawled_at'] = datetime.fromisoformat(row['crawled_at'])
+            if row.get('crawled_at') is None:
+                row['crawled_at'] = datetime.utcnow()
+            key = tuple(row[k] for k in self.UPSERT_KEYS)
+            groups.setdefault(frozenset(row), {})[key] = row
+
+        for rows_by_key in groups.values():
+            rows = list(rows_by_key.values())
+            for start in range(0, len(rows), chunk_size):
+                yield rows[start:start + chunk_size]
+
+    def _upsert_repositories(self, session, rows: List[Dict[str, Any]]) -> tuple:
+        """对一块字段相同的行执行 upsert，返回 (新增数, 更新数)"""
+        table = Repository.__table__
+        keys = [tuple(row[k] for k in self.UPSERT_KEYS) for row in rows]
+        existing = set(session.execute(
+            select(table.c.name, table.c.crawled_at).where(
+                tuple_(table.c.name, table.c.crawled_at).in_(keys)
+            )
+        ).all())
+        update_columns = [c for c in rows[0] if c not in self.UPSERT_KEYS]
+        dialect = self.engine.dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(table)
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(self.UPSERT_KEYS),
+                    set_={c: stmt.excluded[c] for c in update_columns}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(self.UPSERT_KEYS))
+            session.execute(stmt, rows)
+        else:
+            new_rows = [row for row, key in zip(rows, keys) if key not in existing]
+            old_rows = [row for row, key in zip(rows, keys) if key in existing]
+            if new_rows:
+                session.execute(insert(table), new_rows)
+            if old_rows and update_columns:
+                stmt = update(table).where(
+                    table.c.name == bindparam('_name'),
+                    table.c.crawled_at == bindparam('_crawled_at')
+                ).values({c: bindparam(c) for c in update_columns})
+                session.execute(stmt, [
+                    {**row, '_name': row['name'], '_crawled_at': row['crawled_at']}
+                    for row in old_rows
+                ])
+
+        updated = sum(1 for key in keys if key in existing)
+        return len(rows) - updated, updated
+
+    def update_activity_scores(
+        self,
+        since: Optional[datetime] = None,
+        rebuild: bool = False,
+        chunk_size: int = 1000
+    ) -> Dict[str, int]:
+        """
+        更新仓库的活跃度分数
+
+        默认增量更新：只重算 bulk_save_repositories 写入过的行，以及
+        crawled_at 不早于 since（缺省为上次更新的时间）的行。crawled_at 与水位
+        都是 UTC（爬虫用 datetime.utcnow() 生成）；updated_at 是仓库自身的更新时间，
+        不作为判断依据。
+        本实例还没有任何水位和脏数据时退化为全表重算；rebuild=True 显式全表重算。
+
+        SQLite 上在数据库内用 UPDATE 完成计算；其他数据库的 ROUND
+        与 Python 的 round 语义不同，改为流式分块读取、批量回写
+
+        Returns:
+            {'touched': 重算的行数, 'skipped': 未触及的行数}
+        """
+        started_at = datetime.utcnow()
+        with self._dirty_lock:
+            dirty_keys, self._dirty_keys = self._dirty_keys, set()
+        since = since or self._score_watermark
+        rebuild = rebuild or (since is None and not dirty_keys)
+
         try:
             with get_db_session(self) as session:
-                repositories = session.query(Repository).all()
-                
-                for repo in repositories:
-                    # 计算活跃度分数
-                    activity_score = self._calculate_activity_score(
-                        stars=repo.stars,
-                        forks=repo.forks,
-                        issues=repo.open_issues,
-                        watchers=repo.watchers,
-                        contributors=repo.contributors_count,
-                        recent_commits=repo.recent_commits
-                    )
-                    
-                    repo.activity_score = activity_score
+                table = Repository.__table__
+                total = session.execute(select(func.count()).select_from(table)).scalar()
+                if rebuild:
+                    touched = self._recompute_scores(session, None, chunk_size)
+                else:
+                    ids = self._stale_repository_ids(session, dirty_keys, since)
+                    touched = 0
+                    for start in range(0, len(ids), chunk_size):
+                        touched += self._recompute_scores(
+                            session,
+                            table.c.id.in_(ids[start:start + chunk_size]),
+                            chunk_size
+                        )
                     
                 session.commit()
+                self._score_watermark = started_at
                 
                 # 清除缓存
-                if self.cache_enabled:
-                    self.cache.invalidate("trending")
+                if self.cache_enabled and touched:
+                    self.cache.invalidate("trending", namespace=self.cache_namespace)
                     
-                logger.info("Updated activity scores for all repositories")
+                logger.info(
+                    f"Updated activity scores for {touched} repositories "
+                    f"({total - touched} skipped{', full rebuild' if rebuild else ''})"
+                )
+                return {'touched': touched, 'skipped': total - touched}
                 
         except SQLAlchemyError as e:
+            # 失败时保留脏标记，下次重试
+            with self._dirty_lock:
+                self._dirty_keys |= dirty_keys
             logger.error(f"Error updating activity scores: {e}")
             raise
 
+    def rebuild_activity_scores(self, chunk_size: int = 1000) -> Dict[str, int]:
+        """全表重算活跃度分数"""
+        return self.update_activity_scores(rebuild=True, chunk_size=chunk_size)
+
+    def _stale_repository_ids(
+        self,
+        session,
+        dirty_keys: Set[tuple],
+        since: Optional[datetime],
+        chunk_size: int = 500
+    ) -> List[int]:
+        """找出需要重算的行：脏键对应的行加上水位之后变化的行"""
+        table = Repository.__table__
+        ids = set()
+        keys = list(dirty_keys)
+        for start in range(0, len(keys), chunk_size):
+            ids.update(session.execute(
+                select(table.c.id).where(
+                    tuple_(table.c.name, table.c.crawled_at).in_(keys[start:start + chunk_size])
+                )
+            ).scalars())
+        if since is not None:
+            ids.update(session.execute(
+                select(table.c.id).where(table.c.crawled_at >= since)
+            ).scalars())
+        return sorted(ids)
+
+    def _recompute_scores(self, session, where, chunk_size: int) -> int:
+        """重算满足 where 条件（None 表示全表）的行，返回行数"""
+        table = Repository.__table__
+        if self.engine.dialect.name == 'sqlite':
+            stmt = update(table).values(
+                activity_score=self.scoring.sql_score(table, round_func=func.activity_round)
+            )
+            if where is not None:
+                stmt = stmt.where(where)
+            return session.execute(stmt).rowcount
+        return self._update_activity_scores_chunked(session, where, chunk_size)
+
+    def _update_activity_scores_chunked(self, session, where, chunk_size: int) -> int:
+        """用服务端游标分块读取，按块批量计算后按主键回写"""
+        table = Repository.__table__
+        fields = self.scoring.fields
+        query = select(table.c.id, *(table.c[field] for field in fields))
+        if where is not None:
+            query = query.where(where)
+        rows = session.execute(
+            query.execution_options(
+                stream_results=True,
+                yield_per=chunk_size
+            )
+        )
+        stmt = update(table).where(table.c.id == bindparam('_id')).values(
+            activity_score=bindparam('activity_score')
+        )
+
+        updated = 0
+        for chunk in rows.partitions():
+            columns = list(zip(*chunk))
+            scores = self.scoring.score_columns(dict(zip(fields, columns[1:])))['scores']
+            session.execute(stmt, [
+                {'_id': row_id, 'activity_score': float(score)}
+                for row_id, score in zip(columns[0], scores)
+            ])
+            updated += len(chunk)
+        return updated
+
+    def refresh_rollups(
+        self,
+        since: Optional[datetime] = None,
+        chunk_size: int = 1000
+    ) -> Dict[str, int]:
+        """
+        增量刷新每日汇总表
+
+        language_stats 按 (语言, 日期) 汇总当天抓取的仓库行，
+        repository_daily_deltas 保存每个仓库当天最后一次抓取及其相对
+        前一天 trending_history 的变化。只重算以下日期：
+        bulk_save_repositories 写入过的日期、since 之后的日期，
+        以及（未指定 since 时）已汇总的最后一天及之后的日期。
+        每天的刷新先删除后重建，开销只与当天的抓取量有关，与历史总量无关。
+        应在 update_activity_scores 之后调用，汇总使用更新后的分数。
+
+        Returns:
+            {'days': 刷新的天数, 'language_rows': 语言汇总行数, 'delta_rows': 仓库变化行数}
+        """
+        with self._dirty_lock:
+            dirty_days, self._dirty_days = self._dirty_days, set()
+        counts = {'days': 0, 'language_rows': 0, 'delta_rows': 0}
+
+        try:
+            with get_db_session(self) as session:
+                days = sorted(dirty_days | self._rollup_days(session, since))
+                for day in days:
+                    counts['language_rows'] += self._refresh_language_stats(session, day)
+                    counts['delta_rows'] += self._refresh_daily_deltas(session, day, chunk_size)
+                session.commit()
+                counts['days'] = len(days)
+
+                if self.cache_enabled and days:
+                    self.cache.invalidate("lang_stats", namespace=self.cache_namespace)
+
+                logger.info(
+                    f"Refreshed rollups for {len(days)} days "
+                    f"({counts['language_rows']} language rows, {counts['delta_rows']} delta rows)"
+                )
+                return counts
+
+        except SQLAlchemyError as e:
+            with self._dirty_lock:
+                self._dirty_days |= dirty_days
+            logger.error(f"Error refreshing rollups: {e}")
+            raise
+
+    @staticmethod
+    def _day_of(value: Any) -> datetime:
+        """datetime、date 或 ISO 字符串所在日期的零点"""
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return datetime(value.year, value.month, value.day)
+
+    def _rollup_days(self, session, since: Optional[datetime]) -> Set[datetime]:
+        """需要刷新的抓取日期；首次刷新时为全部日期"""
+        repos = Repository.__table__
+        if since is None:
+            since = session.execute(
+                select(func.max(RepositoryDailyDelta.__table__.c.date))
+            ).scalar()
+        query = select(func.date(repos.c.crawled_at)).distinct()
+        if since is not None:
+            # 按 crawled_at 范围读取，走 idx_crawled_at
+            query = query.where(repos.c.crawled_at >= self._day_of(since))
+        return {self._day_of(day) for day in session.execute(query).scalars() if day}
+
+    def _refresh_language_stats(self, session, day: datetime) -> int:
+        """重建一天的语言汇总，返回行数"""
+        repos = Repository.__table__
+        stats = LanguageStats.__table__
+        end = day + timedelta(days=1)
+        session.execute(delete(stats).where(stats.c.date >= day, stats.c.date < end))
+        aggregate = (
+            select(
+                repos.c.language,
+                func.count(),
+                func.sum(repos.c.stars),
+                func.sum(repos.c.forks),
+                func.avg(repos.c.activity_score),
+                literal(day, stats.c.date.type)
+            )
+            .where(
+                repos.c.crawled_at >= day,
+                repos.c.crawled_at < end,
+                repos.c.language.isnot(None)
+            )
+            .group_by(repos.c.language)
+        )
+        return session.execute(
+            insert(stats).from_select(
+                ['language', 'repository_count', 'total_stars', 'total_forks',
+                 'average_activity_score', 'date'],
+                aggregate
+            )
+        ).rowcount
+
+    def _refresh_daily_deltas(self, session, day: datetime, chunk_size: int) -> int:
+        """重建一天的仓库变化，返回行数"""
+        repos = Repository.__table__
+        history = TrendingHistory.__table__
+        deltas = RepositoryDailyDelta.__table__
+        end = day + timedelta(days=1)
+
+        # 同一天多次抓取时取最后一次
+        latest = {}
+        for row in session.execute(
+            select(
+                repos.c.name, repos.c.language, repos.c.activity_score,
+                repos.c.stars, repos.c.forks, repos.c.open_issues
+            )
+            .where(repos.c.crawled_at >= day, repos.c.crawled_at < end)
+            .order_by(repos.c.crawled_at)
+        ):
+            latest[row.name] = row
+
+        # 与 recent_trending_repos 视图相同，对比前一天的趋势历史
+        previous = {}
+        for row in session.execute(
+            select(
+                history.c.repository_name, history.c.date, history.c.activity_score,
+                history.c.stars, history.c.forks, history.c.open_issues
+            )
+            .where(history.c.date >= day - timedelta(days=1), history.c.date < day)
+            .order_by(history.c.date)
+        ):
+            previous[row.repository_name] = row
+
+        rows = []
+        for name, row in latest.items():
+            before = previous.get(name)
+            rows.append({
+                'repository_name': name,
+                'date': day,
+                'language': row.language,
+                'activity_score': row.activity_score,
+                'stars': row.stars,
+                'forks': row.forks,
+                'open_issues': row.open_issues,
+                'previous_date': before.date if before else None,
+                'score_change': (
+                    row.activity_score - before.activity_score
+                    if before and row.activity_score is not None
+                    and before.activity_score is not None else None
+                ),
+                'stars_change': self._change(row.stars, before, 'stars'),
+                'forks_change': self._change(row.forks, before, 'forks'),
+                'issues_change': self._change(row.open_issues, before, 'open_issues')
+            })
+
+        session.execute(delete(deltas).where(deltas.c.date >= day, deltas.c.date < end))
+        for start in range(0, len(rows), chunk_size):
+            session.execute(insert(deltas), rows[start:start + chunk_size])
+        return len(rows)
+
+    @staticmethod
+    def _change(current: Optional[int], before, field: str) -> Optional[int]:
+        """与 SQL 减法一致：任一侧为空时结果为空"""
+        if before is None or current is None or getattr(before, field) is None:
+            return None
+        return current - getattr(before, field)
+
     def _calculate_activity_score(
         self,
         stars: int,
@@ -187,41 +858,9 @@ class DatabaseManager:
     ) -> float:
         """
         计算仓库活跃度分数
-        
-        使用加权计算方法，可以根据需要调整权重
-        """
-        weights = {
-            'stars': 0.3,
-            'forks': 0.2,
-            'issues': 0.1,
-            'watchers': 0.1,
-            'contributors': 0.15,
-            'commits': 0.15
-        }
-        
-        # 标准化各指标
-        max_values = {
-            'stars': 10000,
-            'forks': 5000,
-            'issues': 1000,
-            'watchers': 10000,
-            'contributors': 100,
-            'commits': 1000
-        }
-        
-        normalized_scores = {
-            'stars': min(stars / max_values['stars'], 1),
-            'forks': min(forks / max_values['forks'], 1),
-            'issues': min(issues / max_values['issues'], 1),
-            'watchers': min(watchers / max_values['watchers'], 1),
-            'contributors': min(contributors / max_values['contributors'], 1),
-            'commits': min(recent_commits / max_values['commits'], 1)
-        }
-        
-        # 计算加权分数
-        score = sum(
-            normalized_scores[key] * weights[key]
-            for key in weights
-        ) * 100
-        
-        return round(score, 2)
\ No newline at end of file
+
+        参数顺序与 scoring.fields 一致，权重和上限见评分定义
+        """
+        return self.scoring.score_row(
+            (stars, forks, issues, watchers, contributors, recent_commits)
+        )
@@ -0,0 +1,399 @@
+# src/database/index_advisor.py
+import argparse
+import logging
+import statistics
+import time
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression
+
+from .models import ActivityChanges, LanguageStats, Repository
+from .query_builder import QueryBuilder
+
+logger = logging.getLogger(__name__)
+
+
+def _thirty_days_ago() -> datetime:
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=30)
+
+
+# QueryBuilder 方法 -> (模型, 排序键, 不传 limit 时的 LIMIT, 各过滤参数的示例值)，
+# 参数的每种组合都会检查；示例值为可调用对象时在生成查询时求值
+QUERY_CASES = {
+    'trending_repositories': (Repository, QueryBuilder.TRENDING_KEY, 20, {
+        'language': 'Python',
+        'min_stars': 1000,
+        'min_activity': 50.0,
+        'after': (60.0, 1000)
+    }),
+    'language_statistics': (LanguageStats, QueryBuilder.LANGUAGE_KEY, None, {
+        'min_repos': 10,
+        'min_stars': 10000,
+        'since': _thirty_days_ago,
+        'limit': 100,
+        'after': (60.0, 1000)
+    }),
+    'activity_changes': (ActivityChanges, QueryBuilder.ACTIVITY_KEY, None, {
+        'min_change': 5.0,
+        'positive_only': True,
+        'limit': 100,
+        'after': (10.0, 1000)
+    })
+}
+
+_OPERATORS = {
+    operators.eq: '=',
+    operators.ge: '>=',
+    operators.gt: '>',
+    operators.le: '<=',
+    operators.lt: '<'
+}
+
+
+class QueryCase:
+    """一个 QueryBuilder 方法及一组过滤参数"""
+
+    def __init__(
+        self,
+        method: str,
+        model,
+        kwargs: Dict[str, Any],
+        key: Sequence = (),
+        default_limit: Optional[int] = None
+    ):
+        self.method = method
+        self.model = model
+        self.kwargs = kwargs
+        self.key = tuple(key)
+        self.default_limit = default_limit
+
+    @property
+    def name(self) -> str:
+        return f"{self.method}({', '.join(self.kwargs) or '-'})"
+
+    @property
+    def limited(self) -> bool:
+        """查询是否带 LIMIT"""
+        return bool(self.kwargs.get('limit', self.default_limit))
+
+    @property
+    def order_columns(self) -> List[str]:
+        """ORDER BY 的列名，与 QueryBuilder 的排序键一致"""
+        return [column.key for column in self.key]
+
+    def statement(self, session: Session, query_builder: QueryBuilder):
+        query = getattr(query_builder, self.method)(session.query(self.model), **self.kwargs)
+        return query.statement
+
+
+class IndexCandidate:
+    """
+    候选索引
+
+    列顺序为：等值过滤列、排序列、范围过滤列；covering 时附加其余查询列
+    （按表中顺序），where 非空时为部分索引
+    """
+
+    def __init__(
+        self,
+        table: str,
+        columns: Sequence[str],
+        covering: Sequence[str] = (),
+        where: Optional[str] = None
+    ):
+        self.table = table
+        self.columns = tuple(columns)
+        self.covering = tuple(c for c in covering if c not in self.columns)
+        self.where = where
+        # 以前两列命名，重名时由 IndexAdvisor 加序号区分
+        self.name = f"idx_{self.table}_{'_'.join(self.columns[:2])}" + ''.join((
+            '_covering' if self.covering else '',
+            '_partial' if self.where else ''
+        ))
+
+    @property
+    def definition(self) -> Tuple[str, Tuple[str, ...], Optional[str]]:
+        return self.table, self.all_columns, self.where
+
+    @property
+    def all_columns(self) -> Tuple[str, ...]:
+        return self.columns + self.covering
+
+    def covers(self, other: 'IndexCandidate') -> bool:
+        """other 的列是本索引列的前缀且条件相同，other 是多余的"""
+        return (
+            self.table == other.table
+            and self.where == other.where
+            and self.all_columns[:len(other.all_columns)] == other.all_columns
+        )
+
+    def create_sql(self) -> str:
+        sql = (
+            f"CREATE INDEX IF NOT EXISTS {self.name} "
+            f"ON {self.table}({', '.join(self.all_columns)})"
+        )
+        return f"{sql} WHERE {self.where}" if self.where else sql
+
+    def drop_sql(self) -> str:
+        return f"DROP INDEX IF EXISTS {self.name}"
+
+    def __repr__(self):
+        return f"<IndexCandidate({self.create_sql()})>"
+
+
+class IndexAdvisor:
+    """
+    基于 EXPLAIN QUERY PLAN 的索引顾问（SQLite）
+
+    对 QUERY_CASES 中每个 QueryBuilder 方法的全部过滤组合取得执行计划，
+    标记全表扫描（SCAN 表 且未使用索引）、无 LIMIT 查询经非覆盖索引的回表
+    和临时 B 树排序（USE TEMP B-TREE），为有问题的查询生成候选索引：
+    - 等值列在前、排序列其次、范围列在后，排序可直接沿索引完成
+    - 查询没有 LIMIT（返回全部匹配行）时附加其余列成为覆盖索引，免去回表
+    - 由布尔开关参数产生的常量条件（如 positive_only）成为部分索引的 WHERE
+
+    建好候选索引后重新取执行计划，没有被任何计划用到的候选索引会被删除；
+    apply=False 时只做评估，结束后删除全部新建索引。
+    """
+
+    FULL_SCAN = 'full_scan'
+    TABLE_LOOKUP = 'table_lookup'
+    TEMP_SORT = 'temp_sort'
+
+    def __init__(
+        self,
+        engine,
+        query_builder: Optional[QueryBuilder] = None,
+        cases: Optional[Dict[str, Tuple[Any, Sequence, Optional[int], Dict[str, Any]]]] = None
+    ):
+        if engine.dialect.name != 'sqlite':
+            raise ValueError("IndexAdvisor only supports SQLite (EXPLAIN QUERY PLAN)")
+        self.engine = engine
+        self.query_builder = query_builder or QueryBuilder()
+        self.case_specs = cases or QUERY_CASES
+
+    def cases(self) -> List[QueryCase]:
+        """每个方法的全部过滤参数组合，包括不带过滤"""
+        cases = []
+        for method, (model, key, default_limit, samples) in self.case_specs.items():
+            samples = {
+                name: value() if callable(value) else value
+                for name, value in samples.items()
+            }
+            names = list(samples)
+            for size in range(len(names) + 1):
+                for chosen in combinations(names, size):
+                    cases.append(QueryCase(
+                        method, model, {n: samples[n] for n in chosen}, key, default_limit
+                    ))
+        return cases
+
+    def explain(self, connection, case: QueryCase) -> List[str]:
+        """执行计划各行的 detail"""
+        compiled = self._compile(connection, case)
+        params = tuple(
+            value.isoformat(' ') if isinstance(value, datetime) else value
+            for value in (compiled.params[name] for name in compiled.positiontup or ())
+        )
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return [row[-1] for row in rows]
+
+    @classmethod
+    def plan_issues(cls, plan: Iterable[str], limited: bool = True) -> List[str]:
+        """
+        执行计划中的问题
+
+        没有 LIMIT 的查询要读完全部匹配行，此时经由非覆盖索引访问
+        每行都要回表，也视为问题
+        """
+        issues = []
+        for detail in plan:
+            if detail.startswith(('SCAN ', 'SEARCH ')):
+                if ' INDEX ' not in f"{detail} ":
+                    issues.append(cls.FULL_SCAN)
+                elif not limited and ' COVERING INDEX ' not in detail:
+                    issues.append(cls.TABLE_LOOKUP)
+            elif detail.startswith('USE TEMP B-TREE'):
+                issues.append(cls.TEMP_SORT)
+        return issues
+
+    def measure(self, connection, case: QueryCase, repeat: int = 5) -> float:
+        """查询耗时的中位数（毫秒），先预热一次"""
+        statement = case.statement(Session(bind=connection), self.query_builder)
+        connection.execute(statement).all()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            connection.execute(statement).all()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def candidate_for(self, connection, case: QueryCase) -> Optional[IndexCandidate]:
+        """由查询的过滤、排序和 LIMIT 推出候选索引"""
+        statement = case.statement(Session(bind=connection), self.query_builder)
+        table = case.model.__table__
+        conditions = self._conditions(statement, table)
+        flag_conditions = set()
+        for name, value in case.kwargs.items():
+            if isinstance(value, bool):
+                flag = QueryCase(case.method, case.model, {name: value})
+                flag_conditions |= set(self._conditions(
+                    flag.statement(Session(bind=connection), self.query_builder), table
+                ))
+
+        equality = [c for c, op, _ in conditions if op == '=']
+        ranges = [c for c, op, _ in conditions if op != '=']
+        order = [c for c in case.order_columns if c not in equality]
+        covering = ()
+        if case.limited:
+            columns = list(dict.fromkeys(equality + order + ranges))
+        else:
+            # 覆盖索引中范围列和其余列都在索引内判断，键只需等值列和排序列
+            columns = list(dict.fromkeys(equality + order)) or ranges[:1]
+            covering = [c.name for c in table.columns if not c.primary_key]
+        if not columns:
+            return None
+        where = ' AND '.join(
+            f"{column} {op} {literal}" for column, op, literal in sorted(flag_conditions)
+        ) or None
+        return IndexCandidate(table.name, columns, covering, where)
+
+    def advise(self, apply: bool = False, measure: bool = True, repeat: int = 5) -> Dict[str, Any]:
+        """
+        检查全部查询并评估候选索引
+
+        Returns:
+            {'cases': [{'name', 'before', 'after', 'issues_before', 'issues_after',
+            'ms_before', 'ms_after'}], 'indexes': [新建或建议的 CREATE INDEX 语句]}
+        """
+        cases = self.cases()
+        with self.engine.connect() as connection:
+            results = []
+            limited = [case.limited for case in cases]
+            for case, is_limited in zip(cases, limited):
+                plan = self.explain(connection, case)
+                results.append({
+                    'name': case.name,
+                    'before': plan,
+                    'issues_before': self.plan_issues(plan, is_limited),
+                    'ms_before': self.measure(connection, case, repeat) if measure else None
+                })
+
+            candidates: List[IndexCandidate] = []
+            for case, result in zip(cases, results):
+                if result['issues_before']:
+                    candidate = self.candidate_for(connection, case)
+                    if candidate is not None:
+                        candidates.append(candidate)
+            candidates = self._deduplicate(candidates)
+
+            existing = self._index_names(connection)
+            created = [c for c in candidates if c.name not in existing]
+            for candidate in created:
+                connection.exec_driver_sql(candidate.create_sql())
+
+            used = set()
+            for case, result, is_limited in zip(cases, results, limited):
+                plan = self.explain(connection, case)
+                used.update(c.name for c in created if any(f"INDEX {c.name}" in d for d in plan))
+                result.update({
+                    'after': plan,
+                    'issues_after': self.plan_issues(plan, is_limited),
+                    'ms_after': self.measure(connection, case, repeat) if measure else None
+                })
+
+            kept = [c for c in created if c.name in used]
+            for candidate in created:
+                if not apply or candidate not in kept:
+                    connection.exec_driver_sql(candidate.drop_sql())
+            connection.commit()
+
+        for result in results:
+            if result['issues_after']:
+                logger.warning(f"{result['name']}: {', '.join(result['issues_after'])}")
+        logger.info(
+            f"Index advisor checked {len(cases)} queries, "
+            f"{'created' if apply else 'suggested'} {len(kept)} indexes"
+        )
+        return {'cases': results, 'indexes': [c.create_sql() for c in kept]}
+
+    def _compile(self, connection, case: QueryCase):
+        statement = case.statement(Session(bind=connection), self.query_builder)
+        return statement.compile(
+            dialect=connection.dialect,
+            compile_kwargs={'render_postcompile': True}
+        )
+
+    @staticmethod
+    def _conditions(statement, table) -> List[Tuple[str, str, str]]:
+        """WHERE 中 列 比较 值 形式的条件：(列名, 运算符, 值的 SQL 字面量)"""
+        if statement.whereclause is None:
+            return []
+        conditions = []
+        for element in visitors.iterate(statement.whereclause):
+            if not isinstance(element, BinaryExpression) or element.operator not in _OPERATORS:
+                continue
+            column = element.left
+            if getattr(column, 'table', None) is not table:
+                continue
+            literal = element.right.compile(compile_kwargs={'literal_binds': True})
+            conditions.append((column.name, _OPERATORS[element.operator], str(literal)))
+        return conditions
+
+    @staticmethod
+    def _deduplicate(candidates: List[IndexCandidate]) -> List[IndexCandidate]:
+        """去掉重复和被其他候选索引覆盖的候选，并保证名称唯一"""
+        unique = list({c.definition: c for c in candidates}.values())
+        kept = [
+            c for c in unique
+            if not any(other is not c and other.covers(c) for other in unique)
+        ]
+        names: Dict[str, int] = {}
+        for candidate in kept:
+            names[candidate.name] = names.get(candidate.name, 0) + 1
+            if names[candidate.name] > 1:
+                candidate.name = f"{candidate.name}_{names[candidate.name]}"
+        return kept
+
+    @staticmethod
+    def _index_names(connection) -> set:
+        return set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ).scalars())
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """文本格式的报告"""
+    lines = []
+    for result in report['cases']:
+        timing = ''
+        if result['ms_before'] is not None:
+            timing = f" {result['ms_before']:.2f} ms -> {result['ms_after']:.2f} ms"
+        issues = ', '.join(result['issues_before']) or 'ok'
+        remaining = ', '.join(result['issues_after']) or 'ok'
+        lines.append(f"{result['name']}: {issues} -> {remaining}{timing}")
+        for detail in result['after']:
+            lines.append(f"    {detail}")
+    lines.append('')
+    lines.extend(f"{sql};" for sql in report['indexes'])
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='EXPLAIN QUERY PLAN index advisor')
+    parser.add_argument('db_url', nargs='?', default='sqlite:///data/github_trending.db')
+    parser.add_argument('--apply', action='store_true', help='keep the created indexes')
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs per query')
+    args = parser.parse_args(argv)
+
+    advisor = IndexAdvisor(create_engine(args.db_url))
+    print(format_report(advisor.advise(apply=args.apply, repeat=args.repeat)))
+
+
+if __name__ == '__main__':
+    main()
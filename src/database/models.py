@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -31,6 +31,12 @@ class Repository(Base):
     # 联合唯一约束
     __table_args__ = (
         UniqueConstraint('name', 'crawled_at', name='uix_repo_name_crawled'),
+        # 以下索引与 data/sql/indexes/repositories_indexes.sql 同名
+        # 按天刷新汇总表时按范围读取
+        Index('idx_crawled_at', 'crawled_at'),
+        # QueryBuilder.trending_repositories 沿索引排序，见 index_advisor
+        Index('idx_activity_score', 'activity_score'),
+        Index('idx_lang_activity', 'language', 'activity_score'),
     )
 
     def __repr__(self):
@@ -57,6 +63,8 @@ class TrendingHistory(Base):
     # 联合唯一约束
     __table_args__ = (
         UniqueConstraint('repository_name', 'date', name='uix_repo_date'),
+        # 与 data/sql/indexes/trending_history_indexes.sql 同名，按日期范围读取前一天的历史
+        Index('idx_trending_history_date', 'date'),
     )
 
     def __repr__(self):
@@ -77,6 +85,14 @@ class LanguageStats(Base):
 
     __table_args__ = (
         UniqueConstraint('language', 'date', name='uix_lang_date'),
+        # 与 data/sql/indexes/language_stats_indexes.sql 同名
+        Index('idx_language_stats_date', 'date'),
+        # QueryBuilder.language_statistics 的覆盖索引：按 (活跃度, id) 排序且过滤不回表
+        Index(
+            'idx_language_stats_activity_covering',
+            'average_activity_score', 'id', 'language', 'repository_count',
+            'total_stars', 'total_forks', 'date'
+        ),
     )
 
     def __repr__(self):
@@ -102,7 +118,49 @@ class ActivityChanges(Base):
     __table_args__ = (
         UniqueConstraint('repository_name', 'start_date', 'end_date', 
                         name='uix_repo_date_range'),
+        # 与 data/sql/indexes/activity_changes_indexes.sql 同名，
+        # QueryBuilder.activity_changes 的覆盖索引，positive_only 使用部分索引
+        Index(
+            'idx_activity_change_covering',
+            'activity_change', 'id', 'repository_name', 'stars_change', 'forks_change',
+            'issues_change', 'start_date', 'end_date'
+        ),
+        Index(
+            'idx_activity_change_positive',
+            'activity_change', 'id', 'repository_name', 'stars_change', 'forks_change',
+            'issues_change', 'start_date', 'end_date',
+            sqlite_where=text('activity_change > 0'),
+            postgresql_where=text('activity_change > 0')
+        ),
     )
 
     def __repr__(self):
-        return f"<ActivityChanges(repo='{self.repository_name}', change='{self.activity_change}')>"
\ No newline at end of file
+        return f"<ActivityChanges(repo='{self.repository_name}', change='{self.activity_change}')>"
+
+
+class RepositoryDailyDelta(Base):
+    """仓库每日变化汇总模型（recent_trending_repos 视图的物化版本）"""
+    __tablename__ = 'repository_daily_deltas'
+
+    id = Column(Integer, primary_key=True)
+    repository_name = Column(String, nullable=False)
+    date = Column(DateTime, nullable=False)
+    language = Column(String)
+    activity_score = Column(Float, default=0.0)
+    stars = Column(Integer, default=0)
+    forks = Column(Integer, default=0)
+    open_issues = Column(Integer, default=0)
+    # 上一次被爬取的日期及相对它的变化，首次出现时为空
+    previous_date = Column(DateTime)
+    score_change = Column(Float)
+    stars_change = Column(Integer)
+    forks_change = Column(Integer)
+    issues_change = Column(Integer)
+
+    __table_args__ = (
+        UniqueConstraint('repository_name', 'date', name='uix_delta_repo_date'),
+        Index('idx_daily_deltas_date_activity', 'date', 'activity_score'),
+    )
+
+    def __repr__(self):
+        return f"<RepositoryDailyDelta(repo='{self.repository_name}', date='{self.date}')>"
\ No newline at end of file
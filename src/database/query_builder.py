@@ -1,53 +1,109 @@
-from typing import List, Optional, Any
-from sqlalchemy import and_, or_, desc
+from datetime import datetime
+from typing import Optional, Any, Sequence, Tuple
+from sqlalchemy import desc, tuple_
 from sqlalchemy.orm import Query
-from .models import Repository, TrendingHistory, LanguageStats, ActivityChanges
+from .models import Repository, LanguageStats, ActivityChanges
 
 class QueryBuilder:
     """SQL 查询构建器"""
-    
+
+    # 各查询的排序键（均为降序），id 保证顺序唯一，可用于 keyset 分页
+    TRENDING_KEY = (Repository.activity_score, Repository.id)
+    LANGUAGE_KEY = (LanguageStats.average_activity_score, LanguageStats.id)
+    ACTIVITY_KEY = (ActivityChanges.activity_change, ActivityChanges.id)
+
+    @staticmethod
+    def keyset(row: Any, key: Sequence) -> Tuple:
+        """取一行（ORM 对象或字典）的排序键值，作为下一页的 after"""
+        if isinstance(row, dict):
+            return tuple(row[column.key] for column in key)
+        return tuple(getattr(row, column.key) for column in key)
+
+    @staticmethod
+    def seek(query: Query, key: Sequence, after: Optional[Sequence] = None) -> Query:
+        """
+        按降序排序键排序，after 指定时只取排在 after 之后的行
+
+        用行值比较 (a, id) < (?, ?)，可直接沿索引定位，不需要 OFFSET 扫描。
+        第一列为 NULL 的行显式排在最后（PostgreSQL 的 DESC 默认把 NULL 排在最前），
+        其余列须非空。行值比较对 NULL 不成立，所以非 NULL 的 after 只取到
+        非 NULL 行的末尾，之后的 NULL 行用 null_start(after) 继续取；
+        第一列为 NULL 的 after 在 NULL 行中按其余列继续
+        """
+        first, rest = key[0], key[1:]
+        if after is not None:
+            if after[0] is None:
+                query = query.filter(first.is_(None))
+                if after[1] is not None:
+                    query = query.filter(tuple_(*rest) < tuple_(*after[1:]))
+            else:
+                query = query.filter(tuple_(*key) < tuple_(*after))
+        return query.order_by(desc(first).nulls_last(), *(desc(column) for column in rest))
+
+    @staticmethod
+    def null_start(after: Optional[Sequence]) -> Optional[Tuple]:
+        """
+        非 NULL 的 after 之后，NULL 行开头的位置（交给 seek 的 after）
+
+        after 为空或已在 NULL 行中时没有单独的 NULL 段，返回 None
+        """
+        if after is None or after[0] is None:
+            return None
+        return (None,) * len(after)
+
     @staticmethod
     def trending_repositories(
         query: Query,
         language: Optional[str] = None,
         min_stars: Optional[int] = None,
         min_activity: Optional[float] = None,
-        limit: int = 20
+        limit: Optional[int] = 20,
+        after: Optional[Tuple[float, int]] = None
     ) -> Query:
-        """构建趋势仓库查询"""
+        """构建趋势仓库查询，after 为上一页最后一行的 (activity_score, id)"""
         if language:
             query = query.filter(Repository.language == language)
         if min_stars:
             query = query.filter(Repository.stars >= min_stars)
         if min_activity:
             query = query.filter(Repository.activity_score >= min_activity)
-            
-        return query.order_by(desc(Repository.activity_score)).limit(limit)
+
+        query = QueryBuilder.seek(query, QueryBuilder.TRENDING_KEY, after)
+        return query.limit(limit) if limit else query
 
     @staticmethod
     def language_statistics(
         query: Query,
         min_repos: Optional[int] = None,
-        min_stars: Optional[int] = None
+        min_stars: Optional[int] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None
     ) -> Query:
-        """构建语言统计查询"""
+        """构建语言统计查询，after 为上一页最后一行的 (average_activity_score, id)"""
+        if since:
+            query = query.filter(LanguageStats.date >= since)
         if min_repos:
             query = query.filter(LanguageStats.repository_count >= min_repos)
         if min_stars:
             query = query.filter(LanguageStats.total_stars >= min_stars)
-            
-        return query.order_by(desc(LanguageStats.average_activity_score))
+
+        query = QueryBuilder.seek(query, QueryBuilder.LANGUAGE_KEY, after)
+        return query.limit(limit) if limit else query
 
     @staticmethod
     def activity_changes(
         query: Query,
         min_change: Optional[float] = None,
-        positive_only: bool = False
+        positive_only: bool = False,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[float, int]] = None
     ) -> Query:
-        """构建活跃度变化查询"""
+        """构建活跃度变化查询，after 为上一页最后一行的 (activity_change, id)"""
         if min_change:
             query = query.filter(ActivityChanges.activity_change >= min_change)
         if positive_only:
             query = query.filter(ActivityChanges.activity_change > 0)
-            
-        return query.order_by(desc(ActivityChanges.activity_change))
\ No newline at end of file
+
+        query = QueryBuilder.seek(query, QueryBuilder.ACTIVITY_KEY, after)
+        return query.limit(limit) if limit else query
@@ -12,12 +12,20 @@ from .exceptions import (
     NotificationException,
     ConfigurationException
 )
-from .helpers import (
+from .helper import (
     format_number,
     parse_date,
     validate_language,
     rate_limit_decorator
 )
+from .rate_limiter import (
+    RateLimiter,
+    LocalState,
+    FileState,
+    RedisState,
+    rate_limit,
+    configure_limiter
+)
 
 __all__ = [
     'setup_logging',
@@ -29,4 +37,10 @@ __all__ = [
     'parse_date',
     'validate_language',
     'rate_limit_decorator',
+    'RateLimiter',
+    'LocalState',
+    'FileState',
+    'RedisState',
+    'rate_limit',
+    'configure_limiter',
 ]
\ No newline at end of file
@@ -2,10 +2,11 @@
 Helper functions for the GitHub Trending Tracker.
 """
 
-import time
+import os
 from datetime import datetime
-from functools import wraps
-from typing import Union, Callable, Any
+from typing import Union, Callable
+
+from .rate_limiter import RateLimiter
 
 def format_number(num: Union[int, float]) -> str:
     """Format large numbers for display."""
@@ -39,38 +40,18 @@ def rate_limit_decorator(
 ) -> Callable:
     """
     Rate limiting decorator.
+
+    Each decorated function gets its own thread-safe GCRA limiter; use
+    ``rate_limiter.rate_limit`` to share a budget between functions.
     
     Args:
         calls (int): Number of calls allowed
         period (float): Time period in seconds
     """
     def decorator(func: Callable) -> Callable:
-        last_reset = time.time()
-        calls_made = 0
-
-        @wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            nonlocal last_reset, calls_made
-            
-            now = time.time()
-            elapsed = now - last_reset
-            
-            if elapsed > period:
-                calls_made = 0
-                last_reset = now
-            
-            if calls_made >= calls:
-                sleep_time = period - elapsed
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                calls_made = 0
-                last_reset = time.time()
-            
-            calls_made += 1
-            return func(*args, **kwargs)
-            
-        return wrapper
+        return RateLimiter(calls, period)(func)
     return decorator
+
 def ensure_data_directory():
     """确保数据目录存在"""
     data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
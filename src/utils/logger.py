@@ -1,8 +1,14 @@
 # src/utils/logger.py
 import logging.config
+import os
 from config.settings import LOGGING
 
 def setup_logging():
     """配置日志系统"""
+    # 文件日志所在目录不存在时 FileHandler 会报错，先创建
+    for handler in LOGGING.get('handlers', {}).values():
+        directory = os.path.dirname(handler.get('filename', ''))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
     logging.config.dictConfig(LOGGING)
-    return logging.getLogger(__name__)
\ No newline at end of file
+    return logging.getLogger(__name__)
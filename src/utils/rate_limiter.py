@@ -0,0 +1,191 @@
+"""
+Rate limiting for the GitHub Trending Tracker.
+
+Implements GCRA (generic cell rate algorithm), the continuous form of a
+token bucket: ``calls`` requests may burst, after which one request is
+admitted every ``period / calls`` seconds. Each caller reserves its slot
+under a lock and then sleeps exactly until that slot, so waiters are
+served in order without polling.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class LocalState:
+    """In-process state, shared by all threads of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tat: Optional[float] = None
+
+    def reserve(self, now: float, interval: float, tolerance: float) -> float:
+        with self._lock:
+            tat = max(self._tat if self._tat is not None else now, now)
+            self._tat = tat + interval
+        return max(0.0, tat - tolerance - now)
+
+
+class FileState:
+    """State kept in a file guarded by flock, shared by processes on one host."""
+
+    def __init__(self, path: str):
+        if fcntl is None:
+            raise RuntimeError("FileState requires fcntl (POSIX only)")
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def reserve(self, now: float, interval: float, tolerance: float) -> float:
+        with open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read().strip()
+                tat = max(float(content) if content else now, now)
+                f.seek(0)
+                f.truncate()
+                f.write(repr(tat + interval))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return max(0.0, tat - tolerance - now)
+
+
+class RedisState:
+    """State kept in Redis, shared by processes on any host."""
+
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local interval = tonumber(ARGV[2])
+    local tolerance = tonumber(ARGV[3])
+    local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+    if tat < now then tat = now end
+    local ttl = math.ceil((tat + interval - now) * 1000) + 1000
+    redis.call('SET', KEYS[1], tostring(tat + interval), 'PX', ttl)
+    local wait = tat - tolerance - now
+    if wait < 0 then wait = 0 end
+    return tostring(wait)
+    """
+
+    def __init__(self, client, key: str = 'rate_limit:github'):
+        self.key = key
+        self._script = client.register_script(self.SCRIPT)
+
+    def reserve(self, now: float, interval: float, tolerance: float) -> float:
+        return float(self._script(keys=[self.key], args=[now, interval, tolerance]))
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter, usable from threads, asyncio and (with a shared
+    state backend) multiple processes.
+
+    Args:
+        calls (int): Number of calls allowed per period (burst size)
+        period (float): Time period in seconds
+        state: LocalState (default), FileState or RedisState
+        clock (callable): Returns the current time in seconds; must be
+            wall-clock time when the state is shared between processes
+        sleep (callable): Blocking sleep used by ``acquire``
+    """
+
+    def __init__(
+        self,
+        calls: int = 30,
+        period: float = 60.0,
+        state=None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        if calls <= 0 or period <= 0:
+            raise ValueError("calls and period must be positive")
+        self.calls = calls
+        self.period = period
+        self.interval = period / calls
+        self.tolerance = self.interval * (calls - 1)
+        self.state = state or LocalState()
+        self.clock = clock
+        self.sleep = sleep
+
+    def reserve(self) -> float:
+        """Reserve the next slot and return how long to wait for it."""
+        return self.state.reserve(self.clock(), self.interval, self.tolerance)
+
+    def acquire(self) -> float:
+        """Block until a call is allowed; returns the time waited."""
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Asyncio variant of ``acquire`` that does not block the loop."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def __call__(self, func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                await self.acquire_async()
+                return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self.acquire()
+            return func(*args, **kwargs)
+        return wrapper
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, calls: int = 30, period: float = 60.0) -> RateLimiter:
+    """Return the process-wide limiter registered under ``name``."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(calls, period)
+        return _limiters[name]
+
+
+def configure_limiter(name: str, limiter: RateLimiter) -> None:
+    """
+    Replace a named limiter, e.g. with one backed by FileState or
+    RedisState so that several worker processes share one budget.
+    """
+    with _limiters_lock:
+        _limiters[name] = limiter
+
+
+def rate_limit(calls: int = 30, period: float = 60.0, name: str = 'default') -> Callable:
+    """
+    Rate limiting decorator backed by the named shared limiter.
+
+    Every function and instance decorated with the same ``name`` draws
+    from the same budget. The limiter is looked up on each call, so
+    ``configure_limiter`` also affects functions decorated earlier.
+    """
+    get_limiter(name, calls, period)
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            get_limiter(name, calls, period).acquire()
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,69 @@
+import random
+from datetime import datetime
+
+import pytest
+from src.database.db_manager import DatabaseManager
+
+CRAWLED_AT = datetime(2024, 10, 24, 13, 0, 0)
+FIXTURE = 'tests/fixtures/trending_page.html'
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """临时目录中已建表的 SQLite 数据库"""
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'test.db'}")
+    manager.init_database()
+    return manager
+
+
+class FakeClock:
+    """假时钟：sleep 只推进时间，不真正等待"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_repos(count, crawled_at=CRAWLED_AT, seed=0):
+    """爬虫输出格式的仓库数据，同一 seed 生成相同的数据"""
+    rng = random.Random(seed)
+    return [
+        {
+            'name': f'owner{i}/repo{i}',
+            'url': f'https://github.com/owner{i}/repo{i}',
+            'description': f'Repository {i}',
+            'language': rng.choice(['Python', 'Go', 'Rust', None]),
+            'stars': rng.randint(0, 20000),
+            'forks': rng.randint(0, 8000),
+            'open_issues': rng.randint(0, 1500),
+            'watchers': rng.randint(0, 20000),
+            'contributors_count': rng.randint(0, 150),
+            'recent_commits': rng.randint(0, 1500),
+            'today_stars': rng.randint(0, 500),
+            'crawled_at': crawled_at.isoformat()
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(scope="session")
+def trending_html():
+    """录制的 trending 页面"""
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def strip_timestamps(repositories):
+    return [{k: v for k, v in repo.items() if k != 'crawled_at'} for repo in repositories]
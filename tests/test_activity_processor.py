@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from src.core.base import DataContainer
+from src.processors.activity import ActivityProcessor
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', 'C++', 'Ruby', 'Haskell', '', None]
+DESCRIPTIONS = [
+    None,
+    '',
+    'short',
+    'A small but useful command line tool',
+    'A production ready web framework for building APIs with batteries included',
+]
+
+
+def make_repos(count, seed=0):
+    rng = random.Random(seed)
+    repos = []
+    for i in range(count):
+        repos.append({
+            'name': f'owner/repo-{i}',
+            'stars': rng.choice([0, 1, 9999, 10000, 123456, rng.randint(0, 20000)]),
+            'forks': rng.choice([0, 4999, 5000, rng.randint(0, 8000)]),
+            'today_stars': rng.choice([0, 999, 1000, rng.randint(0, 1500)]),
+            'language': rng.choice(LANGUAGES),
+            'description': rng.choice(DESCRIPTIONS),
+        })
+    return repos
+
+
+@pytest.fixture
+def processor():
+    return ActivityProcessor()
+
+
+def test_batch_matches_scalar(processor):
+    repos = make_repos(5000)
+    batch = processor.score_batch(repos)
+    scores = processor._as_list(batch['scores'])
+    metrics = {k: processor._as_list(v) for k, v in batch['metrics'].items()}
+
+    for i, repo in enumerate(repos):
+        expected = processor.transform(DataContainer(repo)).data
+        assert scores[i] == expected['activity_score']
+        assert {k: v[i] for k, v in metrics.items()} == expected['metrics']
+
+
+def test_process_uses_batch_scores(processor):
+    repos = make_repos(50, seed=1)
+    result = processor.process(DataContainer(repos, {'language': 'python'}))
+
+    assert result.metadata['language'] == 'python'
+    assert [r['activity_score'] for r in result.data] == [
+        processor._calculate_activity_score(repo) for repo in repos
+    ]
+    assert all(type(r['activity_score']) is float for r in result.data)
+
+
+def test_score_batch_empty(processor):
+    batch = processor.score_batch([])
+    assert len(batch['scores']) == 0
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('count', [100, 10_000, 100_000, 1_000_000])
+def test_score_batch_benchmark(processor, count):
+    repos = make_repos(count, seed=2)
+
+    scores = processor._as_list(processor.score_batch(repos)['scores'])
+
+    scalar_repos = repos[:100_000]
+    scalar = [processor._calculate_activity_score(repo) for repo in scalar_repos]
+    assert scores[:len(scalar)] == scalar
@@ -0,0 +1,33 @@
+from src.core.base import DataContainer
+from src.crawler.archive import ResponseArchive, replay
+
+
+def test_archive_deduplicates_identical_pages(trending_html, tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    first = archive.store(trending_html, 'python', 'daily', '2024-10-24T10:00:00')
+    second = archive.store(trending_html, 'python', 'daily', '2024-10-24T11:00:00')
+    archive.store(trending_html + '<!-- changed -->', 'go', 'daily', '2024-10-24T11:00:00')
+
+    assert first == second
+    assert len(list((tmp_path / 'objects').rglob('*.gz'))) == 2
+    assert [e['timestamp'] for e in archive.entries(language='python')] == [
+        '2024-10-24T10:00:00',
+        '2024-10-24T11:00:00'
+    ]
+    assert archive.load(first) == trending_html
+
+
+def test_replay_runs_parser_and_processors(trending_html, tmp_path):
+    class CountingProcessor:
+        def process(self, data):
+            return DataContainer(len(data.data), data.metadata)
+
+    archive = ResponseArchive(str(tmp_path))
+    archive.store(trending_html, 'python', 'daily', '2024-10-24T10:00:00')
+    archive.store(trending_html, 'go', 'weekly', '2024-10-24T10:00:00')
+
+    results = list(replay(archive, processors=[CountingProcessor()], since='weekly'))
+    assert len(results) == 1
+    assert results[0].data == 10
+    assert results[0].metadata['language'] == 'go'
+    assert results[0].metadata['replayed'] is True
@@ -0,0 +1,36 @@
+import pytest
+from src.crawler.batch import iter_archive_pages, parse_pages
+from src.crawler.github_crawler import GitHubCrawler
+from tests.conftest import strip_timestamps
+
+
+def _archive(trending_html, count):
+    """为每个页面改写仓库名，便于校验顺序"""
+    return [trending_html.replace('href="/microsoft/markitdown"', f'href="/page/{i}"')
+            for i in range(count)]
+
+
+def test_parse_pages_preserves_order(trending_html):
+    pages = _archive(trending_html, 12)
+    results = list(parse_pages(iter(pages), workers=2, chunksize=5))
+
+    assert [r.data[0]['name'] for r in results] == [f'page/{i}' for i in range(12)]
+    expected = GitHubCrawler().parse(pages[3]).data
+    assert strip_timestamps(results[3].data) == strip_timestamps(expected)
+
+
+def test_parse_pages_reads_paths(trending_html, tmp_path):
+    for i, page in enumerate(_archive(trending_html, 3)):
+        (tmp_path / f'{i:04d}.html').write_text(page, encoding='utf-8')
+
+    results = list(parse_pages(iter_archive_pages(str(tmp_path)), workers=2))
+    assert [r.metadata['source'] for r in results] == [
+        str(tmp_path / f'{i:04d}.html') for i in range(3)
+    ]
+
+
+@pytest.mark.slow
+def test_parse_pages_throughput(trending_html):
+    pages = _archive(trending_html, 400)
+    for workers in (1, 2, 4):
+        assert sum(1 for _ in parse_pages(iter(pages), workers=workers)) == len(pages)
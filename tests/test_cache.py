@@ -0,0 +1,709 @@
+import fnmatch
+import os
+import pickle
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+
+from sqlalchemy import event
+
+from src.database.cache import CacheManager, LocalCache, _MISSING
+from src.database.codec import Codec, digest, msgpack, snapshot, zstandard
+from src.database.db_manager import DatabaseManager
+from src.database.models import Repository
+from tests.conftest import make_repos
+
+
+def _text(key):
+    return key.decode() if isinstance(key, bytes) else key
+
+
+class FakeRedis:
+    """测试用的内存 Redis，只实现 CacheManager 用到的命令"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self.lock = threading.RLock()
+
+    def _alive(self, key):
+        key = _text(key)
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= self.clock():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def get(self, key):
+        with self.lock:
+            self.commands.append('GET')
+            return self.data[_text(key)] if self._alive(key) else None
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        with self.lock:
+            self.commands.append('SET')
+            key = _text(key)
+            if nx and self._alive(key):
+                return None
+            self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+            self.expires.pop(key, None)
+            if ex is not None:
+                seconds = ex.total_seconds() if hasattr(ex, 'total_seconds') else ex
+                self.expires[key] = self.clock() + seconds
+            if px is not None:
+                self.expires[key] = self.clock() + px / 1000
+            return True
+
+    def setex(self, key, ttl, value):
+        return self.set(key, value, ex=ttl)
+
+    def pttl(self, key):
+        with self.lock:
+            self.commands.append('PTTL')
+            key = _text(key)
+            if not self._alive(key):
+                return -2
+            if key not in self.expires:
+                return -1
+            return int((self.expires[key] - self.clock()) * 1000)
+
+    def incr(self, key):
+        with self.lock:
+            self.commands.append('INCR')
+            key = _text(key)
+            value = int(self.data[key]) + 1 if self._alive(key) else 1
+            self.data[key] = str(value).encode()
+            return value
+
+    def delete(self, *keys):
+        with self.lock:
+            self.commands.append('DEL')
+            return sum(1 for key in keys if self.data.pop(_text(key), None) is not None)
+
+    unlink = delete
+
+    def scan_iter(self, match='*', count=None):
+        with self.lock:
+            self.commands.append('SCAN')
+            keys = [key for key in list(self.data) if self._alive(key)]
+        for key in keys:
+            if fnmatch.fnmatchcase(key, match):
+                yield key.encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        # 只有 CacheManager.RELEASE_SCRIPT 一个脚本：令牌一致时删除锁
+        assert "redis.call('del', KEYS[1])" in script
+
+        def release(keys=(), args=(), client=None):
+            with self.lock:
+                self.commands.append('EVALSHA')
+                key = _text(keys[0])
+                if self._alive(key) and self.data[key] == str(args[0]).encode():
+                    del self.data[key]
+                    self.expires.pop(key, None)
+                    return 1
+                return 0
+        return release
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self.calls = self.calls, []
+        with self.redis.lock:
+            return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.calls = []
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+def make_cache(redis_client, **kwargs):
+    options = {'local_capacity': 8, 'local_ttl': 60, 'capacities': {}}
+    options.update(kwargs)
+    return CacheManager(redis_client=redis_client, **options)
+
+
+def test_local_cache_lru_ttl_and_per_prefix_capacity():
+    clock = Clock()
+    local = LocalCache(capacity=2, capacities={'big': 3, 'off': 0}, clock=clock)
+    for i in range(4):
+        local.set('small', f'k{i}', i, ttl=10)
+        local.set('big', f'k{i}', i, ttl=10)
+        local.set('off', f'k{i}', i, ttl=10)
+    assert len(local) == 2 + 3
+
+    assert local.get('big', 'k1') == 1
+    local.set('big', 'k4', 4, ttl=10)
+    assert local.get('big', 'k1') == 1             # 最近用过，保留
+    assert local.get('big', 'k2') is _MISSING      # 最久未用，被淘汰
+    assert local.get('off', 'k3') is _MISSING
+
+    clock.now += 11
+    assert local.get('small', 'k3') is _MISSING
+    local.clear('big')
+    assert local.get('big', 'k4') is _MISSING
+
+
+def test_two_tiers_hit_promote_and_count(fake_redis):
+    calls = []
+
+    first = make_cache(fake_redis)
+    second = make_cache(fake_redis)
+
+    def load(name):
+        calls.append(name)
+        return {'name': name}
+
+    cached_first = first.cache(prefix='trending', expire=300)(load)
+    cached_second = second.cache(prefix='trending', expire=300)(load)
+
+    assert cached_first('a') == {'name': 'a'}
+    assert cached_first('a') == {'name': 'a'}
+    assert calls == ['a']
+    assert first.stats()['local'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert first.stats()['redis']['misses'] == 1
+
+    # 另一个进程从 Redis 命中并提升到本地，之后不再访问 Redis
+    assert cached_second('a') == {'name': 'a'}
+    gets = fake_redis.commands.count('GET')
+    assert cached_second('a') == {'name': 'a'}
+    assert fake_redis.commands.count('GET') == gets
+    assert calls == ['a']
+    assert second.stats()['redis'] == {'hits': 1, 'misses': 0, 'hit_rate': 1.0}
+    assert second.stats()['local']['hits'] == 1
+
+
+def test_promoted_entries_do_not_outlive_redis_ttl(fake_redis):
+    clock = Clock()
+    fake_redis.clock = clock
+    cache = make_cache(fake_redis, local_ttl=60)
+    cache.local.clock = clock
+    fake_redis.setex('trending:load:1', 5, cache._pack('old', time.time() + 300, 0.0))
+
+    assert cache._get('trending', 'trending:load:1')[0] == 'old'
+    clock.now += 6
+    assert cache._get('trending', 'trending:load:1') is _MISSING
+
+
+def test_invalidate_clears_both_tiers_and_discards_inflight_results(fake_redis):
+    cache = make_cache(fake_redis)
+    values = iter([1, 2, 3])
+
+    @cache.cache(prefix='lang_stats', expire=300)
+    def load():
+        value = next(values)
+        if value == 2:
+            # 计算期间发生失效，这次的结果不能写回缓存
+            cache.invalidate('lang_stats')
+        return value
+
+    assert load() == 1
+    cache.invalidate('lang_stats')
+    assert load() == 2
+    assert load() == 3
+    assert load() == 3
+
+
+def test_invalidate_is_a_single_incr(fake_redis):
+    writer = make_cache(fake_redis)
+    reader = make_cache(fake_redis, generation_ttl=0)
+    values = iter(range(100))
+    load = writer.cache(prefix='trending', expire=300)(lambda name: next(values))
+    read = reader.cache(prefix='trending', expire=300)(lambda name: next(values))
+
+    for name in 'abcde':
+        load(name)
+    assert read('a') == 0
+
+    fake_redis.commands.clear()
+    writer.invalidate('trending')
+    assert fake_redis.commands == ['INCR']
+
+    # 其他进程在 generation_ttl 之后看到新的代数
+    assert read('a') == 5
+    assert load('a') == 5
+    assert writer.generation('trending') == reader.generation('trending') == 1
+
+
+def test_generation_is_cached_locally(fake_redis):
+    cache = make_cache(fake_redis, generation_ttl=60)
+    load = cache.cache(prefix='activity', expire=300)(lambda: 'value')
+    load()
+    fake_redis.commands.clear()
+    for _ in range(10):
+        load()
+    assert fake_redis.commands == []
+
+
+def test_background_purge_unlinks_only_old_generations(fake_redis):
+    cache = make_cache(fake_redis)
+    load = cache.cache(prefix='trending', expire=300)(lambda i: i)
+    other = cache.cache(prefix='lang_stats', expire=300)(lambda i: i)
+    for i in range(7):
+        load(i)
+        other(i)
+    thread = cache.invalidate('trending', purge=True)
+    for i in range(3):
+        load(i)
+    thread.join(5)
+    assert not thread.is_alive()
+
+    cache.purge('trending', batch_size=2)
+    keys = [k for k in fake_redis.data if k.startswith('trending:')]
+    assert len(keys) == 3 and all(k.startswith('trending:g1:') for k in keys)
+    assert len([k for k in fake_redis.data if k.startswith('lang_stats:')]) == 7
+
+    cache.invalidate('trending')
+    assert cache.purge('trending') == 3
+    assert fake_redis.data['cache:generation:trending'] == b'2'
+
+
+def test_keys_are_stable_across_processes_and_ignore_self(fake_redis):
+    parts = ('name', ('Python', 100), {'limit': 20, 'after': (1.5, 3), 'since': datetime(2024, 3, 1)})
+    # 直接按路径加载 codec，子进程不需要导入整个包
+    script = (
+        "import importlib.util, sys; from datetime import datetime; "
+        "spec = importlib.util.spec_from_file_location('codec', sys.argv[1]); "
+        "codec = importlib.util.module_from_spec(spec); spec.loader.exec_module(codec); "
+        "print(codec.digest('name', ('Python', 100), "
+        "{'since': datetime(2024, 3, 1), 'after': (1.5, 3), 'limit': 20}))"
+    )
+    path = os.path.join(os.path.dirname(__file__), '..', 'src', 'database', 'codec.py')
+    seen = {digest(*parts)}
+    for seed in ('1', '2'):
+        output = subprocess.run(
+            [sys.executable, '-c', script, path], capture_output=True, text=True, check=True,
+            env=dict(os.environ, PYTHONHASHSEED=seed)
+        )
+        seen.add(output.stdout.strip())
+    assert len(seen) == 1
+    # 字符串与同值的 datetime、列表与元组不会得到相同的键
+    assert digest('2024-03-01T00:00:00') != digest(datetime(2024, 3, 1))
+    assert digest([1, 2]) != digest((1, 2))
+    with pytest.raises(TypeError):
+        digest(object())
+
+    calls = []
+
+    class Reports:
+        def __init__(self, cache):
+            self.cache = cache
+
+        def top(self, language, limit=10):
+            calls.append((language, limit))
+            return [language] * limit
+
+    cache = make_cache(fake_redis)
+    Reports.top = cache.cache(prefix='trending', expire=300)(Reports.top)
+    assert Reports(cache).top('Go', limit=2) == ['Go', 'Go']
+    assert Reports(make_cache(fake_redis)).top('Go', limit=2) == ['Go', 'Go']
+    Reports(cache).top('Rust', limit=2)
+    assert calls == [('Go', 2), ('Rust', 2)]
+
+
+def repositories(count=20):
+    columns = set(Repository.__table__.columns.keys()) - {'crawled_at'}
+    return [
+        Repository(
+            id=i,
+            activity_score=i * 1.5,
+            **{key: value for key, value in repo.items() if key in columns},
+            crawled_at=datetime.fromisoformat(repo['crawled_at'])
+        )
+        for i, repo in enumerate(make_repos(count), 1)
+    ]
+
+
+def test_codec_round_trips_row_snapshots():
+    rows = snapshot(repositories())
+    assert type(rows[0]).__name__ == 'RepositoryRow'
+    assert rows[0].name == 'owner0/repo0' and rows[0].activity_score == 1.5
+    assert isinstance(rows[0].crawled_at, datetime)
+
+    values = [
+        rows,
+        tuple(rows),
+        rows[0],
+        [],
+        {'day': date(2024, 3, 1), 'keys': (1.5, 3), 'nested': [rows[1], None]},
+        'text'
+    ]
+    for codec in (Codec(format='json', compression='none'), Codec(format='json', compression='zlib')):
+        for value in values:
+            decoded = codec.loads(codec.dumps(value))
+            assert decoded == value
+            assert type(decoded) is type(value)
+        decoded = codec.loads(codec.dumps(rows))
+        assert decoded[3].crawled_at == rows[3].crawled_at
+        assert decoded[3]._fields == rows[3]._fields
+
+    # 行表只写一次列名，比逐行的字典小
+    assert len(Codec(compression='none').dumps(rows)) < len(
+        Codec(compression='none').dumps([row._asdict() for row in rows])
+    )
+    with pytest.raises(TypeError):
+        Codec().dumps(repositories(1))
+
+
+@pytest.mark.parametrize('format', ['json', 'msgpack'])
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'zstd'])
+def test_codec_round_trips_in_every_format(format, compression):
+    if format == 'msgpack' and msgpack is None:
+        pytest.skip('msgpack is not installed')
+    if compression == 'zstd' and zstandard is None:
+        pytest.skip('zstandard is not installed')
+    codec = Codec(format=format, compression=compression, compress_min_bytes=0)
+    rows = snapshot(repositories())
+    values = [
+        rows,
+        tuple(rows),
+        rows[0],
+        {'day': date(2024, 3, 1), 'at': datetime(2024, 3, 1, 9, 30), 'keys': (1.5, 3)},
+        # 与类型标记同名的键按普通字典往返
+        {'__t__': [1, 2]},
+        {'__dt__': '2024-03-01T00:00:00'},
+        {'__rows__': {'__dict__': 'x'}},
+        [None, True, 0, -1.5, 'text', '']
+    ]
+    for value in values:
+        payload = codec.dumps(value)
+        assert payload[1:2] == {'none': b'-', 'zlib': b'z', 'zstd': b'Z'}[compression]
+        decoded = codec.loads(payload)
+        assert decoded == value
+        assert type(decoded) is type(value)
+
+
+def test_cached_results_are_row_snapshots(fake_redis):
+    cache = make_cache(fake_redis)
+    load = cache.cache(prefix='trending', expire=300)(lambda: repositories(3))
+    rows = load()
+    assert [row.id for row in rows] == [1, 2, 3]
+    with pytest.raises(AttributeError):
+        rows[0].stars = 0
+
+    cache.local.clear()
+    assert load() == rows
+    assert cache.stats()['redis']['hits'] == 1
+
+
+def test_row_tables_are_smaller_than_pickled_orm_objects():
+    orm = repositories(100)
+    payload = Codec(format='json', compression='zlib').dumps(snapshot(orm))
+    assert len(payload) < len(pickle.dumps(orm)) / 2
+
+
+def wait_for_refresh(cache, timeout=5):
+    deadline = time.monotonic() + timeout
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cache._refreshing
+
+
+def run_concurrently(callers, target):
+    barrier = threading.Barrier(len(callers))
+    results = [None] * len(callers)
+
+    def run(index):
+        barrier.wait()
+        results[index] = target(callers[index])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(callers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_single_flight_within_and_across_processes(fake_redis):
+    calls = []
+    lock = threading.Lock()
+
+    def load(name):
+        with lock:
+            calls.append(name)
+        time.sleep(0.2)
+        return {'name': name, 'call': len(calls)}
+
+    # 两个 CacheManager 模拟两个进程，各有 8 个并发调用方
+    processes = [make_cache(fake_redis), make_cache(fake_redis)]
+    cached = [cache.cache(prefix='trending', expire=300)(load) for cache in processes]
+    results = run_concurrently(cached * 8, lambda fn: fn('a'))
+
+    assert calls == ['a']
+    assert results == [{'name': 'a', 'call': 1}] * 16
+    coalesced = sum(cache.stats()['refresh']['coalesced'] for cache in processes)
+    assert coalesced == 14
+    assert max(cache.stats()['refresh']['lock_waits'] for cache in processes) > 0
+    assert not [key for key in fake_redis.data if key.startswith('cache:lock:')]
+
+
+def test_single_flight_propagates_errors(fake_redis):
+    cache = make_cache(fake_redis)
+    calls = []
+
+    @cache.cache(prefix='trending', expire=300)
+    def load():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError('database is down')
+
+    def call(fn):
+        try:
+            return fn()
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_concurrently([load] * 4, call) == ['database is down'] * 4
+    assert len(calls) == 1
+    # 出错后不留下锁和进行中的计算，下次调用重新执行
+    assert call(load) == 'database is down' and len(calls) == 2
+
+
+def test_lock_release_only_deletes_own_token(fake_redis):
+    clock = Clock()
+    fake_redis.clock = clock
+    cache = make_cache(fake_redis, lock_timeout=1)
+    token = cache._acquire('trending:g0:x')
+    assert token and cache._acquire('trending:g0:x') is None
+
+    # 锁超时后被其他调用方获得，旧令牌不能删除新锁
+    clock.now += 2
+    other = cache._acquire('trending:g0:x')
+    lock_key = cache._lock_key('trending:g0:x')
+    assert cache._release_lock(keys=[lock_key], args=[token]) == 0
+    assert cache._release_lock(keys=[lock_key], args=[other]) == 1
+
+
+def test_stale_while_revalidate(fake_redis):
+    clock = Clock()
+    fake_redis.clock = clock
+    cache = make_cache(fake_redis, early_expiration_beta=0, clock=clock)
+    cache.local.clock = clock
+    values = iter(range(10))
+    gate = threading.Event()
+    gate.set()
+
+    @cache.cache(prefix='activity', expire=10, stale=30)
+    def load():
+        gate.wait(5)
+        return next(values)
+
+    assert load() == 0
+    clock.now += 11
+    # 软过期后立即返回旧值，后台只刷新一次
+    gate.clear()
+    assert [load() for _ in range(5)] == [0] * 5
+    gate.set()
+    wait_for_refresh(cache)
+    assert load() == 1
+    stats = cache.stats()['refresh']
+    assert stats['background'] == 1 and stats['stale'] >= 1
+
+    # 超过 expire + stale 后条目被删除，同步计算
+    clock.now += 41
+    assert load() == 2
+
+
+def test_stale_refresh_skips_entries_refreshed_by_another_process(fake_redis):
+    clock = Clock()
+    fake_redis.clock = clock
+    first = make_cache(fake_redis, early_expiration_beta=0, clock=clock)
+    second = make_cache(fake_redis, early_expiration_beta=0, clock=clock)
+    first.local.clock = second.local.clock = clock
+    calls = []
+
+    def load():
+        calls.append(1)
+        return len(calls)
+
+    load_first = first.cache(prefix='activity', expire=10)(load)
+    load_second = second.cache(prefix='activity', expire=10)(load)
+    assert load_first() == load_second() == 1
+
+    clock.now += 11
+    assert load_first() == 1
+    wait_for_refresh(first)
+    # second 的本地条目已软过期，从 Redis 读到 first 刷新后的值，不再计算
+    assert load_second() == 2
+    wait_for_refresh(second)
+    assert len(calls) == 2
+
+
+def test_probabilistic_early_expiration(fake_redis, monkeypatch):
+    clock = Clock()
+    cache = make_cache(fake_redis, early_expiration_beta=1.0, clock=clock)
+    rng = random.Random(0)
+    monkeypatch.setattr(random, 'random', rng.random)
+
+    # 剩余时间等于 cost * beta 时提前刷新的概率为 e^-1
+    draws = [cache._should_refresh(clock.now + 2.0, 2.0) for _ in range(4000)]
+    assert 0.33 < sum(draws) / len(draws) < 0.41
+    assert not any(cache._should_refresh(clock.now + 60, 0.5) for _ in range(1000))
+    assert cache._should_refresh(clock.now - 1, 0.0)
+
+    cache.early_expiration_beta = 0
+    assert not any(cache._should_refresh(clock.now + 0.01, 2.0) for _ in range(100))
+
+
+@pytest.mark.database
+def test_concurrent_getters_issue_one_query(tmp_path, fake_redis):
+    clock = Clock()
+    fake_redis.clock = clock
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'stampede.db'}")
+    manager.init_database()
+    manager.bulk_save_repositories(make_repos(200))
+    manager.update_activity_scores()
+
+    queries = []
+
+    @event.listens_for(manager.engine, 'before_cursor_execute')
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM repositories' in statement:
+            queries.append(statement)
+            # 放大查询耗时，让并发调用方都落在同一次计算期间
+            time.sleep(0.05)
+
+    callers = 16
+    run_concurrently([manager] * callers, lambda m: m.get_trending_repositories(limit=20))
+    uncached = len(queries)
+
+    queries.clear()
+    manager.cache = make_cache(fake_redis, early_expiration_beta=0, clock=clock)
+    manager.cache.local.clock = clock
+    results = run_concurrently([manager] * callers, lambda m: m.get_trending_repositories(limit=20))
+    cold = len(queries)
+    assert all(result == results[0] for result in results) and len(results[0]) == 20
+
+    # TTL 到期时所有调用方拿到旧值，只有一次后台查询
+    queries.clear()
+    clock.now += 301
+    stale = run_concurrently([manager] * callers, lambda m: m.get_trending_repositories(limit=20))
+    wait_for_refresh(manager.cache)
+    expired = len(queries)
+
+    assert uncached == callers
+    assert cold == 1
+    assert expired == 1
+    assert all(result == results[0] for result in stale)
+
+
+def test_signature_binding_normalizes_keys(fake_redis):
+    cache = make_cache(fake_redis)
+    calls = []
+
+    @cache.cache(prefix='trending', expire=300)
+    def load(language, limit=20, *, after=None):
+        calls.append((language, limit, after))
+        return len(calls)
+
+    assert load('Go') == load('Go', 20) == load(language='Go', limit=20, after=None) == 1
+    assert load('Go', limit=5) == 2
+    assert calls == [('Go', 20, None), ('Go', 5, None)]
+
+
+@pytest.mark.database
+def test_getters_cache_on_normalized_query_parameters(tmp_path, fake_redis):
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'getters.db'}")
+    manager.init_database()
+    manager.bulk_save_repositories(make_repos(60))
+    manager.update_activity_scores()
+    manager.cache = make_cache(fake_redis)
+
+    queries = []
+
+    @event.listens_for(manager.engine, 'before_cursor_execute')
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM repositories' in statement:
+            queries.append(statement)
+
+    python = manager.get_trending_repositories(language='Python', limit=5)
+    assert manager.get_trending_repositories('Python', None, None, 5) == python
+    assert manager.get_trending_repositories(language='Python', min_stars=0, limit=5) == python
+    assert len(queries) == 1
+
+    # 不同的参数不会共用条目
+    go = manager.get_trending_repositories(language='Go', limit=5)
+    assert len(queries) == 2
+    assert {row.language for row in python} == {'Python'}
+    assert {row.language for row in go} == {'Go'}
+    assert len(manager.get_trending_repositories(language='Go', limit=3)) == 3
+    assert len(queries) == 3
+
+    after = (python[1].activity_score, python[1].id)
+    page = manager.get_trending_repositories(language='Python', limit=3, after=after)
+    assert manager.get_trending_repositories(language='Python', limit=3, after=list(after)) == page
+    assert page[0] == python[2]
+    assert len(queries) == 4
+
+    # 结果是不可变的行快照
+    assert isinstance(python, tuple) and type(python[0]).__name__ == 'RepositoryRow'
+    with pytest.raises(AttributeError):
+        python[0].stars = 0
+
+    stats = manager.cache_stats()['prefixes']['trending']
+    assert stats == {'hits': 3, 'misses': 4, 'hit_rate': pytest.approx(3 / 7)}
+
+    # 写入后失效，重新查询
+    manager.bulk_save_repositories(make_repos(2, seed=1))
+    queries.clear()
+    manager.get_trending_repositories(language='Python', limit=5)
+    assert len(queries) == 1
+
+
+@pytest.mark.database
+def test_databases_sharing_redis_do_not_share_entries(tmp_path, fake_redis):
+    managers = []
+    for name, count in (('first', 5), ('second', 9)):
+        manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / name}.db")
+        manager.init_database()
+        manager.bulk_save_repositories(make_repos(count, seed=count))
+        manager.cache = make_cache(fake_redis)
+        managers.append(manager)
+
+    first, second = managers
+    assert len(first.get_trending_repositories(limit=20)) == 5
+    assert len(second.get_trending_repositories(limit=20)) == 9
+    assert first.cache_namespace != second.cache_namespace
+
+    # 失效只影响本数据库的条目
+    first.bulk_save_repositories(make_repos(1, seed=1))
+    assert second.cache.generation('trending', namespace=second.cache_namespace) == 0
+
+    with pytest.raises(ValueError):
+        first.get_trending_repositories(limit=0)
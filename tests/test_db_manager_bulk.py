@@ -0,0 +1,141 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from src.crawler.github_crawler import GitHubCrawler
+from src.database.db_manager import DatabaseManager
+from src.database.models import Repository
+from tests.conftest import CRAWLED_AT, make_repos
+
+
+@pytest.mark.database
+def test_bulk_save_counts_inserts_and_updates(manager):
+    assert manager.bulk_save_repositories(make_repos(3)) == {'inserted': 3, 'updated': 0}
+
+    repos = make_repos(4)
+    repos[0]['stars'] = 42
+    assert manager.bulk_save_repositories(repos) == {'inserted': 1, 'updated': 3}
+
+    with manager.get_session() as session:
+        assert session.query(Repository).count() == 4
+        assert session.query(Repository).filter_by(name='owner0/repo0').one().stars == 42
+
+
+@pytest.mark.database
+def test_bulk_save_keeps_snapshots_per_crawl(manager):
+    manager.bulk_save_repositories(make_repos(2))
+    later = make_repos(2, crawled_at=CRAWLED_AT + timedelta(hours=1))
+    assert manager.bulk_save_repositories(later) == {'inserted': 2, 'updated': 0}
+
+
+@pytest.mark.database
+def test_bulk_save_only_updates_given_fields(manager):
+    manager.bulk_save_repositories(make_repos(1))
+    manager.bulk_save_repositories([{
+        'name': 'owner0/repo0',
+        'url': 'https://github.com/owner0/repo0',
+        'stars': 7,
+        'crawled_at': CRAWLED_AT.isoformat()
+    }])
+
+    with manager.get_session() as session:
+        repo = session.query(Repository).one()
+        assert repo.stars == 7
+        assert repo.description == 'Repository 0'
+
+
+def _python_scores(manager):
+    with manager.get_session() as session:
+        return {
+            repo.id: manager._calculate_activity_score(
+                stars=repo.stars,
+                forks=repo.forks,
+                issues=repo.open_issues,
+                watchers=repo.watchers,
+                contributors=repo.contributors_count,
+                recent_commits=repo.recent_commits
+            )
+            for repo in session.query(Repository)
+        }
+
+
+def _stored_scores(manager):
+    with manager.get_session() as session:
+        return {repo.id: repo.activity_score for repo in session.query(Repository)}
+
+
+@pytest.mark.database
+def test_set_based_scores_match_python_formula(manager):
+    repos = make_repos(2000, seed=1)
+    # 边界值：上限、恰好取整到 .xx5 的组合
+    repos[0].update(stars=10000, forks=5000, open_issues=1000, watchers=10000,
+                    contributors_count=100, recent_commits=1000)
+    repos[1].update(stars=125, forks=0, open_issues=5, watchers=25,
+                    contributors_count=1, recent_commits=3)
+    manager.bulk_save_repositories(repos)
+
+    assert manager.update_activity_scores() == {'touched': 2000, 'skipped': 0}
+    assert _stored_scores(manager) == _python_scores(manager)
+
+
+@pytest.mark.database
+def test_chunked_scores_match_python_formula(manager, monkeypatch):
+    manager.bulk_save_repositories(make_repos(250, seed=2))
+    monkeypatch.setattr(manager.engine.dialect, 'name', 'postgresql')
+
+    assert manager.rebuild_activity_scores(chunk_size=64) == {'touched': 250, 'skipped': 0}
+    assert _stored_scores(manager) == _python_scores(manager)
+
+
+@pytest.mark.database
+def test_incremental_scores_touch_only_saved_rows(manager):
+    manager.bulk_save_repositories(make_repos(150, seed=4))
+    assert manager.update_activity_scores() == {'touched': 150, 'skipped': 0}
+
+    later = make_repos(20, crawled_at=CRAWLED_AT + timedelta(days=1), seed=5)
+    manager.bulk_save_repositories(later)
+    assert manager.update_activity_scores() == {'touched': 20, 'skipped': 150}
+    assert _stored_scores(manager) == _python_scores(manager)
+
+    # 没有新变化时什么都不做
+    assert manager.update_activity_scores() == {'touched': 0, 'skipped': 170}
+    assert manager.rebuild_activity_scores() == {'touched': 170, 'skipped': 0}
+
+
+@pytest.mark.database
+def test_incremental_scores_use_since_watermark(manager):
+    manager.bulk_save_repositories(make_repos(30, seed=6))
+    manager.bulk_save_repositories(make_repos(5, crawled_at=CRAWLED_AT + timedelta(days=2)))
+
+    # 新实例没有脏键，按 crawled_at 水位挑选
+    fresh = DatabaseManager(db_url=str(manager.engine.url))
+    result = fresh.update_activity_scores(since=CRAWLED_AT + timedelta(days=1))
+    assert result == {'touched': 5, 'skipped': 30}
+
+
+@pytest.mark.slow
+@pytest.mark.database
+@pytest.mark.parametrize("count", [1_000, 10_000, 100_000])
+def test_bulk_save_benchmark(manager, count):
+    repos = make_repos(count)
+    assert manager.bulk_save_repositories(repos) == {'inserted': count, 'updated': 0}
+    assert manager.bulk_save_repositories(repos) == {'inserted': 0, 'updated': count}
+
+
+@pytest.mark.database
+def test_crawled_rows_and_watermark_share_the_utc_clock(manager, monkeypatch):
+    manager.bulk_save_repositories(make_repos(3, seed=8))
+    before = datetime.utcnow()
+    # 本地时间比 UTC 慢的时区里，本地时间的 crawled_at 会落在水位之前
+    monkeypatch.setenv('TZ', 'America/Los_Angeles')
+    time.tzset()
+    try:
+        row = GitHubCrawler()._build_repository_info('/a/b', None, 'Python', '10', '2', '1')
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+    fresh = DatabaseManager(db_url=str(manager.engine.url))
+    fresh.bulk_save_repositories([row])
+    result = DatabaseManager(db_url=str(manager.engine.url)).update_activity_scores(since=before)
+    assert result == {'touched': 1, 'skipped': 3}
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import product
+
+import pytest
+from src.crawler.github_crawler import GitHubCrawler
+from src.utils.rate_limiter import RateLimiter, configure_limiter, get_limiter
+
+FIXTURE = 'tests/fixtures/trending_page.html'
+LANGUAGES = ['python', 'java', 'go', 'rust', 'c++']
+TIME_RANGES = ['daily', 'weekly', 'monthly']
+
+
+@pytest.fixture(scope="module")
+def trending_server():
+    """本地替身服务器，回放录制的 trending 页面并模拟网络延迟"""
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        page = f.read()
+
+    class Handler(BaseHTTPRequestHandler):
+        delay = 0.1
+
+        def do_GET(self):
+            time.sleep(self.delay)
+            body = f"<!-- {self.path} -->\n{page}".encode('utf-8')
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/trending"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawler(trending_server):
+    crawler = GitHubCrawler()
+    crawler.base_url = trending_server
+    return crawler
+
+
+def test_fetch_many_preserves_order(crawler):
+    targets = list(product(LANGUAGES, TIME_RANGES))
+    results = crawler.fetch_many(targets, max_concurrency=4)
+
+    assert len(results) == len(targets)
+    for (language, since), result in zip(targets, results):
+        assert result.metadata['language'] == language
+        assert result.metadata['since'] == since
+        assert result.data.startswith(f"<!-- /trending/{language}?since={since}")
+
+
+def test_conditional_fetch_returns_not_modified(trending_server, tmp_path):
+    validator_path = str(tmp_path / 'validators.json')
+    crawler = GitHubCrawler(validator_path=validator_path)
+    crawler.base_url = trending_server
+
+    first = crawler.fetch(language='python', since='daily')
+    assert first.metadata['not_modified'] is False
+    assert first.data
+
+    # 校验值持久化后，新实例也能发出条件请求
+    restarted = GitHubCrawler(validator_path=validator_path)
+    restarted.base_url = trending_server
+    second = restarted.fetch(language='python', since='daily')
+    assert second.metadata['not_modified'] is True
+    assert second.data is None
+
+
+def test_fetch_stream_yields_repositories(crawler):
+    stream = crawler.fetch_stream(language='python', since='daily', chunk_size=512)
+    result = crawler.process_response(stream)
+    assert [repo['name'] for repo in result.data][:2] == [
+        'microsoft/markitdown',
+        'ollama/ollama'
+    ]
+
+
+@pytest.mark.slow
+def test_fetch_many_benchmark(trending_server):
+    # 只比较并发收益，不受 fetch 上 30 次/分钟的共享限流影响
+    previous = get_limiter('github')
+    configure_limiter('github', RateLimiter(calls=1000, period=1.0))
+    try:
+        _run_fetch_many_benchmark(trending_server)
+    finally:
+        configure_limiter('github', previous)
+
+
+def _run_fetch_many_benchmark(trending_server):
+    targets = list(product(LANGUAGES, TIME_RANGES))
+    # 分别使用新实例，避免第二轮命中条件请求
+    serial_crawler, concurrent_crawler = GitHubCrawler(), GitHubCrawler()
+    serial_crawler.base_url = concurrent_crawler.base_url = trending_server
+
+    start = time.perf_counter()
+    serial = [serial_crawler.fetch(language=l, since=s) for l, s in targets]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = concurrent_crawler.fetch_many(targets, max_concurrency=8)
+    concurrent_time = time.perf_counter() - start
+
+    assert [r.data for r in serial] == [r.data for r in concurrent]
+    assert concurrent_time < serial_time
+
+
+def test_fetch_many_async_does_not_wait_for_running_requests_on_failure(crawler, monkeypatch):
+    released = threading.Event()
+
+    def fetch(language=None, since='daily'):
+        if language == 'bad':
+            raise RuntimeError('boom')
+        released.wait(5)
+        return language
+
+    monkeypatch.setattr(crawler, 'fetch', fetch)
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        asyncio.run(crawler.fetch_many_async([('slow', 'daily'), ('bad', 'daily')]))
+    elapsed = time.perf_counter() - start
+    released.set()
+    # 失败后立即返回，不在事件循环上等待仍在运行的请求
+    assert elapsed < 1
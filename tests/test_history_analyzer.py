@@ -0,0 +1,219 @@
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.analyzers.history import HistoryAnalyzer
+from src.database.db_manager import DatabaseManager
+from src.database.models import Repository, TrendingHistory
+
+START = date(2024, 1, 1)
+
+
+def make_history(days=90, repos=6, seed=0):
+    """按日期排序的历史记录，随机缺天（含超过两周的长间隔）"""
+    rng = random.Random(seed)
+    stars = {f'owner/repo{i}': rng.randint(0, 1000) for i in range(repos)}
+    languages = {name: rng.choice(['Python', 'Go', None]) for name in stars}
+    rows = []
+    for offset in range(days):
+        day = START + timedelta(days=offset)
+        for name in stars:
+            if offset % 40 >= 20 and name.endswith('0'):
+                continue
+            if rng.random() < 0.3:
+                continue
+            stars[name] += rng.randint(0, 50)
+            rows.append({'repository_name': name, 'date': day,
+                         'stars': stars[name], 'language': languages[name]})
+    return rows
+
+
+def reference(rows, window):
+    """每天在完整历史上重新计算"""
+    series, language_totals, results = {}, {}, {}
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row['date'], []).append(row)
+    for day in sorted(by_day):
+        window_start = day - timedelta(days=window - 1)
+        repositories, languages = {}, {}
+        for row in by_day[day]:
+            obs = series.setdefault(row['repository_name'], [])
+            if obs and obs[-1][0] < day - timedelta(days=2 * window):
+                obs.clear()
+            velocity = acceleration = None
+            if obs:
+                gap = (day - obs[-1][0]).days
+                velocity = (row['stars'] - obs[-1][1]) / gap
+                if obs[-1][2] is not None:
+                    acceleration = (velocity - obs[-1][2]) / gap
+            obs.append((day, row['stars'], velocity))
+
+            def stars_at(x):
+                before = [o[1] for o in obs if o[0] <= x]
+                return before[-1] if before else None
+
+            recent = [o for o in obs if o[0] >= window_start]
+            velocities = [o[2] for o in recent if o[2] is not None]
+            week, two = stars_at(day - timedelta(days=window)), stars_at(day - timedelta(days=2 * window))
+            gain = row['stars'] - week if week is not None else None
+            previous = week - two if week is not None and two is not None else None
+            repositories[row['repository_name']] = {
+                'language': row['language'], 'stars': row['stars'],
+                'velocity': velocity, 'acceleration': acceleration,
+                'moving_average_stars': sum(o[1] for o in recent) / len(recent),
+                'moving_average_velocity': sum(velocities) / len(velocities) if velocities else None,
+                'weekly_gain': gain, 'previous_weekly_gain': previous,
+                'week_over_week': gain - previous if previous is not None else None,
+            }
+            stats = languages.setdefault(row['language'], {
+                'repos': 0, 'stars': 0, 'velocity': 0.0, 'weekly_gain': 0, 'previous_weekly_gain': 0})
+            stats['repos'] += 1
+            stats['stars'] += row['stars']
+            stats['velocity'] += velocity or 0.0
+            stats['weekly_gain'] += gain or 0
+            stats['previous_weekly_gain'] += previous or 0
+        for language, stats in languages.items():
+            totals = language_totals.setdefault(language, [])
+            totals.append((day, stats['velocity']))
+            recent = [v for d, v in totals if d >= window_start]
+            stats['moving_average_velocity'] = sum(recent) / len(recent)
+            stats['week_over_week'] = stats['weekly_gain'] - stats['previous_weekly_gain']
+        results[day.isoformat()] = {'repositories': repositories, 'languages': languages}
+    return results
+
+
+@pytest.mark.parametrize('window', [3, 7])
+def test_incremental_windows_match_full_recomputation(window):
+    rows = make_history()
+    expected = reference(rows, window)
+    analyzer = HistoryAnalyzer(window=window)
+
+    days = list(analyzer.iter_days(rows))
+    assert [d['date'] for d in days] == list(expected)
+    for result in days:
+        assert {k: result[k] for k in ('repositories', 'languages')} == expected[result['date']]
+    # 长期未出现的仓库已被淘汰
+    assert all(s.observations[-1][0] >= START + timedelta(days=89 - 2 * window)
+               for s in analyzer.repositories.values())
+
+
+def test_state_round_trip_resumes_where_it_left_off():
+    rows = make_history(seed=1)
+    middle = START + timedelta(days=45)
+    continuous = HistoryAnalyzer()
+    continuous.update(rows)
+
+    first = HistoryAnalyzer()
+    first.update(r for r in rows if r['date'] < middle)
+    resumed = HistoryAnalyzer.from_state(json.loads(json.dumps(first.to_state())))
+    # 已处理的日期会被跳过
+    assert resumed.update(rows) == len({r['date'] for r in rows if r['date'] >= middle})
+    assert resumed.latest == continuous.latest
+
+
+def test_advance_rejects_past_days():
+    analyzer = HistoryAnalyzer()
+    analyzer.advance(START, [])
+    with pytest.raises(ValueError):
+        analyzer.advance(START - timedelta(days=1), [])
+
+
+def test_replaying_the_last_day_matches_a_single_pass():
+    rows = make_history(days=40, seed=4)
+    last_day = rows[-1]['date']
+    expected = HistoryAnalyzer()
+    expected.update(rows)
+
+    # 最后一天先只看到一部分记录，之后带着当天全部记录再运行一次
+    partial = HistoryAnalyzer()
+    partial.update(rows[:-3])
+    assert partial.update(r for r in rows if r['date'] >= last_day) == 0
+    assert partial.latest == expected.latest
+    assert partial.to_state() == expected.to_state()
+
+
+def test_sub_daily_crawls_use_the_last_row_of_the_day():
+    day = datetime(2024, 1, 2)
+    rows = [
+        {'repository_name': 'owner/repo', 'date': datetime(2024, 1, 1, 13), 'stars': 100},
+        {'repository_name': 'owner/repo', 'date': day.replace(hour=1), 'stars': 110},
+        {'repository_name': 'owner/repo', 'date': day.replace(hour=13), 'stars': 130},
+    ]
+    analyzer = HistoryAnalyzer()
+    assert analyzer.update(rows) == 2
+    repo = analyzer.latest['repositories']['owner/repo']
+    assert repo['stars'] == 130 and repo['velocity'] == 30
+
+
+@pytest.mark.database
+def test_update_from_database_reads_only_new_days(tmp_path):
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'history.db'}")
+    manager.init_database()
+    rows = make_history(days=30, seed=2)
+
+    def store(selected):
+        with manager.get_session() as session:
+            for row in selected:
+                session.add(TrendingHistory(
+                    repository_name=row['repository_name'], stars=row['stars'],
+                    date=datetime.combine(row['date'], datetime.min.time())))
+            session.commit()
+
+    with manager.get_session() as session:
+        for name, language in {r['repository_name']: r['language'] for r in rows}.items():
+            session.add(Repository(name=name, url=f'https://github.com/{name}', language=language))
+        session.commit()
+
+    middle = START + timedelta(days=20)
+    store(r for r in rows if r['date'] < middle)
+    analyzer = HistoryAnalyzer()
+    assert analyzer.update_from_database(manager) == len({r['date'] for r in rows if r['date'] < middle})
+
+    store(r for r in rows if r['date'] >= middle)
+    new_days = len({r['date'] for r in rows if r['date'] >= middle})
+    assert analyzer.update_from_database(manager) == new_days
+
+    expected = HistoryAnalyzer()
+    expected.update(rows)
+    assert analyzer.latest == expected.latest
+
+
+@pytest.mark.database
+def test_update_from_database_picks_up_later_crawls_of_the_last_day(tmp_path):
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'history.db'}")
+    manager.init_database()
+    with manager.get_session() as session:
+        session.add(Repository(name='owner/repo', url='https://github.com/owner/repo', language='Go'))
+        session.add(TrendingHistory(repository_name='owner/repo', stars=100, date=datetime(2024, 1, 1, 13)))
+        session.add(TrendingHistory(repository_name='owner/repo', stars=110, date=datetime(2024, 1, 2, 1)))
+        session.commit()
+
+    analyzer = HistoryAnalyzer()
+    assert analyzer.update_from_database(manager) == 2
+    assert analyzer.latest['repositories']['owner/repo']['stars'] == 110
+
+    with manager.get_session() as session:
+        session.add(TrendingHistory(repository_name='owner/repo', stars=130, date=datetime(2024, 1, 2, 13)))
+        session.commit()
+    analyzer = HistoryAnalyzer.from_state(json.loads(json.dumps(analyzer.to_state())))
+    assert analyzer.update_from_database(manager) == 0
+    repo = analyzer.latest['repositories']['owner/repo']
+    assert repo['stars'] == 130 and repo['velocity'] == 30
+    assert repo['moving_average_stars'] == 115
+
+
+@pytest.mark.slow
+def test_daily_update_cost_is_independent_of_history_length():
+    rows = make_history(days=3 * 365, repos=300, seed=3)
+    analyzer = HistoryAnalyzer()
+    timings = []
+    for result in analyzer.iter_days(rows):
+        timings.append(time.perf_counter())
+    per_day = [b - a for a, b in zip(timings, timings[1:])]
+    first, last = per_day[:365], per_day[-365:]
+    assert sum(last) < sum(first) * 3
+    assert len(analyzer.repositories) <= 300
@@ -0,0 +1,174 @@
+import glob
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from src.database.db_manager import DatabaseManager
+from src.database.index_advisor import IndexAdvisor, IndexCandidate, format_report
+from src.database.models import ActivityChanges, Base, LanguageStats, Repository
+from src.database.query_builder import QueryBuilder
+
+BASE_DATE = datetime(2024, 1, 1)
+
+
+def bare_engine(path):
+    """只有表和唯一约束、没有任何手写索引的数据库"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        names = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        ).scalars().all()
+        for name in names:
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+    return engine
+
+
+def index_names(engine):
+    with engine.connect() as connection:
+        return set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ).scalars())
+
+
+def seed(engine, repositories=1000, seed=0):
+    rng = random.Random(seed)
+    languages = ['Python', 'Go', 'Rust', 'Java', None] + [f'Lang{i}' for i in range(30)]
+    with engine.begin() as connection:
+        connection.execute(insert(Repository.__table__), [
+            {
+                'name': f'owner/repo{i}',
+                'url': f'https://github.com/owner/repo{i}',
+                'language': rng.choice(languages),
+                'stars': rng.randint(0, 50000),
+                'forks': rng.randint(0, 5000),
+                'activity_score': rng.uniform(0, 100),
+                'crawled_at': BASE_DATE + timedelta(days=i % 365, seconds=i)
+            }
+            for i in range(repositories)
+        ])
+        connection.execute(insert(LanguageStats.__table__), [
+            {
+                'language': language,
+                'repository_count': rng.randint(1, 500),
+                'total_stars': rng.randint(0, 10 ** 6),
+                'total_forks': rng.randint(0, 10 ** 5),
+                'average_activity_score': rng.uniform(0, 100),
+                'date': BASE_DATE + timedelta(days=day)
+            }
+            for day in range(max(repositories // 300, 10)) for language in languages if language
+        ])
+        connection.execute(insert(ActivityChanges.__table__), [
+            {
+                'repository_name': f'owner/repo{i}',
+                'activity_change': rng.uniform(-50, 50),
+                'start_date': BASE_DATE,
+                'end_date': BASE_DATE + timedelta(days=i)
+            }
+            for i in range(repositories // 2)
+        ])
+
+
+def test_plan_issues():
+    assert IndexAdvisor.plan_issues(['SCAN repositories', 'USE TEMP B-TREE FOR ORDER BY']) == [
+        'full_scan', 'temp_sort'
+    ]
+    assert IndexAdvisor.plan_issues(['SCAN repositories USING INDEX idx_activity_score']) == []
+    assert IndexAdvisor.plan_issues(
+        ['SEARCH activity_changes USING INDEX idx (activity_change>?)'], limited=False
+    ) == ['table_lookup']
+    assert IndexAdvisor.plan_issues(
+        ['SCAN language_stats USING COVERING INDEX idx'], limited=False
+    ) == []
+
+
+def test_candidate_sql():
+    candidate = IndexCandidate('t', ['a', 'b'], covering=['b', 'c'], where='a > 0')
+    assert candidate.name == 'idx_t_a_b_covering_partial'
+    assert candidate.create_sql() == (
+        "CREATE INDEX IF NOT EXISTS idx_t_a_b_covering_partial ON t(a, b, c) WHERE a > 0"
+    )
+
+
+@pytest.mark.database
+def test_advisor_removes_scans_and_sorts(tmp_path):
+    engine = bare_engine(tmp_path / 'bare.db')
+    seed(engine)
+    advisor = IndexAdvisor(engine)
+
+    report = advisor.advise(apply=True, measure=False)
+
+    assert len(report['cases']) == 16 + 32 + 16
+    assert all(result['issues_before'] for result in report['cases'])
+    assert not [r['name'] for r in report['cases'] if r['issues_after']]
+    assert any('WHERE activity_change > 0' in sql for sql in report['indexes'])
+    assert any('COVERING INDEX' in detail
+               for result in report['cases'] for detail in result['after'])
+
+    created = {sql.split()[5] for sql in report['indexes']}
+    assert created <= index_names(engine)
+    # 再运行一次没有新的建议
+    assert advisor.advise(apply=True, measure=False)['indexes'] == []
+
+
+@pytest.mark.database
+def test_dry_run_leaves_schema_unchanged(tmp_path):
+    engine = bare_engine(tmp_path / 'bare.db')
+    seed(engine, repositories=200)
+    before = index_names(engine)
+
+    report = IndexAdvisor(engine).advise(apply=False, measure=False)
+
+    assert report['indexes']
+    assert index_names(engine) == before
+    assert 'CREATE INDEX' in format_report(report)
+
+
+def test_sample_values_are_computed_when_cases_are_built(tmp_path):
+    calls = []
+
+    def since():
+        calls.append(1)
+        return BASE_DATE + timedelta(days=len(calls))
+
+    advisor = IndexAdvisor(bare_engine(tmp_path / 'bare.db'), cases={
+        'language_statistics': (LanguageStats, QueryBuilder.LANGUAGE_KEY, None, {'since': since})
+    })
+    assert [case.kwargs for case in advisor.cases()] == [{}, {'since': BASE_DATE + timedelta(days=1)}]
+    assert advisor.cases()[1].kwargs['since'] == BASE_DATE + timedelta(days=2)
+    assert advisor.cases()[0].order_columns == ['average_activity_score', 'id']
+    assert not advisor.cases()[0].limited
+
+
+@pytest.mark.database
+def test_shipped_indexes_have_no_plan_issues(tmp_path):
+    # ORM 建表
+    manager = DatabaseManager(db_url=f"sqlite:///{tmp_path / 'orm.db'}")
+    manager.init_database()
+    seed(manager.engine, repositories=200)
+    report = manager.advise_indexes(measure=False)
+    assert not [r['name'] for r in report['cases'] if r['issues_before']]
+
+    # data/sql 中的建表和索引文件
+    engine = create_engine(f"sqlite:///{tmp_path / 'sql.db'}")
+    with engine.begin() as connection:
+        files = sorted(glob.glob('data/sql/tables/*.sql')) + sorted(glob.glob('data/sql/indexes/*.sql'))
+        for path in files:
+            connection.connection.executescript(open(path, encoding='utf-8').read())
+    seed(engine, repositories=200)
+    report = IndexAdvisor(engine).advise(measure=False)
+    assert not [r['name'] for r in report['cases'] if r['issues_before']]
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_advisor_latency_on_large_database(tmp_path):
+    engine = bare_engine(tmp_path / 'large.db')
+    seed(engine, repositories=200000)
+
+    report = IndexAdvisor(engine).advise(apply=True, repeat=3)
+
+    trending = [r for r in report['cases'] if r['name'].startswith('trending_repositories')]
+    assert all(r['ms_after'] < r['ms_before'] for r in trending)
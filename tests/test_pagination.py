@@ -0,0 +1,175 @@
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import islice
+
+import pytest
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from src.database.models import ActivityChanges, LanguageStats, Repository
+from src.database.query_builder import QueryBuilder
+
+BASE_DATE = datetime(2024, 1, 1)
+
+
+def seed(manager, count, seed=0):
+    """分数只取少量取值，制造大量并列"""
+    rng = random.Random(seed)
+    with manager.engine.begin() as connection:
+        connection.execute(insert(Repository.__table__), [
+            {
+                'name': f'owner/repo{i}',
+                'url': f'https://github.com/owner/repo{i}',
+                'language': rng.choice(['Python', 'Go', 'Rust']),
+                'stars': rng.randint(0, 5000),
+                'activity_score': float(rng.randint(0, 20)),
+                'crawled_at': BASE_DATE + timedelta(seconds=i)
+            }
+            for i in range(count)
+        ])
+        connection.execute(insert(LanguageStats.__table__), [
+            {
+                'language': f'Lang{i % 50}',
+                'repository_count': rng.randint(1, 100),
+                'total_stars': rng.randint(0, 10000),
+                'average_activity_score': float(rng.randint(0, 10)),
+                'date': BASE_DATE + timedelta(days=i // 50)
+            }
+            for i in range(count // 4)
+        ])
+        connection.execute(insert(ActivityChanges.__table__), [
+            {
+                'repository_name': f'owner/repo{i}',
+                'activity_change': float(rng.randint(-10, 10)),
+                'start_date': BASE_DATE,
+                'end_date': BASE_DATE + timedelta(days=i)
+            }
+            for i in range(count // 2)
+        ])
+
+
+def walk(get_page, key, page_size):
+    """逐页读取直到最后一页"""
+    rows, after = [], None
+    while True:
+        page = get_page(limit=page_size, after=after)
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        after = QueryBuilder.keyset(page[-1], key)
+
+
+@pytest.mark.database
+@pytest.mark.parametrize('page_size', [1, 7, 100])
+def test_keyset_pages_cover_every_row_once_in_order(manager, page_size):
+    seed(manager, 400)
+
+    pages = walk(
+        lambda **kw: manager.get_trending_repositories(language='Python', **kw),
+        QueryBuilder.TRENDING_KEY, page_size
+    )
+    streamed = list(manager.iter_trending_repositories(language='Python'))
+
+    assert [r.id for r in pages] == [r['id'] for r in streamed]
+    with manager.get_session() as session:
+        expected = sorted(
+            session.query(Repository).filter_by(language='Python'),
+            key=lambda r: (r.activity_score, r.id), reverse=True
+        )
+        assert [r.id for r in pages] == [r.id for r in expected]
+
+
+@pytest.mark.database
+@pytest.mark.parametrize('page_size', [1, 7, 100])
+def test_rows_without_a_score_page_last(manager, page_size):
+    seed(manager, 120)
+    with manager.engine.begin() as connection:
+        connection.execute(
+            update(Repository.__table__)
+            .where(Repository.__table__.c.id % 5 == 0)
+            .values(activity_score=None)
+        )
+
+    pages = walk(manager.get_trending_repositories, QueryBuilder.TRENDING_KEY, page_size)
+    with manager.get_session() as session:
+        expected = sorted(
+            session.query(Repository),
+            key=lambda r: (r.activity_score is not None, r.activity_score or 0, r.id), reverse=True
+        )
+    assert [r.id for r in pages] == [r.id for r in expected]
+
+    # 流式读取从非 NULL 的位置继续时也会读到 NULL 行
+    middle = QueryBuilder.keyset(expected[50], QueryBuilder.TRENDING_KEY)
+    resumed = [r['id'] for r in manager.iter_trending_repositories(after=middle)]
+    assert resumed == [r.id for r in expected[51:]]
+
+
+def test_seek_puts_nulls_last_on_every_dialect():
+    query = QueryBuilder.seek(Query(Repository), QueryBuilder.TRENDING_KEY, after=(None, 10))
+    sql = str(query.statement.compile(dialect=postgresql.dialect()))
+    assert 'activity_score DESC NULLS LAST' in sql
+
+
+@pytest.mark.database
+def test_language_statistics_and_activity_changes_pages(manager):
+    seed(manager, 400)
+
+    stats = walk(manager.get_language_statistics, QueryBuilder.LANGUAGE_KEY, 9)
+    assert [s.id for s in stats] == [s['id'] for s in manager.iter_language_statistics()]
+    assert len(stats) == 100
+    keys = [QueryBuilder.keyset(s, QueryBuilder.LANGUAGE_KEY) for s in stats]
+    assert keys == sorted(keys, reverse=True)
+
+    changes = walk(
+        lambda **kw: manager.get_activity_changes(positive_only=True, **kw),
+        QueryBuilder.ACTIVITY_KEY, 11
+    )
+    streamed = list(manager.iter_activity_changes(positive_only=True, chunk_size=13))
+    assert [c.id for c in changes] == [c['id'] for c in streamed]
+    assert all(c['activity_change'] > 0 for c in streamed)
+
+    # 流式读取也可以从某个位置继续
+    middle = QueryBuilder.keyset(streamed[20], QueryBuilder.ACTIVITY_KEY)
+    resumed = list(manager.iter_activity_changes(positive_only=True, after=middle))
+    assert resumed == streamed[21:]
+
+
+@pytest.mark.database
+def test_getter_results_are_readable_after_the_session_closes(manager):
+    seed(manager, 20)
+    repo = manager.get_trending_repositories(limit=1)[0]
+    assert repo.name.startswith('owner/') and repo.activity_score is not None
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_keyset_and_streaming_on_a_large_table(manager):
+    seed(manager, 400000)
+    page_size = 100
+
+    def timed(func):
+        started = time.perf_counter()
+        result = func()
+        return result, (time.perf_counter() - started) * 1000
+
+    # 深翻页：OFFSET 需要先跳过前面的行，keyset 直接沿索引定位
+    with manager.get_session() as session:
+        query = QueryBuilder.trending_repositories(session.query(Repository), limit=page_size)
+        deep, offset_ms = timed(lambda: query.offset(300000).all())
+        after = (deep[0].activity_score, deep[0].id + 1)
+    page, keyset_ms = timed(lambda: manager.get_trending_repositories(limit=page_size, after=after))
+    assert [r.id for r in page] == [r.id for r in deep]
+
+    count, stream_ms = timed(lambda: sum(1 for _ in manager.iter_trending_repositories()))
+    assert count == 400000
+
+    tracemalloc.start()
+    assert sum(1 for _ in islice(manager.iter_trending_repositories(), 200000)) == 200000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert keyset_ms < offset_ms
+    assert peak < 32 * 2 ** 20
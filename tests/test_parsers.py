@@ -0,0 +1,67 @@
+
+import pytest
+from src.crawler.github_crawler import GitHubCrawler
+from src.crawler.parsers import available_backends
+from tests.conftest import strip_timestamps
+
+@pytest.mark.crawler
+@pytest.mark.parametrize("backend", available_backends())
+def test_parser_backend_parity(backend, trending_html):
+    expected = GitHubCrawler().parse(trending_html).data
+    actual = GitHubCrawler(parser=backend).parse(trending_html).data
+
+    assert len(expected) == 10
+    assert strip_timestamps(actual) == strip_timestamps(expected)
+
+
+@pytest.mark.crawler
+@pytest.mark.parametrize("backend", available_backends())
+def test_parser_backend_skips_broken_rows(backend):
+    html = (
+        '<article class="Box-row"><h2><span>no link</span></h2></article>'
+        '<article class="Box-row"><h2><a href="/a/b">a / b</a></h2></article>'
+    )
+    repositories = GitHubCrawler(parser=backend).parse(html).data
+    assert [repo['name'] for repo in repositories] == ['a/b']
+    assert repositories[0]['stars'] == 0
+
+
+@pytest.mark.crawler
+@pytest.mark.parametrize("chunk_size", [1, 97, 4096])
+def test_streaming_parse_matches_full_parse(chunk_size, trending_html):
+    crawler = GitHubCrawler()
+    chunks = (
+        trending_html[i:i + chunk_size]
+        for i in range(0, len(trending_html), chunk_size)
+    )
+    streamed = list(crawler.iter_parse(chunks))
+    assert strip_timestamps(streamed) == strip_timestamps(crawler.parse(trending_html).data)
+
+
+def test_process_response_validates_stream(trending_html):
+    crawler = GitHubCrawler()
+    result = crawler.process_response(crawler.iter_parse([trending_html]))
+    assert result.metadata['count'] == len(result.data) == 10
+
+    def broken_stream():
+        yield {'name': 'a/b', 'url': 'https://github.com/a/b'}
+        yield {'name': 'missing/url'}
+        pytest.fail("stream should stop at the first invalid record")
+
+    with pytest.raises(ValueError):
+        crawler.process_response(broken_stream())
+
+
+def test_unknown_parser_backend():
+    with pytest.raises(ValueError):
+        GitHubCrawler(parser='regex')
+
+
+@pytest.mark.slow
+def test_parser_backend_benchmark(trending_html):
+    rounds = 50
+    expected = strip_timestamps(GitHubCrawler().parse(trending_html).data)
+    for backend in available_backends():
+        crawler = GitHubCrawler(parser=backend)
+        for _ in range(rounds):
+            assert strip_timestamps(crawler.parse(trending_html).data) == expected
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+import pytest
+from src.utils.helper import rate_limit_decorator
+from src.utils.rate_limiter import (
+    FileState,
+    RateLimiter,
+    configure_limiter,
+    rate_limit
+)
+
+
+def test_burst_then_steady_rate(clock):
+    limiter = RateLimiter(calls=3, period=3.0, clock=clock, sleep=clock.sleep)
+    start = clock.now
+
+    waits = [limiter.acquire() for _ in range(6)]
+    assert waits == [0, 0, 0, 1.0, 1.0, 1.0]
+    assert clock.now == start + 3.0
+
+
+def test_no_double_burst_at_window_boundary(clock):
+    limiter = RateLimiter(calls=30, period=60.0, clock=clock, sleep=clock.sleep)
+    for _ in range(30):
+        limiter.acquire()
+
+    # 固定窗口实现会在窗口切换时再放行 30 次，GCRA 只补充已经过时间对应的配额
+    clock.now += 10.0
+    assert [limiter.reserve() for _ in range(5)] == [0, 0, 0, 0, 0]
+    assert limiter.reserve() > 0
+
+
+def test_idle_time_refills_up_to_burst_only(clock):
+    limiter = RateLimiter(calls=2, period=2.0, clock=clock, sleep=clock.sleep)
+    clock.now += 3600
+    assert [limiter.reserve() for _ in range(3)] == [0, 0, 1.0]
+
+
+def test_concurrent_threads_get_distinct_slots(clock):
+    limiter = RateLimiter(calls=5, period=5.0, clock=clock, sleep=clock.sleep)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        wait = limiter.reserve()
+        with lock:
+            waits.append(wait)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(waits) == [0.0] * 5 + [float(i) for i in range(1, 16)]
+
+
+def test_acquire_async(clock):
+    limiter = RateLimiter(calls=1, period=0.05, clock=clock, sleep=clock.sleep)
+
+    async def run():
+        return [await limiter.acquire_async() for _ in range(2)]
+
+    waits = asyncio.run(run())
+    assert waits[0] == 0
+    assert waits[1] == pytest.approx(0.05)
+
+
+def test_file_state_shares_budget_between_limiters(clock, tmp_path):
+    path = str(tmp_path / 'github.bucket')
+    first = RateLimiter(calls=2, period=2.0, state=FileState(path), clock=clock, sleep=clock.sleep)
+    second = RateLimiter(calls=2, period=2.0, state=FileState(path), clock=clock, sleep=clock.sleep)
+
+    assert [first.reserve(), second.reserve(), first.reserve(), second.reserve()] == [0, 0, 1.0, 2.0]
+
+
+def test_named_rate_limit_is_shared(clock):
+    configure_limiter('shared-test', RateLimiter(calls=2, period=2.0, clock=clock, sleep=clock.sleep))
+
+    @rate_limit(calls=2, period=2.0, name='shared-test')
+    def fetch_a():
+        return 'a'
+
+    @rate_limit(calls=2, period=2.0, name='shared-test')
+    def fetch_b():
+        return 'b'
+
+    assert [fetch_a(), fetch_b(), fetch_a()] == ['a', 'b', 'a']
+    assert clock.sleeps == [1.0]
+
+
+def test_rate_limit_decorator_keeps_signature():
+    @rate_limit_decorator(calls=5, period=1.0)
+    def add(a, b=1):
+        return a + b
+
+    assert add(1, b=2) == 3
+    assert add.__name__ == 'add'
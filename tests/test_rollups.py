@@ -0,0 +1,157 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.database.models import LanguageStats, Repository, RepositoryDailyDelta, TrendingHistory
+from tests.conftest import make_repos
+
+START = datetime(2024, 3, 1, 9, 0, 0)
+
+
+def crawl(manager, day, count=40, seed=None):
+    """抓取一天：同一天两次抓取，并写入当天的趋势历史"""
+    crawled_at = START + timedelta(days=day)
+    repos = make_repos(count, crawled_at, seed=day if seed is None else seed)
+    manager.bulk_save_repositories(repos)
+    manager.bulk_save_repositories(make_repos(count // 2, crawled_at + timedelta(hours=6), seed=day + 100))
+    with manager.get_session() as session:
+        session.add_all(
+            TrendingHistory(
+                repository_name=repo['name'],
+                activity_score=float(repo['stars'] % 100),
+                stars=repo['stars'] - 10,
+                forks=repo['forks'],
+                open_issues=repo['open_issues'],
+                date=datetime(crawled_at.year, crawled_at.month, crawled_at.day)
+            )
+            for repo in repos
+        )
+        session.commit()
+    manager.update_activity_scores()
+
+
+def direct_language_trends(manager, days, recent_days, as_of):
+    """language_trends 视图的语义：直接在仓库表上聚合"""
+    today = datetime(as_of.year, as_of.month, as_of.day)
+    since, recent = today - timedelta(days=days), today - timedelta(days=recent_days)
+    trends = {}
+    with manager.get_session() as session:
+        for repo in session.query(Repository).filter(Repository.crawled_at >= since):
+            if repo.language is None:
+                continue
+            stats = trends.setdefault(repo.language, {
+                'repo_count': 0, 'total_stars': 0, 'total_forks': 0,
+                'activity': 0.0, 'recent_repos_count': 0
+            })
+            stats['repo_count'] += 1
+            stats['total_stars'] += repo.stars
+            stats['total_forks'] += repo.forks
+            stats['activity'] += repo.activity_score
+            stats['recent_repos_count'] += repo.crawled_at >= recent
+    return trends
+
+
+@pytest.mark.database
+def test_rollups_match_direct_aggregation(manager):
+    for day in range(6):
+        crawl(manager, day)
+        manager.refresh_rollups()
+
+    as_of = START + timedelta(days=5)
+    expected = direct_language_trends(manager, 4, 2, as_of)
+    trends = manager.get_language_trends(days=4, recent_days=2, as_of=as_of)
+
+    assert {row['language'] for row in trends} == set(expected)
+    for row in trends:
+        stats = expected[row['language']]
+        assert row['repo_count'] == stats['repo_count']
+        assert row['total_stars'] == stats['total_stars']
+        assert row['total_forks'] == stats['total_forks']
+        assert row['recent_repos_count'] == stats['recent_repos_count']
+        assert row['avg_activity_score'] == pytest.approx(stats['activity'] / stats['repo_count'])
+    averages = [row['avg_activity_score'] for row in trends]
+    assert averages == sorted(averages, reverse=True)
+
+    # 每天三种非空语言各一行
+    assert len(manager.get_language_statistics()) == 6 * 3
+
+
+@pytest.mark.database
+def test_daily_deltas_compare_latest_crawl_with_previous_history(manager):
+    crawl(manager, 0)
+    crawl(manager, 1)
+    manager.refresh_rollups()
+
+    with manager.get_session() as session:
+        day = datetime(2024, 3, 2)
+        history = {
+            h.repository_name: h for h in session.query(TrendingHistory)
+            .filter(TrendingHistory.date == datetime(2024, 3, 1))
+        }
+        latest = {}
+        for repo in session.query(Repository).filter(
+            Repository.crawled_at >= day
+        ).order_by(Repository.crawled_at):
+            latest[repo.name] = repo
+
+        deltas = session.query(RepositoryDailyDelta).filter_by(date=day).all()
+        assert len(deltas) == len(latest)
+        for delta in deltas:
+            repo, before = latest[delta.repository_name], history[delta.repository_name]
+            assert delta.stars == repo.stars
+            assert delta.previous_date == before.date
+            assert delta.stars_change == repo.stars - before.stars
+            assert delta.issues_change == repo.open_issues - before.open_issues
+            assert delta.score_change == pytest.approx(repo.activity_score - before.activity_score)
+
+        first_day = session.query(RepositoryDailyDelta).filter_by(date=datetime(2024, 3, 1)).all()
+        assert first_day and all(delta.previous_date is None for delta in first_day)
+
+    recent = manager.get_recent_trending_repos(days=7, limit=5, as_of=START + timedelta(days=1))
+    assert len(recent) == 5
+    scores = [row['activity_score'] for row in recent]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.database
+def test_refresh_touches_only_new_days(manager):
+    for day in range(3):
+        crawl(manager, day)
+    assert manager.refresh_rollups()['days'] == 3
+
+    # 没有新数据时只重算已汇总的最后一天
+    assert manager.refresh_rollups()['days'] == 1
+
+    crawl(manager, 3)
+    counts = manager.refresh_rollups()
+    assert counts['days'] == 2
+    assert counts['delta_rows'] == 40 + 40
+
+    # 修改旧的一天时只多刷新那一天
+    manager.bulk_save_repositories(make_repos(1, START + timedelta(days=0, hours=1), seed=7))
+    counts = manager.refresh_rollups()
+    assert counts['days'] == 2
+    with manager.get_session() as session:
+        first = datetime(2024, 3, 1)
+        total = session.query(LanguageStats).filter_by(date=first).all()
+        direct = session.query(Repository).filter(
+            Repository.crawled_at >= first,
+            Repository.crawled_at < first + timedelta(days=1),
+            Repository.language.isnot(None)
+        ).count()
+        assert sum(stats.repository_count for stats in total) == direct
+
+
+@pytest.mark.slow
+@pytest.mark.database
+def test_refresh_cost_is_independent_of_history_length(manager):
+    timings = []
+    for day in range(60):
+        crawl(manager, day, count=400)
+        started = time.perf_counter()
+        manager.refresh_rollups()
+        timings.append(time.perf_counter() - started)
+
+    early, late = sum(timings[1:11]) / 10, sum(timings[-10:]) / 10
+    assert late < early * 3
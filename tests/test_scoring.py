@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import (
+    Column, Integer, MetaData, String, Table, create_engine, event, func, insert, select
+)
+
+from src.analyzers.trend import TrendAnalyzer
+from src.core.base import DataContainer
+from src.core.scoring import (
+    ScoringKernel, get_scoring_kernel, register_scoring_kernel
+)
+from tests.test_activity_processor import make_repos
+
+
+def reference_trending_score(repo):
+    """改造前 ActivityProcessor 的计算方式"""
+    popular = {'python': 1.0, 'javascript': 1.0, 'java': 0.9, 'go': 0.9,
+               'typescript': 0.9, 'rust': 0.8, 'c++': 0.8, 'ruby': 0.7}
+    description = repo.get('description')
+    quality = 0.0
+    if description:
+        if len(description) >= 20:
+            quality += 0.5
+        if len(description) >= 50:
+            quality += 0.3
+        if any(k in description.lower() for k in ['api', 'framework', 'library', 'tool']):
+            quality += 0.2
+    scores = {
+        'stars': 1.0 if repo['stars'] >= 10000 else repo['stars'] / 10000,
+        'forks': 1.0 if repo['forks'] >= 5000 else repo['forks'] / 5000,
+        'today_stars': 1.0 if repo['today_stars'] >= 1000 else repo['today_stars'] / 1000,
+        'language_popularity': popular.get((repo.get('language') or '').lower(), 0.5),
+        'description_quality': min(quality, 1.0),
+    }
+    weights = {'stars': 0.3, 'forks': 0.2, 'today_stars': 0.2,
+               'language_popularity': 0.15, 'description_quality': 0.15}
+    return round(sum(scores[m] * weights[m] for m in weights) * 100, 2)
+
+
+@pytest.fixture
+def trending():
+    return get_scoring_kernel('trending')
+
+
+def test_trending_kernel_matches_reference(trending):
+    repos = make_repos(3000, seed=3)
+    assert [trending.score(r) for r in repos] == [reference_trending_score(r) for r in repos]
+
+
+def test_batch_and_sql_forms_match_scalar(trending):
+    repos = make_repos(3000, seed=4)
+    engine = create_engine('sqlite://')
+    event.listen(engine, 'connect', lambda conn, _: conn.create_function(
+        'activity_round', 2, round, deterministic=True))
+    table = Table(
+        'repos', MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('stars', Integer), Column('forks', Integer), Column('today_stars', Integer),
+        Column('language', String), Column('description', String),
+    )
+    table.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [
+            {'id': i, **{f: r[f] for f in trending.fields}} for i, r in enumerate(repos)
+        ])
+        sql_scores = conn.execute(
+            select(trending.sql_score(table, round_func=func.activity_round)).order_by(table.c.id)
+        ).scalars().all()
+
+    expected = [trending.score(r) for r in repos]
+    assert trending.score_batch(repos)['scores'].tolist() == expected
+    assert sql_scores == expected
+
+
+def test_versions_are_kept_side_by_side(trending):
+    config = {'version': 1, 'components': [
+        {'metric': 'stars', 'field': 'stars', 'weight': 1.0, 'cap': 100}]}
+    v1 = register_scoring_kernel(ScoringKernel.from_config('test-stars', config))
+    v2 = register_scoring_kernel(ScoringKernel.from_config(
+        'test-stars', {**config, 'version': 2, 'scale': 10}))
+
+    assert get_scoring_kernel('test-stars') is v2
+    assert get_scoring_kernel('test-stars', version=1) is v1
+    assert v1.fingerprint != v2.fingerprint
+    assert (v1.score({'stars': 50}), v2.score({'stars': 50})) == (50.0, 5.0)
+    with pytest.raises(KeyError):
+        get_scoring_kernel('test-stars', version=3)
+
+
+def test_analyzer_scores_unprocessed_repositories(trending):
+    repos = make_repos(20, seed=5)
+    repos[0]['activity_score'] = 12.5
+    analysis = TrendAnalyzer().analyze(DataContainer(repos))
+
+    assert analysis['score_version'] == 'trending/v1'
+    scores = {r['name']: r['score'] for group in analysis['trends']['activity_trends'].values()
+              for r in group['repos']}
+    assert scores['owner/repo-0'] == 12.5
+    assert scores['owner/repo-1'] == trending.score(repos[1])
@@ -0,0 +1,151 @@
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.crawler.github_crawler import GitHubCrawler
+from src.crawler.throttle import AdaptiveRateController
+from src.utils.exceptions import CrawlerException
+
+PAGE = '<article class="Box-row"><h2><a href="/a/b">a / b</a></h2></article>'
+
+
+@pytest.fixture
+def scripted_server():
+    """按脚本依次返回状态码和响应头的替身服务器"""
+    script = deque()
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            status, headers = script.popleft() if script else (200, {})
+            body = PAGE.encode('utf-8') if status == 200 else b'{"message": "rate limited"}'
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, str(value))
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/trending", script, requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def _crawler(url, clock, **kwargs):
+    throttle = AdaptiveRateController(clock=clock, sleep=clock.sleep, jitter=lambda: 1.0, **kwargs)
+    crawler = GitHubCrawler(throttle=throttle)
+    crawler.base_url = url
+    return crawler
+
+
+def test_429_retry_after_pauses_then_succeeds(scripted_server, clock):
+    url, script, seen = scripted_server
+    script.append((429, {'Retry-After': 7}))
+    crawler = _crawler(url, clock)
+
+    result = crawler.fetch(language='python')
+    assert 'a / b' in result.data
+    assert len(seen) == 2
+    assert clock.sleeps == [7.0]
+
+
+def test_403_exhausted_quota_waits_until_reset(scripted_server, clock):
+    url, script, seen = scripted_server
+    reset = int(clock.now) + 30
+    script.append((403, {'X-RateLimit-Remaining': 0, 'X-RateLimit-Reset': reset}))
+    crawler = _crawler(url, clock)
+
+    crawler.fetch(language='go')
+    assert clock.now == reset
+    assert crawler.throttle.paused_until == reset
+
+
+def test_server_errors_use_exponential_backoff(scripted_server, clock):
+    url, script, seen = scripted_server
+    script.extend([(502, {}), (503, {})])
+    crawler = _crawler(url, clock, base_delay=0.5)
+
+    crawler.fetch(language='rust')
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_plain_403_is_not_retried(scripted_server, clock):
+    url, script, seen = scripted_server
+    script.append((403, {}))
+    crawler = _crawler(url, clock)
+
+    with pytest.raises(CrawlerException):
+        crawler.fetch(language='java')
+    assert len(seen) == 1
+
+
+def test_gives_up_after_max_retries(scripted_server, clock):
+    url, script, seen = scripted_server
+    script.extend([(500, {})] * 3)
+    crawler = _crawler(url, clock, max_retries=2)
+
+    with pytest.raises(CrawlerException):
+        crawler.fetch(language='c')
+    assert len(seen) == 3
+
+
+def test_remaining_quota_sets_request_spacing(scripted_server, clock):
+    url, script, seen = scripted_server
+    script.append((200, {'X-RateLimit-Remaining': 10, 'X-RateLimit-Reset': int(clock.now) + 100}))
+    crawler = _crawler(url, clock)
+
+    crawler.fetch(language='python')
+    assert crawler.throttle.min_interval == pytest.approx(10.0)
+    crawler.fetch(language='go')
+    assert clock.sleeps == [pytest.approx(10.0)]
+
+
+def test_exhausted_quota_pauses_before_the_next_request(scripted_server, clock):
+    url, script, seen = scripted_server
+    reset = int(clock.now) + 40
+    script.append((200, {'X-RateLimit-Remaining': 0, 'X-RateLimit-Reset': reset}))
+    crawler = _crawler(url, clock)
+
+    crawler.fetch(language='python')
+    assert crawler.throttle.paused_until == reset
+    crawler.fetch(language='go')
+    # 下一次请求等到重置时间，不会先被限流
+    assert clock.now == reset
+    assert len(seen) == 2
+
+
+def test_rate_limits_keep_pausing_past_max_retries(scripted_server, clock):
+    url, script, seen = scripted_server
+    script.extend([(429, {'Retry-After': 5000})] * 4)
+    crawler = _crawler(url, clock, max_retries=1, max_pause=600)
+
+    result = crawler.fetch(language='python')
+    assert 'a / b' in result.data
+    assert len(seen) == 5
+    assert clock.sleeps == [600.0] * 4
+
+
+def test_fetch_stream_closes_the_response_on_http_errors(scripted_server, clock, monkeypatch):
+    url, script, seen = scripted_server
+    script.append((404, {}))
+    crawler = _crawler(url, clock)
+    responses = []
+    get = crawler.session.get
+
+    def recording_get(*args, **kwargs):
+        response = get(*args, **kwargs)
+        responses.append(response)
+        return response
+
+    monkeypatch.setattr(crawler.session, 'get', recording_get)
+    with pytest.raises(CrawlerException):
+        crawler.fetch_stream(language='python')
+    assert len(responses) == 1 and responses[0].raw.closed
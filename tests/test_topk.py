@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from src.analyzers.topk import MultiTopK, TopK
+
+
+def make_items(count, seed=0, spread=30):
+    rng = random.Random(seed)
+    return [{'name': f'repo-{i}', 'stars': rng.randint(0, spread), 'forks': rng.randint(0, 5)}
+            for i in range(count)]
+
+
+@pytest.mark.parametrize('k', [0, 1, 5, 50, 1000])
+def test_matches_stable_sort(k):
+    items = make_items(300)
+    assert TopK(k, 'stars').extend(items).items() == \
+        sorted(items, key=lambda x: x.get('stars', 0), reverse=True)[:k]
+
+
+def test_callable_key_and_missing_field():
+    items = make_items(100, seed=1) + [{'name': 'no-stars'}]
+    key = lambda x: (x.get('stars', 0), -x.get('forks', 0))
+    assert TopK(10, key).extend(items).items() == sorted(items, key=key, reverse=True)[:10]
+    assert TopK(200, 'stars').extend(items).items()[-1]['name'] == 'no-stars'
+
+
+def test_merge_of_shards_equals_whole():
+    items = make_items(1000, seed=2)
+    whole = MultiTopK(5, {'stars': 'stars', 'forks': 'forks'}).extend(items)
+
+    shards = []
+    for start in range(0, len(items), 137):
+        shard = MultiTopK(5, {'stars': 'stars', 'forks': 'forks'})
+        for offset, item in enumerate(items[start:start + 137]):
+            shard.push(item, sequence=start + offset)
+        shards.append(shard)
+
+    merged = shards.pop()
+    for shard in shards:
+        merged.merge(shard)
+    assert merged.results() == whole.results()
+
+
+def test_entries_expose_values_and_sequences():
+    topk = TopK(2, 'stars').extend([{'stars': 1}, {'stars': 3}, {'stars': 3}])
+    assert [(value, seq) for value, seq, _ in topk.entries()] == [(3, 1), (3, 2)]
+
+
+@pytest.mark.slow
+def test_topk_benchmark():
+    items = make_items(1_000_000, seed=3, spread=10 ** 6)
+    keys = ['stars', 'forks']
+
+    expected = {key: sorted(items, key=lambda x: x.get(key, 0), reverse=True)[:5] for key in keys}
+    assert MultiTopK(5, {key: key for key in keys}).extend(items).results() == expected
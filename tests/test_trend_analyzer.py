@@ -0,0 +1,151 @@
+import json
+import math
+import random
+from collections import defaultdict
+
+import pytest
+
+from src.analyzers.aggregate import TrendAccumulator
+from src.analyzers.trend import TrendAnalyzer
+from src.core.base import DataContainer
+
+
+def make_scored_repos(count, seed=0):
+    rng = random.Random(seed)
+    repos = []
+    for i in range(count):
+        repo = {
+            'name': f'owner/repo-{i}',
+            # 取值范围小，制造大量并列
+            'stars': rng.randint(0, 50),
+            'forks': rng.randint(0, 20),
+            'today_stars': rng.randint(0, 10),
+            'activity_score': rng.choice([0, 49.99, 50, 80, round(rng.uniform(0, 100), 2)]),
+        }
+        language = rng.choice(['Python', 'Go', None, 'missing'])
+        if language != 'missing':
+            repo['language'] = language
+        repos.append(repo)
+    return repos
+
+
+def reference_analysis(repositories):
+    """改造前 TrendAnalyzer 的多遍计算，平均值改为精确求和/数量"""
+    scores = [r.get('activity_score', 0) for r in repositories]
+    language_counts = defaultdict(int)
+    language_stats = defaultdict(lambda: {'repos': 0, 'total_stars': 0, 'total_forks': 0,
+                                          'avg_activity': [], 'repositories': []})
+    ranges = {'high': {'min': 80, 'repos': []}, 'medium': {'min': 50, 'repos': []},
+              'low': {'min': 0, 'repos': []}}
+    for repo in repositories:
+        language = repo.get('language', 'Unknown')
+        language_counts[language] += 1
+        stats = language_stats[language]
+        stats['repos'] += 1
+        stats['total_stars'] += repo.get('stars', 0)
+        stats['total_forks'] += repo.get('forks', 0)
+        stats['avg_activity'].append(repo.get('activity_score', 0))
+        stats['repositories'].append(repo['name'])
+        for data in ranges.values():
+            if repo.get('activity_score', 0) >= data['min']:
+                data['repos'].append({'name': repo['name'], 'score': repo.get('activity_score', 0),
+                                      'language': language})
+                break
+    metrics = {
+        'total_repositories': len(repositories),
+        'total_stars': sum(r.get('stars', 0) for r in repositories),
+        'total_forks': sum(r.get('forks', 0) for r in repositories),
+        'average_activity_score': math.fsum(scores) / len(repositories) if repositories else 0,
+        'language_distribution': dict(language_counts),
+        'min_activity': min(scores) if scores else 0,
+        'max_activity': max(scores) if scores else 0,
+    }
+    popularity = {
+        name: sorted(repositories, key=lambda r: r.get(key, 0), reverse=True)[:5]
+        for name, key in [('most_starred', 'stars'), ('most_forked', 'forks'),
+                          ('trending_today', 'today_stars')]
+    }
+    for stats in language_stats.values():
+        stats['avg_activity'] = math.fsum(stats['avg_activity']) / stats['repos']
+    return metrics, dict(language_stats), ranges, popularity
+
+
+def without_timestamp(analysis):
+    return {k: v for k, v in analysis.items() if k != 'timestamp'}
+
+
+@pytest.mark.parametrize('count', [0, 1, 7, 2000])
+def test_analyze_matches_multi_pass(count):
+    repos = make_scored_repos(count, seed=count)
+    metrics, languages, ranges, popularity = reference_analysis(repos)
+    analysis = TrendAnalyzer().analyze(DataContainer(repos))
+
+    assert analysis['metrics'] == metrics
+    assert analysis['trends'] == {
+        'language_trends': languages,
+        'activity_trends': ranges,
+        'popularity_trends': popularity,
+    }
+    assert [r['name'] for r in analysis['trends']['popularity_trends']['most_starred']] == \
+        [r['name'] for r in popularity['most_starred']]
+
+
+def test_analyze_consumes_iterator_once():
+    repos = make_scored_repos(500, seed=9)
+    analyzer = TrendAnalyzer()
+    consumed = []
+
+    def stream():
+        for repo in repos:
+            consumed.append(repo['name'])
+            yield repo
+
+    streamed = analyzer.analyze(DataContainer(stream()))
+    assert len(consumed) == len(repos)
+    assert without_timestamp(streamed) == without_timestamp(analyzer.analyze(DataContainer(repos)))
+
+
+def test_sharded_analysis_matches_single_process():
+    repos = make_scored_repos(3000, seed=11)
+    repos[5].pop('activity_score')
+    analyzer = TrendAnalyzer()
+
+    expected = without_timestamp(analyzer.analyze(DataContainer(repos)))
+    sharded = analyzer.analyze(DataContainer(iter(repos)), workers=2, shard_size=97)
+    assert without_timestamp(sharded) == expected
+
+
+def test_calculate_metrics_scores_unprocessed_repositories():
+    repos = make_scored_repos(200, seed=13)
+    for repo in repos[:20]:
+        repo.pop('activity_score')
+    analyzer = TrendAnalyzer()
+
+    assert analyzer.calculate_metrics(DataContainer(repos)) == analyzer.analyze(DataContainer(repos))['metrics']
+
+
+def test_partial_state_round_trips_through_json():
+    repos = make_scored_repos(1000, seed=12)
+    whole = TrendAnalyzer().accumulate(repos)
+
+    merged = None
+    for offset in range(0, len(repos), 300):
+        part = TrendAccumulator(offset=offset).update(repos[offset:offset + 300])
+        state = json.loads(json.dumps(part.to_state()))
+        part = TrendAccumulator.from_state(state)
+        merged = part if merged is None else merged.merge(part)
+
+    assert merged.metrics() == whole.metrics()
+    assert merged.language_trends() == whole.language_trends()
+    assert merged.activity_trends() == whole.activity_trends()
+    assert merged.popularity_trends() == whole.popularity_trends()
+
+
+@pytest.mark.slow
+def test_analyze_benchmark():
+    repos = make_scored_repos(200_000, seed=1)
+    analyzer = TrendAnalyzer()
+
+    single = analyzer.analyze(DataContainer(iter(repos)))
+    sharded = analyzer.analyze(DataContainer(iter(repos)), workers=4, shard_size=20000)
+    assert without_timestamp(sharded) == without_timestamp(single)